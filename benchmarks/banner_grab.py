@@ -0,0 +1,101 @@
+"""Measure banner grabs per second and signature matching throughput.
+
+A separate process serves SSH-, FTP-, SMTP- and HTTP-like banners on
+loopback ports. BannerGrabber identifies ROUNDS x those ports with
+CONCURRENCY connections in flight. The combined ServiceMatcher regex is
+then timed against trying each signature with re.match in turn.
+
+    python benchmarks/banner_grab.py
+"""
+import asyncio
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from core.fingerprint import SIGNATURES, BannerGrabber, ServiceMatcher
+
+HOST = '127.0.0.51'
+ROUNDS = 500
+CONCURRENCY = 256
+SERVER_FIRST = [
+    b"SSH-2.0-OpenSSH_9.6p1 Ubuntu-3ubuntu13\r\n",
+    b"220 (vsFTPd 3.0.5)\r\n",
+    b"220 mail.example.com ESMTP Postfix (Ubuntu)\r\n",
+]
+HTTP_REPLY = b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\nServer: nginx/1.25.3\r\n\r\n"
+
+
+def serve(ports_out):
+    async def main():
+        servers = []
+        for banner in SERVER_FIRST:
+            async def talk_first(reader, writer, banner=banner):
+                writer.write(banner)
+                await writer.drain()
+                writer.close()
+            servers.append(await asyncio.start_server(talk_first, HOST, 0, backlog=1024))
+
+        async def http(reader, writer):
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(HTTP_REPLY)
+            await writer.drain()
+            writer.close()
+        servers.append(await asyncio.start_server(http, HOST, 0, backlog=1024))
+        ports_out.send([server.sockets[0].getsockname()[1] for server in servers])
+        await asyncio.Event().wait()
+    asyncio.run(main())
+
+
+async def grab_all(grabber, ports):
+    limit = asyncio.Semaphore(CONCURRENCY)
+    identified = 0
+
+    async def one(port):
+        nonlocal identified
+        async with limit:
+            fingerprint = await grabber.identify(HOST, port)
+        identified += fingerprint.matched
+
+    await asyncio.gather(*(one(port) for _ in range(ROUNDS) for port in ports))
+    return identified
+
+
+def main():
+    context = multiprocessing.get_context('spawn')
+    reader, writer = context.Pipe(duplex=False)
+    server = context.Process(target=serve, args=(writer,), daemon=True)
+    server.start()
+    ports = reader.recv()
+
+    grabber = BannerGrabber(timeout=2.0, wait=0.05)
+    start = time.perf_counter()
+    identified = asyncio.run(grab_all(grabber, ports))
+    elapsed = time.perf_counter() - start
+    total = ROUNDS * len(ports)
+    print(f"banner grabs: {total / elapsed:8.0f}/s ({identified}/{total} identified, "
+          f"{CONCURRENCY} in flight)")
+    server.terminate()
+
+    banners = [*SERVER_FIRST, HTTP_REPLY, b"\x16\x03\x03\x00\x51\x02\x00", b"unknown service\r\n"] * 2000
+    matcher = ServiceMatcher()
+    compiled = [(service, re.compile(pattern, re.DOTALL)) for service, _, pattern in SIGNATURES]
+
+    start = time.perf_counter()
+    for banner in banners:
+        matcher.match(banner)
+    combined = len(banners) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for banner in banners:
+        next((service for service, pattern in compiled if pattern.match(banner)), None)
+    looped = len(banners) / (time.perf_counter() - start)
+    print(f"matching: combined regex {combined:9.0f}/s, per-signature loop {looped:9.0f}/s "
+          f"({len(SIGNATURES)} signatures)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Replay the legacy CSV port log through PortEventLog and compare size and fidelity.
+
+Every "Port table refreshed. Open ports: [...]" line of the CSV log is fed
+to PortEventLog with its original timestamp. The script reports both file
+sizes and checks that replay_port_log() returns exactly the logged list,
+order included, at every refresh.
+
+The legacy lists repeat every dual-stack listener (IPv4 and IPv6 twins of
+the same port and pid). The same refreshes are then collapsed on
+(proto, port, pid) the way get_open_ports() now reports them, and the row
+counts and log sizes compared.
+
+    python benchmarks/event_log.py [network_monitor_logs.csv]
+"""
+import ast
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from core.eventlog import PortEventLog, replay_port_log
+
+MARKER = "Port table refreshed. Open ports: "
+
+
+def read_refreshes(path):
+    """Yield (timestamp, open_ports) for every refresh line of the CSV log."""
+    with open(path) as f:
+        for line in f:
+            head, sep, ports = line.partition(MARKER)
+            if not sep:
+                continue
+            stamp = datetime.strptime(head[:23], "%Y-%m-%d %H:%M:%S,%f").timestamp()
+            yield stamp, ast.literal_eval(ports.strip())
+
+
+def collapse(open_ports):
+    """Merge legacy (port, pid) twins into one TCP entry, keeping first-seen order."""
+    collapsed = {}
+    for entry in open_ports:
+        collapsed.setdefault((entry['port'], entry['pid']), dict(entry, proto='tcp'))
+    return list(collapsed.values())
+
+
+def record_all(path, refreshes):
+    event_log = PortEventLog(path)
+    for stamp, open_ports in refreshes:
+        event_log.record(open_ports, stamp)
+    event_log.close()
+    return sum(1 for stamp, open_ports in refreshes if replay_port_log(path, stamp) != open_ports)
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "network_monitor_logs.csv"
+    refreshes = list(read_refreshes(csv_path))
+
+    with tempfile.TemporaryDirectory() as directory:
+        events_path = os.path.join(directory, "events.jsonl")
+        start = time.perf_counter()
+        mismatches = record_all(events_path, refreshes)
+        elapsed = time.perf_counter() - start
+        csv_size = os.path.getsize(csv_path)
+        events_size = os.path.getsize(events_path)
+
+        collapsed = [(stamp, collapse(open_ports)) for stamp, open_ports in refreshes]
+        collapsed_path = os.path.join(directory, "collapsed.jsonl")
+        collapsed_mismatches = record_all(collapsed_path, collapsed)
+        collapsed_size = os.path.getsize(collapsed_path)
+
+    print(f"refreshes: {len(refreshes)} (recorded and replayed in {elapsed * 1000:.0f} ms)")
+    print(f"CSV log:   {csv_size / 1e6:8.2f} MB")
+    print(f"event log: {events_size / 1e6:8.3f} MB ({csv_size / events_size:.0f}x smaller)")
+    print(f"exact replays: {len(refreshes) - mismatches}/{len(refreshes)}")
+    rows = sum(len(open_ports) for _, open_ports in refreshes)
+    collapsed_rows = sum(len(open_ports) for _, open_ports in collapsed)
+    legacy_text = sum(len(repr(open_ports)) for _, open_ports in refreshes)
+    collapsed_text = sum(len(repr(open_ports)) for _, open_ports in collapsed)
+    print(f"rows: {rows} legacy, {collapsed_rows} collapsed on (proto, port, pid) "
+          f"({collapsed_rows / rows:.0%})")
+    print(f"port list text: {legacy_text / 1e6:.2f} MB legacy, {collapsed_text / 1e6:.2f} MB collapsed")
+    print(f"collapsed event log: {collapsed_size / 1e6:8.3f} MB, exact replays: "
+          f"{len(collapsed) - collapsed_mismatches}/{len(collapsed)}")
+
+
+if __name__ == '__main__':
+    main()
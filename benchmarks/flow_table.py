@@ -0,0 +1,88 @@
+"""Time the Connections page's FlowIndex on a proxy-sized flow table.
+
+FLOWS synthetic established connections (a proxy with a few processes
+talking to a few thousand upstreams) are loaded once. The script then
+times the operations the GUI thread performs: a refresh with CHURN of the
+flows replaced, filter keystrokes, a sort change, grouping, and formatting
+one screen of rows. The collector-side diff is timed as well, since it
+runs on every refresh.
+
+    python benchmarks/flow_table.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from core.flows import Flow, FlowIndex, diff_flows
+
+FLOWS = 200_000
+CHURN = 0.01
+SCREEN_ROWS = 40
+PROCESSES = ['haproxy', 'nginx', 'envoy', 'sshd']
+UPSTREAMS = 3000
+
+
+def make_flow(rng, local_port):
+    upstream = rng.randrange(UPSTREAMS)
+    return Flow('tcp', '10.0.0.1', local_port, f"10.{upstream % 7 + 1}.{upstream // 254}.{upstream % 254 + 1}",
+                rng.choice([80, 443, 8080, 8443]), 'ESTABLISHED', 1000 + rng.randrange(4),
+                rng.choice(PROCESSES))
+
+
+def key_of(flow):
+    return flow.proto, flow.local_ip, flow.local_port, flow.remote_ip, flow.remote_port, flow.pid
+
+
+def timed(label, action, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = action()
+    print(f"{label:42s} {(time.perf_counter() - start) / repeat * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    rng = random.Random(1)
+    ports = iter(range(1024, 10 ** 9))
+    flows = {}
+    while len(flows) < FLOWS:
+        flow = make_flow(rng, next(ports))
+        flows[key_of(flow)] = flow
+    index = FlowIndex()
+    print(f"{FLOWS} flows, {len(set(f.remote_ip for f in flows.values()))} remote hosts")
+    timed("initial load", lambda: index.apply(flows, [], {}))
+
+    def churn():
+        removed = rng.sample(list(index.flows), int(FLOWS * CHURN))
+        added = {}
+        for _ in removed:
+            flow = make_flow(rng, next(ports))
+            added[key_of(flow)] = flow
+        changed = {key: index.flows[key]._replace(status='CLOSE_WAIT')
+                   for key in rng.sample(list(index.flows), 100)}
+        return added, removed, changed
+
+    diffs = [churn() for _ in range(5)]
+    timed(f"refresh, {CHURN:.0%} churn (apply diff)", lambda: index.apply(*diffs.pop()), repeat=5)
+
+    statuses = {key: flow.status for key, flow in index.flows.items()}
+    next_statuses = dict(statuses)
+    for key in rng.sample(list(next_statuses), int(FLOWS * CHURN)):
+        del next_statuses[key]
+    timed("collector diff of two snapshots", lambda: diff_flows(statuses, next_statuses))
+
+    for text in ["10", "10.3", "10.3.1", "10.3.12", "10.3.12.7", "nginx", ""]:
+        timed(f"filter keystroke {text!r}", lambda: index.set_filter(text))
+        print(f"{'':42s} {len(index.visible):8d} shown")
+    timed("sort by process", lambda: index.set_sort('process'))
+    timed("reverse sort (no re-sort)", lambda: index.set_sort('process', descending=True))
+    timed("group by remote host", lambda: index.groups('remote_ip'))
+    timed(f"format one screen ({SCREEN_ROWS} rows)",
+          lambda: [index.flow_at(row) for row in range(1000, 1000 + SCREEN_ROWS)], repeat=100)
+
+
+if __name__ == '__main__':
+    main()
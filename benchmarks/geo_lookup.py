@@ -0,0 +1,90 @@
+"""Benchmark offline geolocation on a GeoLite2-City-sized synthetic prefix table.
+
+Writes a prefix-table CSV with NETWORKS IPv4 networks (nested /12../24
+blocks, city-level records repeated across many networks as in the real
+databases), compiles it to .mmdb, then reports open time, resident memory
+added by opening, and lookup rates for cold and repeated addresses.
+
+    python benchmarks/geo_lookup.py [--networks 300000] [--lookups 200000]
+"""
+import argparse
+import csv
+import ipaddress
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import psutil
+
+from core.geodb import OfflineGeoProvider, compile_prefix_table
+
+CITIES = 5000
+
+
+def write_table(path, count, rng):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['network', 'latitude', 'longitude', 'country_code', 'country', 'city', 'asn', 'as_org'])
+        seen = set()
+        while len(seen) < count:
+            prefix = rng.choice((12, 16, 20, 22, 24, 24, 24))
+            network = ipaddress.ip_network((rng.getrandbits(32) >> (32 - prefix) << (32 - prefix), prefix))
+            if network in seen:
+                continue
+            seen.add(network)
+            city = rng.randrange(CITIES)
+            writer.writerow([network, f"{city % 180 - 90}.{city % 97}", f"{city % 360 - 180}.{city % 89}",
+                             chr(65 + city % 26) + chr(65 + city // 26 % 26), f"Country {city % 200}",
+                             f"City {city}", 64512 + city % 1000, f"Network {city % 1000}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--networks', type=int, default=300_000)
+    parser.add_argument('--lookups', type=int, default=200_000)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        table = os.path.join(directory, "table.csv")
+        write_table(table, args.networks, rng)
+        db_path = os.path.join(directory, "geo.mmdb")
+        start = time.perf_counter()
+        compile_prefix_table([table], db_path)
+        print(f"compiled {args.networks} networks into {os.path.getsize(db_path) / 1e6:.1f} MB "
+              f"in {time.perf_counter() - start:.1f} s")
+
+        process = psutil.Process()
+        before = process.memory_info()
+        rss, shared = before.rss, before.shared
+        start = time.perf_counter()
+        geo = OfflineGeoProvider([db_path])
+        print(f"open: {(time.perf_counter() - start) * 1e6:.0f} us, "
+              f"resident memory added: {(process.memory_info().rss - rss) / 1024:.0f} KB")
+
+        addresses = [str(ipaddress.ip_address(rng.getrandbits(32))) for _ in range(args.lookups)]
+        start = time.perf_counter()
+        located = sum(geo.lookup(ip) is not None for ip in addresses)
+        elapsed = time.perf_counter() - start
+        print(f"random addresses: {elapsed / len(addresses) * 1e6:.1f} us/lookup "
+              f"({located}/{len(addresses)} located)")
+
+        hops = addresses[:30]  # a trace's worth, looked up again and again (cached)
+        start = time.perf_counter()
+        for _ in range(1000):
+            for ip in hops:
+                geo.lookup(ip)
+        print(f"repeated addresses: {(time.perf_counter() - start) / (1000 * len(hops)) * 1e6:.1f} us/lookup")
+        after = process.memory_info()
+        # Mapped database pages are file-backed (reclaimable page cache), so report them apart
+        print(f"resident memory added after lookups: {(after.rss - rss) / 1024:.0f} KB, "
+              f"of which file-backed: {(after.shared - shared) / 1024:.0f} KB")
+        geo.close()
+
+
+if __name__ == '__main__':
+    main()
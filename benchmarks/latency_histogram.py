@@ -0,0 +1,74 @@
+"""Ingest 10M latency samples into per-minute histograms and watch memory stay flat.
+
+Feeds SAMPLES lognormal latencies (ms) to a LatencyWindow in batches of
+BATCH, one batch per simulated minute, so the window fills up to its
+RETENTION and then drops its oldest buckets. Reports the ingest rate,
+resident memory at every tenth of the run, the p50/p99/p99.9 of the last
+RETENTION merged against the exact percentiles of the same samples, and
+the rate of single-sample add_one() calls used by the trace probes.
+
+    python benchmarks/latency_histogram.py [--samples 10000000] [--batch 10000] [--retention 3600]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import psutil
+
+from core.latency import LatencyHistogram, LatencyWindow
+
+
+def batches(count, size, seed=1):
+    rng = np.random.default_rng(seed)
+    for done in range(0, count, size):
+        yield rng.lognormal(3, 0.7, min(size, count - done))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=10_000_000)
+    parser.add_argument('--batch', type=int, default=10_000)
+    parser.add_argument('--retention', type=int, default=3600)
+    args = parser.parse_args()
+
+    process = psutil.Process()
+    window = LatencyWindow(retention=args.retention)
+    rounds = -(-args.samples // args.batch)
+    checkpoints = {round(rounds * i / 10) for i in range(1, 11)}
+    start_time = time.time() - rounds * window.bucket_seconds
+    elapsed = 0.0
+    print(f"{'samples':>12} {'buckets':>8} {'RSS MB':>8}")
+    for i, values in enumerate(batches(args.samples, args.batch), 1):
+        timestamp = start_time + i * window.bucket_seconds
+        start = time.perf_counter()
+        window.add(values, timestamp)
+        elapsed += time.perf_counter() - start
+        if i in checkpoints:
+            print(f"{min(i * args.batch, args.samples):>12} {len(window.buckets):>8} "
+                  f"{process.memory_info().rss / 1e6:>8.1f}")
+    print(f"ingest: {args.samples / elapsed / 1e6:.1f}M samples/s")
+
+    end = start_time + rounds * window.bucket_seconds
+    merged = window.merged(end - args.retention, end)
+    # Regenerate the same samples to get the exact percentiles of the retained minutes
+    kept = len(window.buckets)
+    exact = np.concatenate([values for i, values in enumerate(batches(args.samples, args.batch))
+                            if i >= rounds - kept])
+    assert merged.total == len(exact)
+    for q in (0.5, 0.99, 0.999):
+        print(f"p{q * 100:g}: {merged.quantile(q):7.2f} ms (exact {np.quantile(exact, q):7.2f} ms)")
+
+    histogram = LatencyHistogram()
+    singles = exact[:1_000_000].tolist()
+    start = time.perf_counter()
+    for value in singles:
+        histogram.add_one(value)
+    print(f"add_one: {len(singles) / (time.perf_counter() - start) / 1e6:.2f}M samples/s")
+
+
+if __name__ == '__main__':
+    main()
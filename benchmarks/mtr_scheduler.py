@@ -0,0 +1,65 @@
+"""Measure the CPU cost of continuous tracing with many concurrent targets.
+
+One MtrScheduler monitors TARGETS loopback addresses under 127.0.0.0/8
+(one hop each, answered by the local stack) for SECONDS seconds, and the
+script reports probes sent and answered, the process CPU time spent per
+second and per probe (the main thread only sleeps), and resident memory
+added per target. On loopback, system time includes the kernel answering
+the probes, work a real network's routers would do. Linux caps ICMP
+errors at net.ipv4.icmp_msgs_per_sec (1000/s by default) even on
+loopback; above that rate probes are lost, not slowed.
+
+    python benchmarks/mtr_scheduler.py [--targets 500] [--interval 1.0] [--seconds 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import psutil
+
+from core.mtr import MtrScheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', type=int, default=500)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    scheduler = MtrScheduler(interval=args.interval)
+    scheduler.start()
+    latest = {}
+    targets = [f"127.0.{i // 250}.{i % 250 + 1}" for i in range(args.targets)]
+    for target in targets:
+        scheduler.add(target, lambda hops, target=target: latest.__setitem__(target, hops))
+    time.sleep(args.interval * 2)  # let every target finish its first rounds
+
+    cpu = process.cpu_times()
+    sent = sum(hops[0]['sent'] for hops in latest.values())
+    start = time.perf_counter()
+    time.sleep(args.seconds)
+    elapsed = time.perf_counter() - start
+    user = process.cpu_times().user - cpu.user
+    system = process.cpu_times().system - cpu.system
+    probes = sum(hops[0]['sent'] for hops in latest.values()) - sent
+    scheduler.stop()
+    scheduler.join()
+
+    received = sum(hops[0]['received'] for hops in latest.values())
+    total = sum(hops[0]['sent'] for hops in latest.values())
+    print(f"{args.targets} targets every {args.interval:g} s: {probes / elapsed:.0f} probes/s, "
+          f"{received}/{total} answered")
+    print(f"scheduler CPU: user {user / elapsed * 100:.1f}% + system {system / elapsed * 100:.1f}% "
+          f"of one core, {(user + system) / probes * 1e6:.0f} us/probe "
+          f"({user / probes * 1e6:.0f} us in Python)")
+    print(f"resident memory: {(process.memory_info().rss - rss) / args.targets / 1024:.1f} KB/target")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark the memory-mapped OUI vendor database on a registry-sized synthetic input.
+
+Writes IEEE-format MA-L / MA-M / MA-S CSVs with the sizes of the real
+registries (~40k entries), compiles them, then reports open time, resident
+memory added by opening, and scalar and batch lookup rates.
+
+    python benchmarks/oui_lookup.py [--lookups 2000000]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+import psutil
+
+from core.oui import OuiDatabase, compile_registry
+
+REGISTRY_SIZES = (('MA-L', 6, 36000), ('MA-M', 7, 5500), ('MA-S', 9, 6500))
+
+
+def write_registries(directory, rng):
+    paths = []
+    for registry, digits, count in REGISTRY_SIZES:
+        path = os.path.join(directory, f"{registry}.csv")
+        assignments = rng.sample(range(16 ** digits), count)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["Registry", "Assignment", "Organization Name", "Organization Address"])
+            for value in assignments:
+                writer.writerow([registry, f"{value:0{digits}X}", f"Vendor {value % 9000} Inc.", "Somewhere"])
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lookups', type=int, default=2_000_000)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_registries(directory, rng)
+        db_path = os.path.join(directory, "oui.bin")
+        start = time.perf_counter()
+        entries = compile_registry(paths, db_path)
+        print(f"compiled {entries} entries into {os.path.getsize(db_path) / 1e6:.2f} MB "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        process = psutil.Process()
+        rss = process.memory_info().rss
+        start = time.perf_counter()
+        db = OuiDatabase(db_path)
+        print(f"open: {(time.perf_counter() - start) * 1e6:.0f} us, "
+              f"resident memory added: {(process.memory_info().rss - rss) / 1024:.0f} KB")
+
+        values = np.frombuffer(np.random.default_rng(1).bytes(8 * args.lookups), dtype='<u8') >> np.uint64(16)
+        start = time.perf_counter()
+        offsets = db.lookup_many(values)
+        elapsed = time.perf_counter() - start
+        print(f"batch lookup_many: {args.lookups / elapsed / 1e6:.1f} M lookups/s "
+              f"({np.count_nonzero(offsets >= 0)} hits)")
+
+        # Scalar lookups: a LAN sees the same few hundred MACs over and over
+        lan = [':'.join(f"{(int(v) >> s) & 0xff:02x}" for s in range(40, -8, -8)) for v in values[:500]]
+        sample = [lan[i % len(lan)] for i in range(args.lookups)]
+        start = time.perf_counter()
+        for mac in sample:
+            db.lookup(mac)
+        elapsed = time.perf_counter() - start
+        print(f"scalar lookup (repeating LAN MACs): {args.lookups / elapsed / 1e6:.1f} M lookups/s")
+
+        unique = [':'.join(f"{(int(v) >> s) & 0xff:02x}" for s in range(40, -8, -8)) for v in values[:200000]]
+        start = time.perf_counter()
+        for mac in unique:
+            db._lookup(mac)
+        elapsed = time.perf_counter() - start
+        print(f"scalar lookup (uncached): {len(unique) / elapsed / 1e6:.2f} M lookups/s")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Time a reverse-DNS sweep of a /24 against a local stub DNS server.
+
+A stub server on 127.0.0.1 answers PTR queries for every RESOLVABLE-th
+of HOSTS addresses in 10.99.0.0/24 after DELAY seconds and silently drops
+the rest, like hosts with no reverse zone behind a slow upstream. Lookups use a minimal UDP PTR client
+that gives up after TIMEOUT seconds, the way the system resolver does.
+The script times one lookup at a time (measured on SERIAL hosts and
+extrapolated) against ReverseResolver.lookup_many over all hosts, then
+repeats the sweep to show the cache.
+
+    python benchmarks/reverse_dns.py [--hosts 254] [--timeout 1.0] [--delay 0.05] [--resolvable 4] [--serial 8]
+"""
+import argparse
+import heapq
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from core.resolver import ReverseResolver
+
+PTR = 12
+IN = 1
+
+
+def ptr_name(ip):
+    return ".".join(reversed(ip.split("."))) + ".in-addr.arpa"
+
+
+def encode_name(name):
+    return b"".join(bytes([len(label)]) + label.encode() for label in name.split(".")) + b"\0"
+
+
+def decode_name(packet, offset):
+    """Read an uncompressed name; returns (name, offset just past it)."""
+    labels = []
+    while packet[offset]:
+        length = packet[offset]
+        labels.append(packet[offset + 1:offset + 1 + length].decode())
+        offset += 1 + length
+    return ".".join(labels), offset + 1
+
+
+class StubDnsServer(threading.Thread):
+    """UDP DNS server that answers PTR queries after `delay` and drops the unresolvable ones."""
+
+    def __init__(self, delay, resolvable):
+        super().__init__(daemon=True)
+        self.delay = delay
+        self.resolvable = resolvable
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.address = self.sock.getsockname()
+        self.queries = 0
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def answer(self, query):
+        name, end = decode_name(query, 12)
+        last_octet = int(name.split(".")[0])
+        if last_octet % self.resolvable:
+            return None  # no reverse zone: the query times out
+        question = query[12:end + 4]
+        target = encode_name(f"host-{last_octet}.bench.test")
+        record = struct.pack("!HHHIH", 0xC00C, PTR, IN, 3600, len(target)) + target
+        return query[:2] + struct.pack("!HHHHH", 0x8180, 1, 1, 0, 0) + question + record
+
+    def run(self):
+        pending = []  # heap of (due, sequence, reply, client)
+        while not self.stop_event.is_set():
+            wait = max(pending[0][0] - time.perf_counter(), 0) if pending else 0.1
+            if select.select([self.sock], [], [], wait)[0]:
+                query, client = self.sock.recvfrom(512)
+                self.queries += 1
+                reply = self.answer(query)
+                if reply is not None:
+                    heapq.heappush(pending, (time.perf_counter() + self.delay, self.queries, reply, client))
+            while pending and pending[0][0] <= time.perf_counter():
+                _, _, reply, client = heapq.heappop(pending)
+                self.sock.sendto(reply, client)
+        self.sock.close()
+
+
+def ptr_client(server, timeout):
+    """Blocking reverse lookup against `server`; returns the hostname or None."""
+    def resolve(ip):
+        query_id = int.from_bytes(os.urandom(2), 'big')
+        query = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0) + encode_name(ptr_name(ip))
+        query += struct.pack("!HH", PTR, IN)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(timeout)
+            sock.sendto(query, server)
+            try:
+                reply = sock.recv(512)
+            except socket.timeout:
+                return None
+        query_id_back, flags, _, answers = struct.unpack("!HHHH", reply[:8])
+        if query_id_back != query_id or flags & 0xF or not answers:
+            return None
+        _, offset = decode_name(reply, 12)
+        # Skip the question (type, class) and the answer header (pointer, type, class, TTL, length)
+        return decode_name(reply, offset + 4 + 12)[0]
+    return resolve
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=254)
+    parser.add_argument('--timeout', type=float, default=1.0)
+    parser.add_argument('--delay', type=float, default=0.05)
+    parser.add_argument('--resolvable', type=int, default=4)
+    parser.add_argument('--serial', type=int, default=8)
+    args = parser.parse_args()
+
+    server = StubDnsServer(args.delay, args.resolvable)
+    server.start()
+    resolve = ptr_client(server.address, args.timeout)
+    ips = [f"10.99.0.{i}" for i in range(1, args.hosts + 1)]
+
+    start = time.perf_counter()
+    for ip in ips[:args.serial]:
+        resolve(ip)
+    serial = (time.perf_counter() - start) / args.serial * args.hosts
+    print(f"one at a time: ~{serial:.1f} s for {args.hosts} hosts "
+          f"(measured on {args.serial}, extrapolated)")
+
+    # Wait a little past the client timeout so dropped queries finish as misses
+    resolver = ReverseResolver(timeout=args.timeout + 0.5, resolve=resolve)
+    start = time.perf_counter()
+    results = resolver.lookup_many(ips)
+    elapsed = time.perf_counter() - start
+    named = sum(hostname is not None for hostname in results.values())
+    print(f"lookup_many:   {elapsed:.2f} s for {args.hosts} hosts, {named} named, "
+          f"{elapsed / args.timeout:.2f} lookup timeouts")
+
+    start = time.perf_counter()
+    resolver.lookup_many(ips)
+    print(f"cached sweep:  {(time.perf_counter() - start) * 1000:.2f} ms "
+          f"({server.queries} queries reached the server in total)")
+    server.stop()
+    server.join()
+
+
+if __name__ == '__main__':
+    main()
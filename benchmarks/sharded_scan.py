@@ -0,0 +1,62 @@
+"""Measure how sharded_scan() throughput scales with the number of processes.
+
+A loopback "target farm" of HOSTS addresses under 127.0.3.0/24, each with
+four listening ports, is connect-scanned over PORTS ports with 1, 2, 4 ...
+up to os.cpu_count() processes (or the counts given on the command line).
+Closed loopback ports refuse instantly, so the scan is CPU-bound and the
+probes/s figure shows how well the shards spread across cores.
+
+    python benchmarks/sharded_scan.py [PROCESSES ...]
+"""
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from core.portscanner import sharded_scan
+
+HOSTS = 16
+PORTS = 4000
+OPEN_PORTS = (22, 80, 443, 3389)
+
+
+def open_farm():
+    """Listen on OPEN_PORTS of each farm host; returns the sockets."""
+    listeners = []
+    for i in range(1, HOSTS + 1):
+        for port in OPEN_PORTS:
+            listener = socket.socket()
+            listener.bind((f"127.0.3.{i}", port))
+            listener.listen()
+            listeners.append(listener)
+    return listeners
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    counts = [int(arg) for arg in sys.argv[1:]]
+    counts = counts or sorted({2 ** i for i in range(cpus.bit_length())} | {cpus})
+    listeners = open_farm()
+    targets = [f"127.0.3.{i}" for i in range(1, HOSTS + 1)]
+    expected = {(host, port) for host in targets for port in OPEN_PORTS}
+
+    print(f"{HOSTS} hosts x {PORTS} ports on {cpus} CPU(s)")
+    baseline = None
+    for processes in counts:
+        found = set()
+        start = time.perf_counter()
+        probes = sharded_scan(targets, range(1, PORTS + 1), lambda r: found.add((r.host, r.port)),
+                              processes=processes, concurrency=1024 * processes)
+        rate = probes / (time.perf_counter() - start)
+        baseline = baseline or rate / processes
+        print(f"{processes:3d} process(es): {rate:9.0f} probes/s  "
+              f"scaling {rate / baseline:4.2f}x  farm ports found: {len(expected & found)}/{len(expected)}")
+
+    for listener in listeners:
+        listener.close()
+
+
+if __name__ == '__main__':
+    main()
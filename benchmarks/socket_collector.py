@@ -0,0 +1,117 @@
+"""Benchmark ProcSocketCollector against psutil.net_connections on a synthetic /proc.
+
+Builds a fake procfs with PIDS processes x SOCKETS_PER_PID inet sockets
+(100k by default), points both collectors at it (psutil through
+psutil.PROCFS_PATH) and times a first scan and steady-state rescans.
+
+    python benchmarks/socket_collector.py [--pids 1000] [--sockets-per-pid 100]
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import psutil
+
+from core.socketcollector import ProcSocketCollector, socket_summary
+
+TABLE_HEADER = ("  sl  local_address rem_address   st tx_queue rx_queue tr tm->when "
+                "retrnsmt   uid  timeout inode\n")
+
+
+def hex_v4(ip, port):
+    return f"{int.from_bytes(socket.inet_aton(ip), 'little'):08X}:{port:04X}"
+
+
+def hex_v6(ip, port):
+    packed = socket.inet_pton(socket.AF_INET6, ip)
+    words = (int.from_bytes(packed[i:i + 4], 'little') for i in range(0, 16, 4))
+    return "".join(f"{word:08X}" for word in words) + f":{port:04X}"
+
+
+def table_line(slot, laddr, raddr, state, inode):
+    return (f"{slot:4d}: {laddr} {raddr} {state} 00000000:00000000 00:00000000 "
+            f"00000000  1000        0 {inode} 1 0000000000000000 20 4 30 10 -1\n")
+
+
+def build_fixture(root, pids, sockets_per_pid):
+    """Write a fake procfs under `root`; sockets rotate through tcp/tcp6/udp/udp6."""
+    os.makedirs(os.path.join(root, 'net'))
+    tables = {name: [TABLE_HEADER] for name in ('tcp', 'tcp6', 'udp', 'udp6')}
+    inode = 100000
+    for pid in range(1000, 1000 + pids):
+        fd_dir = os.path.join(root, str(pid), 'fd')
+        os.makedirs(fd_dir)
+        with open(os.path.join(root, str(pid), 'stat'), 'w') as f:
+            f.write(f"{pid} (worker {pid}) S 1 " + " ".join(["0"] * 17) + f" {pid * 10} 0 0\n")
+        # A few non-socket fds per process, like real programs have
+        for fd in range(3):
+            os.symlink('/dev/null', os.path.join(fd_dir, str(fd)))
+        for n in range(sockets_per_pid):
+            inode += 1
+            name = ('tcp', 'tcp6', 'udp', 'udp6')[n % 4]
+            port = 1024 + (inode % 60000)
+            if name == 'tcp':
+                row = table_line(len(tables[name]) - 1, hex_v4('10.0.0.1', port), hex_v4('10.1.2.3', 443), '01', inode)
+            elif name == 'tcp6':
+                row = table_line(len(tables[name]) - 1, hex_v6('::', port), hex_v6('::', 0), '0A', inode)
+            elif name == 'udp':
+                row = table_line(len(tables[name]) - 1, hex_v4('0.0.0.0', port), hex_v4('0.0.0.0', 0), '07', inode)
+            else:
+                row = table_line(len(tables[name]) - 1, hex_v6('fe80::1', port), hex_v6('::', 0), '07', inode)
+            tables[name].append(row)
+            os.symlink(f"socket:[{inode}]", os.path.join(fd_dir, str(n + 3)))
+    for name, lines in tables.items():
+        with open(os.path.join(root, 'net', name), 'w') as f:
+            f.writelines(lines)
+    return inode - 100000
+
+
+def timed(function, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pids', type=int, default=1000)
+    parser.add_argument('--sockets-per-pid', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        total = build_fixture(root, args.pids, args.sockets_per_pid)
+        print(f"fixture: {args.pids} pids, {total} sockets")
+
+        collector = ProcSocketCollector(proc_root=root)
+        ours, first = timed(collector.connections, 1)
+        ours, rescans = timed(collector.connections, args.repeat)
+
+        (per_type, per_remote), summary_times = timed(lambda: socket_summary(root), args.repeat)
+
+        psutil.PROCFS_PATH = root
+        theirs, psutil_times = timed(lambda: psutil.net_connections('inet'), args.repeat)
+
+        key = lambda c: (c.family, c.type, c.laddr, tuple(c.raddr), c.status, c.pid)
+        matches = sorted(map(key, ours)) == sorted(map(key, theirs))
+        print(f"ProcSocketCollector first scan: {first[0] * 1000:8.1f} ms")
+        print(f"ProcSocketCollector rescan:     {min(rescans) * 1000:8.1f} ms (best of {args.repeat})")
+        print(f"socket_summary (sampler):       {min(summary_times) * 1000:8.1f} ms (best of {args.repeat})")
+        print(f"psutil.net_connections:         {min(psutil_times) * 1000:8.1f} ms (best of {args.repeat})")
+        print(f"rows: {len(ours)} vs {len(theirs)}, identical: {matches}")
+        remote = sum(1 for c in ours if c.raddr)
+        print(f"summary: {sum(per_type.values())} sockets, {sum(per_remote.values())} connected "
+              f"(scan: {len(ours)}, {remote})")
+
+
+if __name__ == '__main__':
+    main()
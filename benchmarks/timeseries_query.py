@@ -0,0 +1,92 @@
+"""Time range queries and chart generation over 30 days of 1 s samples.
+
+Writes DAYS days of one-second bandwidth samples (2.6M for 30 days) to a
+TimeSeriesStore, lets RollupStore rebuild the 1m/1h/1d rollups from them
+as it does after a restart, then reports the time of a raw range query
+with a vectorized reduction, a rollup query at WIDTH pixels, building the
+bandwidth chart over the whole range and drawing it with Agg, and
+re-querying after zooming to the last hour.
+
+    python benchmarks/timeseries_query.py [--days 30] [--width 800] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from core.dataanalysis import DataAnalysis, to_plot_dates
+from core.rollups import RollupStore
+from core.timeseries import TimeSeriesStore
+
+METRIC = "bandwidth.total"
+
+
+def best_of(repeat, function):
+    """Fastest of `repeat` calls, in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--width', type=int, default=800)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    rng = np.random.default_rng(1)
+
+    span = args.days * 86400
+    end = float(int(time.time()) - 60)  # leave room for anything the sampler writes
+    start = end - span
+    timestamps = np.arange(start, end, 1.0)
+    values = 50 + 30 * np.sin(timestamps / 3600) + rng.exponential(5, len(timestamps))
+    values[rng.integers(0, len(values), 100)] += 500  # spikes the charts must not drop
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TimeSeriesStore(directory)
+        store.append_many(METRIC, timestamps, values)
+        rollups = RollupStore(store, raw_retention=None)
+        build = time.perf_counter()
+        rollups.append(METRIC, end, values[-1])  # first append rebuilds the rollups
+        print(f"{len(timestamps)} samples over {args.days} days, rollups rebuilt in "
+              f"{time.perf_counter() - build:.1f} s")
+
+        raw = best_of(args.repeat, lambda: rollups.range(METRIC, start, end)[1].mean())
+        print(f"raw range query + mean:     {raw:8.2f} ms")
+        query = best_of(args.repeat, lambda: rollups.query(METRIC, start, end, args.width))
+        resolution = rollups.query(METRIC, start, end, args.width)[4]
+        print(f"rollup query at {args.width} px:     {query:8.2f} ms ({resolution} s level)")
+
+        analysis = DataAnalysis(store=rollups, window=span)
+        analysis.sampler.stop()
+        analysis.sampler.join()
+
+        def chart():
+            fig = analysis.generate_bandwidth_usage(args.width)
+            FigureCanvasAgg(fig).draw()
+            return fig
+
+        print(f"chart build + Agg draw:     {best_of(args.repeat, chart):8.2f} ms")
+        ax = chart().axes[0]
+        zooms = []
+        for _ in range(args.repeat):
+            ax.set_xlim(to_plot_dates([start, end]))
+            zoom = time.perf_counter()
+            ax.set_xlim(to_plot_dates([end - 3600, end]))  # xlim_changed re-queries the line
+            zooms.append(time.perf_counter() - zoom)
+        print(f"zoom to the last hour:      {min(zooms) * 1000:8.2f} ms")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
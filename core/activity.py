@@ -0,0 +1,61 @@
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class PortActivity:
+    """Run-length encoded port activity history.
+
+    Instead of one (timestamp, 1) tuple per port per refresh, each port keeps
+    parallel arrays of interval start/end times during which it was seen
+    listening. Consecutive sightings closer than `gap` seconds extend the
+    current interval, so a port that stays open costs nothing extra per
+    refresh. Intervals older than `retention` seconds are dropped and each
+    port keeps at most `max_intervals`, bounding memory per port.
+    """
+
+    def __init__(self, retention=7 * 24 * 3600, gap=30, max_intervals=1024):
+        self.retention = retention
+        self.gap = gap
+        self.max_intervals = max_intervals
+        self.starts = {}  # port -> array('d') of interval start times
+        self.ends = {}    # port -> array('d') of interval end times
+
+    def record(self, port, timestamp=None):
+        """Mark a port as seen listening at the given time."""
+        now = time.time() if timestamp is None else timestamp
+        starts = self.starts.get(port)
+        if starts is None:
+            self.starts[port] = array('d', [now])
+            self.ends[port] = array('d', [now])
+            return
+        ends = self.ends[port]
+        if now - ends[-1] <= self.gap:
+            ends[-1] = max(ends[-1], now)
+        else:
+            starts.append(now)
+            ends.append(now)
+        self._trim(port, now)
+
+    def _trim(self, port, now):
+        starts, ends = self.starts[port], self.ends[port]
+        # Ends are sorted, so everything before `drop` ended outside the window
+        drop = bisect_left(ends, now - self.retention)
+        drop = max(drop, len(starts) - self.max_intervals)
+        if drop > 0:
+            del starts[:drop]
+            del ends[:drop]
+
+    def query(self, port, start=None, end=None):
+        """Return (start, end) intervals for a port that overlap [start, end]."""
+        starts = self.starts.get(port)
+        if starts is None:
+            return []
+        ends = self.ends[port]
+        lo = 0 if start is None else bisect_left(ends, start)
+        hi = len(starts) if end is None else bisect_right(starts, end)
+        return list(zip(starts[lo:hi], ends[lo:hi]))
+
+    def ports(self):
+        """Return all ports with recorded activity."""
+        return list(self.starts)
@@ -1,12 +1,20 @@
 import psutil
-from collections import defaultdict
-import time
 import logging
 import socket
 import requests
 import json
-import subprocess
-import re
+import threading
+import asyncio
+import ipaddress
+from collections import Counter
+from core.socketcollector import ProcSocketCollector, socket_summary
+from core.processcache import ProcessCache
+from core.activity import PortActivity
+from core.eventlog import PortEventLog
+from core.resolver import reverse_resolver
+from core.neighbors import neighbor_table
+from core.discovery import SubnetSweeper, local_networks
+from core.oui import vendor_for
 
 # Configure logging to CSV
 logging.basicConfig(
@@ -18,46 +26,115 @@ logging.basicConfig(
     ]
 )
 
+# Port table history: periodic snapshots plus opened/closed/changed events
+port_event_log = PortEventLog("network_monitor_events.jsonl")
+
 # Simulated port states (in-memory storage)
 port_states = {}
 
-# Track port activity over time
-port_activity = defaultdict(list)
+# Track port activity over time (bounded, run-length encoded per port)
+port_activity = PortActivity()
 
-def get_open_ports():
-    open_ports = []
+# Incremental /proc reader on Linux; psutil everywhere else
+socket_collector = ProcSocketCollector() if ProcSocketCollector.available() else None
+socket_collector_lock = threading.Lock()  # shared by the GUI refresh and the metrics sampler
+
+# Process metadata shared by get_open_ports and get_process_info, swept once per refresh
+process_cache = ProcessCache()
+
+def get_connections():
+    """Return psutil-style inet connection tuples, using the /proc collector when available."""
+    if socket_collector is not None:
+        try:
+            with socket_collector_lock:
+                return socket_collector.connections()
+        except OSError as e:
+            logging.error(f"Error reading /proc socket tables, falling back to psutil: {e}")
+    return psutil.net_connections(kind='inet')
+
+def get_socket_summary():
+    """Return (sockets per socket type, sockets per remote address), without resolving owners.
+
+    On Linux this reads only the /proc socket tables, without the collector
+    or its lock, so periodic consumers don't compete with the port table.
+    """
+    if socket_collector is not None:
+        try:
+            return socket_summary()
+        except OSError as e:
+            logging.error(f"Error reading /proc socket tables, falling back to psutil: {e}")
+    per_type = Counter()
+    per_remote = Counter()
     for conn in psutil.net_connections(kind='inet'):
-        if conn.status == psutil.CONN_LISTEN:
-            port = conn.laddr.port
-            try:
-                process = psutil.Process(conn.pid)
-                process_name = process.name()
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                process_name = "N/A"
-            
-            open_ports.append({
+        per_type[conn.type] += 1
+        if conn.raddr:
+            per_remote[conn.raddr.ip] += 1
+    return per_type, per_remote
+
+FAMILY_TAGS = {socket.AF_INET: 'IPv4', socket.AF_INET6: 'IPv6'}
+
+def is_listening(conn):
+    """True for TCP sockets in LISTEN and for bound, unconnected UDP sockets."""
+    if conn.type == socket.SOCK_STREAM:
+        return conn.status == psutil.CONN_LISTEN
+    return bool(conn.laddr) and conn.laddr.port != 0 and not conn.raddr
+
+def get_open_ports():
+    """Return one entry per listening (proto, port, pid).
+
+    Sockets of the same process on the same port and protocol, such as an
+    IPv4 and an IPv6 listener, are collapsed into one entry whose
+    'families' and 'addresses' list every address family and local address
+    it listens on.
+    """
+    entries = {}
+    process_cache.refresh()
+    for conn in get_connections():
+        if not is_listening(conn):
+            continue
+        proto = 'tcp' if conn.type == socket.SOCK_STREAM else 'udp'
+        port = conn.laddr.port
+        key = (proto, port, conn.pid)
+        entry = entries.get(key)
+        if entry is None:
+            process = process_cache.get(conn.pid)
+            process_name = process['name'] if process else "N/A"
+            entry = entries[key] = {
                 'port': port,
                 'pid': conn.pid,
                 'process_name': process_name,
-                'enabled': port_states.get(port, True)  # Default to enabled
-            })
+                'enabled': port_states.get(port, True),  # Default to enabled
+                'proto': proto,
+                'type': 'stream' if proto == 'tcp' else 'dgram',
+                'families': [],
+                'addresses': [],
+            }
             # Track activity for the graph
-            port_activity[port].append((time.time(), 1))  # 1 indicates activity
-    return open_ports
+            port_activity.record(port)
+        family = FAMILY_TAGS.get(conn.family, str(conn.family))
+        if family not in entry['families']:
+            entry['families'] = sorted(entry['families'] + [family])
+        if conn.laddr.ip not in entry['addresses']:
+            entry['addresses'] = sorted(entry['addresses'] + [conn.laddr.ip])
+    return list(entries.values())
+
+def log_port_table(open_ports):
+    """Record the current port table in the port event log."""
+    port_event_log.record(open_ports)
 
 def get_process_info(pid):
-    try:
-        process = psutil.Process(pid)
-        return {
-            'pid': pid,
-            'name': process.name(),
-            'status': process.status(),
-            'create_time': process.create_time(),
-            'cpu_percent': process.cpu_percent(),
-            'memory_info': process.memory_info().rss
-        }
-    except psutil.NoSuchProcess:
+    """Get cached details for a process; CPU usage is measured since the previous refresh."""
+    process = process_cache.get(pid)
+    if process is None:
         return None
+    return {
+        'pid': pid,
+        'name': process['name'],
+        'status': process['status'],
+        'create_time': process['create_time'],
+        'cpu_percent': process['cpu_percent'],
+        'memory_info': process['memory_info']
+    }
 
 def toggle_port_state(port):
     """Toggle the state of a port (enabled/disabled)."""
@@ -68,9 +145,9 @@ def toggle_port_state(port):
     logging.info(f"Port {port} toggled to {'Enabled' if port_states[port] else 'Disabled'}")
     return port_states[port]
 
-def get_port_activity(port):
-    """Get activity data for a specific port."""
-    return port_activity.get(port, [])
+def get_port_activity(port, start=None, end=None):
+    """Get (start, end) intervals during which a port was listening, optionally within a time range."""
+    return port_activity.query(port, start, end)
 
 def get_local_ip():
     """Get the local IP address of the machine."""
@@ -108,39 +185,82 @@ def get_public_ipv6():
         logging.error(f"Error getting public IPv6: {e}")
         return 'N/A'
 
+def scan_network_devices(on_device, on_progress=None, should_stop=None, networks=None, sweeper=None):
+    """Discover devices on the local networks, calling on_device(device) as each one is found.
+
+    Hosts already in the neighbor cache are reported first; then every
+    address of each interface's real prefix (see local_networks) is swept
+    with concurrent probes, and hosts that only answered ARP are picked up
+    from the neighbor cache at the end. Each device dict carries ip, mac,
+    manufacturer (from the offline OUI database), hostname, interface,
+    method ('arp', 'tcp/80', 'icmp', ...) and rtt_ms.
+    on_progress(done, total) and should_stop() are passed to the sweep.
+    """
+    if networks is None:
+        networks = [interface.network for _, interface in local_networks()]
+    networks = [ipaddress.ip_network(network, strict=False) for network in networks]
+    sweeper = sweeper or SubnetSweeper()
+    reported = set()
+    neighbors = {}
+
+    def in_scope(ip):
+        address = ipaddress.ip_address(ip)
+        return any(address in network for network in networks)
+
+    def refresh_neighbors():
+        neighbors.clear()
+        for neighbor in neighbor_table():
+            if neighbor.family == socket.AF_INET and in_scope(neighbor.ip):
+                neighbors[neighbor.ip] = neighbor
+
+    async def report(ip, method, rtt_ms):
+        if ip in reported:
+            return
+        reported.add(ip)
+        neighbor = neighbors.get(ip)
+        if neighbor is None and method != 'arp':
+            # The probe that just got an answer also resolved the MAC
+            refresh_neighbors()
+            neighbor = neighbors.get(ip)
+        try:
+            # Shielded: timing out must not cancel the lookup other callers share
+            hostname = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(reverse_resolver.submit(ip))),
+                                              reverse_resolver.timeout)
+        except asyncio.TimeoutError:
+            hostname = None
+        on_device({
+            'ip': ip,
+            'mac': neighbor.mac if neighbor else "Unknown",
+            'manufacturer': vendor_for(neighbor.mac) if neighbor else "Unknown",
+            'hostname': hostname or "Unknown",
+            'interface': neighbor.interface if neighbor else "",
+            'method': method,
+            'rtt_ms': rtt_ms,
+        })
+
+    async def run():
+        reports = []
+
+        def on_host(ip, method, rtt_ms):
+            reports.append(asyncio.ensure_future(report(ip, method, rtt_ms)))
+
+        refresh_neighbors()
+        for ip in list(neighbors):
+            on_host(ip, 'arp', None)
+        await sweeper.sweep(networks, on_host, on_progress, should_stop)
+        # Hosts that drop every probe still had to answer ARP
+        refresh_neighbors()
+        for ip in list(neighbors):
+            on_host(ip, 'arp', None)
+        await asyncio.gather(*reports)
+
+    asyncio.run(run())
+
 def get_network_devices():
     """Get a list of devices connected to the network."""
     devices = []
     try:
-        # Get the local IP to determine the network subnet
-        local_ip = get_local_ip()
-        if local_ip == "N/A":
-            return devices
-            
-        # Extract the subnet from the IP (e.g., 192.168.1)
-        subnet = ".".join(local_ip.split(".")[:3])
-        
-        # Get ARP table for device discovery
-        arp_output = subprocess.check_output("arp -a", shell=True).decode()
-        
-        # Parse ARP output to extract devices
-        for line in arp_output.splitlines():
-            match = re.search(r"(\d+\.\d+\.\d+\.\d+)\s+([a-fA-F0-9\-]+)", line)
-            if match:
-                ip, mac = match.groups()
-                # Filter devices in the same subnet
-                if ip.startswith(subnet):
-                    try:
-                        hostname = socket.gethostbyaddr(ip)[0]
-                    except socket.herror:
-                        hostname = "Unknown"
-                    devices.append({
-                        'ip': ip,
-                        'mac': mac,
-                        'hostname': hostname
-                    })
-        
-        return devices
+        scan_network_devices(devices.append)
     except Exception as e:
         logging.error(f"Error discovering network devices: {e}")
-        return devices
\ No newline at end of file
+    return devices
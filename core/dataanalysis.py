@@ -2,79 +2,192 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import numpy as np
-import random
-from collections import defaultdict
+import ipaddress
+import threading
 import time
-import psutil
-import socket
-from datetime import datetime
+from functools import lru_cache
+
+from core.timeseries import TimeSeriesStore
+from core.rollups import RollupStore, minmax_envelope
+from core.sampler import MetricsSampler
+from core.heavyhitters import WindowedTopK
+from core.latency import LatencyWindow
+from core.sockdiag import sock_diag_available, tcp_rtt_samples
+
+SECONDS_PER_DAY = 86400.0
+
+
+@lru_cache(maxsize=65536)
+def is_local_peer(ip):
+    """True for loopback and link-local peers, which say nothing about network traffic."""
+    try:
+        address = ipaddress.ip_address(ip.split('%', 1)[0])
+    except ValueError:
+        return False
+    if getattr(address, 'ipv4_mapped', None):
+        address = address.ipv4_mapped
+    return address.is_loopback or address.is_link_local
+
+
+def to_plot_dates(timestamps):
+    """Convert epoch seconds to local-time Matplotlib date numbers in one vectorized step."""
+    utc_offset = time.localtime().tm_gmtoff
+    return (np.asarray(timestamps) + utc_offset) / SECONDS_PER_DAY
+
+
+def from_plot_dates(dates):
+    """Inverse of to_plot_dates."""
+    return np.asarray(dates) * SECONDS_PER_DAY - time.localtime().tm_gmtoff
+
+
+class SeriesLine:
+    """A Line2D bound to a stored metric that re-queries itself.
+
+    The line always shows about one point per pixel of `width`, read from the
+    coarsest suitable rollup level. Changing the x-range (zooming) re-queries
+    the store; follow() slides the view along with new samples for live
+    charts, leaving `margin` of the window empty on the right so most ticks
+    only need the line itself redrawn.
+    """
+
+    def __init__(self, store, ax, metric, style, width, window, margin=0.1):
+        self.store = store
+        self.ax = ax
+        self.metric = metric
+        self.width = max(int(width), 1)
+        self.window = window
+        self.margin = margin
+        self.line, = ax.plot([], [], style)
+        self.placeholder = ax.text(0.5, 0.5, "No data collected yet", ha='center', va='center', transform=ax.transAxes)
+
+        now = time.time()
+        ax.set_xlim(to_plot_dates([now - window, now + window * margin]))
+        self.refresh()
+        ax.relim()
+        ax.autoscale_view(scalex=False)
+        ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+        ax.xaxis_date()
+
+    def artists(self):
+        """Artists that change between frames."""
+        return [self.line, self.placeholder]
+
+    def refresh(self):
+        """Re-query the store for the current x-range and update the line in place."""
+        start, end = from_plot_dates(self.ax.get_xlim())
+        timestamps, mins, maxs, _, _ = self.store.query(self.metric, start, end, self.width)
+        x, y = minmax_envelope(to_plot_dates(timestamps), mins, maxs)
+        self.line.set_data(x, y)
+        self.placeholder.set_visible(len(x) == 0)
+        return y
+
+    def _on_xlim_changed(self, ax):
+        self.refresh()
+        ax.relim()
+        ax.autoscale_view(scalex=False)
+
+    def follow(self, now=None):
+        """Pull in new samples; return True if the axes (not just the line) must be redrawn."""
+        now = time.time() if now is None else now
+        _, end = from_plot_dates(self.ax.get_xlim())
+        if now > end:
+            # Slide the window; xlim_changed re-queries and rescales
+            self.ax.set_xlim(to_plot_dates([now - self.window, now + self.window * self.margin]))
+            return True
+        y = self.refresh()
+        low, high = self.ax.get_ylim()
+        if len(y) and (y.max() > high or y.min() < low):
+            self.ax.relim()
+            self.ax.autoscale_view(scalex=False)
+            return True
+        return False
+
 
 class DataAnalysis:
-    def __init__(self):
-        self.port_activity = defaultdict(list)
-        self.connection_data = []
-        self.bandwidth_data = []
-        self.protocol_data = {'TCP': 0, 'UDP': 0, 'ICMP': 0, 'Other': 0}
-        self.ip_activity = defaultdict(int)
-        self.packet_loss_data = []
-        
-        # Initialize with some historical data
-        self._initialize_sample_data()
-
-    def _initialize_sample_data(self):
-        """Initialize with some sample data for demonstration."""
-        # Generate 24 hours of bandwidth data
+    def __init__(self, store=None, window=24 * 3600):
+        self.store = store if store is not None else RollupStore(TimeSeriesStore())
+        self.window = window  # seconds of history shown by the charts
+        # Bounded-memory top-K of remote addresses, one summary per hour
+        self.ip_activity = WindowedTopK(capacity=1000, bucket_seconds=3600, retention=window)
+        self.ip_lock = threading.Lock()
+        # Mergeable per-minute latency histograms (kernel TCP RTTs and trace probes)
+        self.latency = LatencyWindow(retention=window)
+        self.rtt_bucket = None       # start of the latency bucket rtt_seen refers to
+        self.rtt_seen = set()        # socket cookies already counted in that bucket
+
+        # Feed the store from live counters in the background
+        self.sampler = MetricsSampler(self.store)
+        self.sampler.remote_listeners.append(self._count_remote_ips)
+        if sock_diag_available():
+            self.sampler.remote_listeners.append(self._sample_tcp_rtts)
+        self.sampler.start()
+
+    def _count_remote_ips(self, remote_counts, timestamp):
+        """Count how often each remote address is seen with an open connection."""
+        with self.ip_lock:
+            for ip, sockets in remote_counts.items():
+                # Loopback is left out here just as it is from the bandwidth totals
+                if not is_local_peer(ip):
+                    self.ip_activity.update(ip, sockets, timestamp)
+
+    def _sample_tcp_rtts(self, remote_counts, timestamp):
+        """Record the kernel's smoothed RTT of every established non-loopback TCP connection.
+
+        Each connection is counted once per latency bucket, so long-lived
+        connections do not outweigh short ones just by staying open.
+        """
+        bucket = timestamp - timestamp % self.latency.bucket_seconds
+        if bucket != self.rtt_bucket:
+            self.rtt_bucket = bucket
+            self.rtt_seen = set()
+        samples = tcp_rtt_samples()
+        fresh = [rtt for cookie, rtt in samples.items() if cookie not in self.rtt_seen]
+        self.rtt_seen.update(samples)
+        self.latency.add(fresh, timestamp)
+
+    def record_latency(self, latency_ms):
+        """Record a latency measured by an active probe (ping, traceroute hop)."""
+        self.latency.add(latency_ms)
+
+    def top_talkers(self, limit=10, window=None):
+        """Return (ip, connection samples, max over-count) for the busiest remote addresses."""
+        with self.ip_lock:
+            return self.ip_activity.top(limit, window)
+
+    def _window_range(self, metric):
         now = time.time()
-        for i in range(24):
-            timestamp = now - (24 - i) * 3600
-            self.bandwidth_data.append((timestamp, random.randint(100, 1000)))
-        
-        # Generate protocol distribution
-        self.protocol_data = {
-            'TCP': random.randint(500, 1000),
-            'UDP': random.randint(200, 500),
-            'ICMP': random.randint(50, 200),
-            'Other': random.randint(10, 100)
-        }
-        
-        # Generate IP activity
-        for i in range(10):
-            ip = f"192.168.1.{i+1}"
-            self.ip_activity[ip] = random.randint(100, 1000)
-        
-        # Generate packet loss data
-        for i in range(24):
-            timestamp = now - (24 - i) * 3600
-            self.packet_loss_data.append((timestamp, random.random() * 5))
-    
-    def generate_bandwidth_usage(self):
-        """Generate a line chart for bandwidth usage over time."""
+        return self.store.range(metric, now - self.window, now)
+
+    def _show_no_data(self, ax):
+        ax.text(0.5, 0.5, "No data collected yet", ha='center', va='center', transform=ax.transAxes)
+
+    def generate_bandwidth_usage(self, width=800):
+        """Generate a line chart for bandwidth usage over time, sized for a canvas `width` pixels wide."""
         fig = Figure()
         ax = fig.add_subplot(111)
-        
-        timestamps = [datetime.fromtimestamp(ts) for ts, _ in self.bandwidth_data]
-        values = [val for _, val in self.bandwidth_data]
-        
-        ax.plot(timestamps, values, 'b-')
+
+        fig.series_lines = [SeriesLine(self.store, ax, "bandwidth.total", 'b-', width, self.window)]
+        fig.autofmt_xdate()
         ax.set_title("Bandwidth Usage Over Time")
         ax.set_xlabel("Time")
         ax.set_ylabel("Bandwidth (Mbps)")
         ax.grid(True)
-        fig.autofmt_xdate()
         return fig
 
-    def generate_top_talkers(self):
+    def generate_top_talkers(self, limit=10):
         """Generate a bar chart for most active IPs."""
         fig = Figure()
         ax = fig.add_subplot(111)
-        
-        ips = list(self.ip_activity.keys())
-        counts = list(self.ip_activity.values())
-        
-        ax.bar(ips, counts)
+
+        top = self.top_talkers(limit, self.window)
+        if top:
+            ips, counts, errors = zip(*top)
+            ax.bar(ips, counts, yerr=[errors, [0] * len(errors)], capsize=3)
+        else:
+            self._show_no_data(ax)
         ax.set_title("Top Talkers (Most Active IPs)")
         ax.set_xlabel("IP Address")
-        ax.set_ylabel("Packets Sent/Received")
+        ax.set_ylabel("Connections Seen")
         ax.tick_params(axis='x', rotation=45)
         return fig
 
@@ -82,41 +195,51 @@ class DataAnalysis:
         """Generate a pie chart for protocol distribution (TCP and UDP only)."""
         fig = Figure()
         ax = fig.add_subplot(111)
-        
-        # Only TCP and UDP data
+
+        # Socket-seconds per protocol over the window
         protocols = ["TCP", "UDP"]
-        usage = [random.randint(500, 1000), random.randint(200, 500)]  # TCP always higher than UDP
-        
-        ax.pie(usage, labels=protocols, autopct="%1.1f%%", startangle=90)
+        usage = [self._window_range("sockets.tcp")[1].sum(), self._window_range("sockets.udp")[1].sum()]
+
+        if sum(usage) > 0:
+            ax.pie(usage, labels=protocols, autopct="%1.1f%%", startangle=90)
+        else:
+            self._show_no_data(ax)
         ax.set_title("Protocol Distribution (TCP vs UDP)")
         return fig
 
-    def generate_packet_loss(self):
-        """Generate a line chart for packet drop rate over time."""
+    def generate_packet_loss(self, width=800):
+        """Generate a line chart for packet drop rate over time, sized for a canvas `width` pixels wide."""
         fig = Figure()
         ax = fig.add_subplot(111)
-        
-        timestamps = [datetime.fromtimestamp(ts) for ts, _ in self.packet_loss_data]
-        rates = [rate for _, rate in self.packet_loss_data]
-        
-        ax.plot(timestamps, rates, 'r-')
+
+        fig.series_lines = [SeriesLine(self.store, ax, "packet_loss", 'r-', width, self.window)]
+        fig.autofmt_xdate()
         ax.set_title("Packet Drop Rate Over Time")
         ax.set_xlabel("Time")
         ax.set_ylabel("Drop Rate (%)")
         ax.grid(True)
-        fig.autofmt_xdate()
         return fig
 
     def generate_latency_histogram(self):
-        """Generate a histogram for connection durations."""
+        """Generate a histogram for connection latency with p50/p99/p99.9 markers."""
         fig = Figure()
         ax = fig.add_subplot(111)
-        
-        # Simulate latency data (in milliseconds)
-        latencies = np.random.normal(50, 15, 1000)
-        
-        ax.hist(latencies, bins=30, edgecolor='black')
+
+        now = time.time()
+        histogram = self.latency.merged(now - self.window, now)
+        if histogram.total:
+            used = np.nonzero(histogram.counts)[0]
+            first, last = used[0], used[-1] + 1
+            edges = histogram.bucket_edges()[first:last + 1]
+            ax.stairs(histogram.counts[first:last], edges, fill=True, edgecolor='black')
+            ax.set_xscale('log')
+            for q, color in ((0.5, 'g'), (0.99, 'y'), (0.999, 'r')):
+                value = histogram.quantile(q)
+                ax.axvline(value, color=color, linestyle='--', label=f"p{q * 100:g}: {value:.1f} ms")
+            ax.legend()
+        else:
+            self._show_no_data(ax)
         ax.set_title("Connection Latency Distribution")
         ax.set_xlabel("Latency (ms)")
         ax.set_ylabel("Frequency")
-        return fig
\ No newline at end of file
+        return fig
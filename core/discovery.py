@@ -0,0 +1,218 @@
+import asyncio
+import errno
+import ipaddress
+import itertools
+import logging
+import socket
+import struct
+import time
+
+import psutil
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Ports that nearly every kind of host (router, PC, printer, NAS, phone) listens on or rejects
+DEFAULT_TCP_PORTS = (80, 443, 22, 445, 139, 3389, 8080, 62078)
+DEFAULT_UDP_PORTS = (137,)
+
+# Errors meaning the host exists and answered, just not with an open port
+ALIVE_ERRNOS = {errno.ECONNREFUSED, errno.ECONNRESET}
+
+ICMP_ECHO_REQUEST = 8
+ICMP_HEADER = struct.Struct('!BBHHH')
+
+
+def raise_fd_limit(needed):
+    """Raise the soft open-file limit towards the hard limit so `needed` sockets fit."""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError) as e:
+            logging.error(f"Could not raise the open file limit to {target}: {e}")
+
+
+def default_concurrency(cap=4096):
+    """Probe slots to use: up to `cap`, leaving headroom under the hard open-file limit."""
+    if resource is None:
+        return 512
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY:
+        return cap
+    return max(min(cap, hard - 64), 64)
+
+
+def local_networks(min_prefix=16):
+    """Return (interface, IPv4Interface) for every up, non-loopback IPv4 address.
+
+    The prefix comes from the interface's real netmask; networks wider than
+    /`min_prefix` are narrowed to the /`min_prefix` around the local address
+    so a sweep stays bounded.
+    """
+    stats = psutil.net_if_stats()
+    networks = []
+    for name, addresses in psutil.net_if_addrs().items():
+        if name in stats and not stats[name].isup:
+            continue
+        for address in addresses:
+            if address.family != socket.AF_INET or not address.netmask:
+                continue
+            interface = ipaddress.ip_interface(f"{address.address}/{address.netmask}")
+            if interface.ip.is_loopback or interface.ip.is_link_local:
+                continue
+            if interface.network.prefixlen < min_prefix:
+                interface = ipaddress.ip_interface(f"{address.address}/{min_prefix}")
+            networks.append((name, interface))
+    return networks
+
+
+def icmp_available():
+    """Return True if unprivileged ICMP echo sockets are allowed (net.ipv4.ping_group_range)."""
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP).close()
+        return True
+    except OSError:
+        return False
+
+
+class SubnetSweeper:
+    """Asynchronous host discovery over whole IPv4 prefixes.
+
+    Each host gets a TCP connect to every port in `tcp_ports`, an empty
+    datagram to every port in `udp_ports` and, where the OS allows it, an
+    ICMP echo, all at once. The first answer wins: a completed handshake, a
+    reset (the host exists but the port is closed, unless `refused_is_alive`
+    is False), an ICMP port-unreachable or an echo reply. At most
+    `concurrency` probes are in flight (default: see default_concurrency), so
+    a sweep of N hosts takes at most about
+    N * probes per host / concurrency * `timeout` seconds; a /16 with the
+    default probe set and 4096 slots is bounded by roughly two and a half
+    minutes, and finishes far sooner when hosts answer or reject quickly.
+    """
+
+    def __init__(self, tcp_ports=DEFAULT_TCP_PORTS, udp_ports=DEFAULT_UDP_PORTS, icmp=True,
+                 concurrency=None, timeout=1.0, refused_is_alive=True):
+        self.tcp_ports = tuple(tcp_ports)
+        self.udp_ports = tuple(udp_ports)
+        self.icmp = icmp and icmp_available()
+        self.concurrency = concurrency or default_concurrency()
+        self.timeout = timeout
+        self.refused_is_alive = refused_is_alive
+
+    def probes_per_host(self):
+        return max(len(self.tcp_ports) + len(self.udp_ports) + int(self.icmp), 1)
+
+    async def _probe_tcp(self, ip, port):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, (ip, port))
+            return f"tcp/{port}"
+        except OSError as e:
+            if e.errno in ALIVE_ERRNOS and self.refused_is_alive:
+                return f"tcp/{port} closed"
+            return None
+        finally:
+            sock.close()
+
+    async def _probe_udp(self, ip, port):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            # Connected UDP sockets surface ICMP port-unreachable as ECONNREFUSED
+            await loop.sock_connect(sock, (ip, port))
+            await loop.sock_sendall(sock, b'')
+            await loop.sock_recv(sock, 512)
+            return f"udp/{port}"
+        except OSError as e:
+            if e.errno in ALIVE_ERRNOS and self.refused_is_alive:
+                return f"udp/{port} closed"
+            return None
+        finally:
+            sock.close()
+
+    async def _probe_icmp(self, ip):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        sock.setblocking(False)
+        try:
+            # The kernel fills in the identifier and checksum on ping sockets
+            await loop.sock_connect(sock, (ip, 0))
+            await loop.sock_sendall(sock, ICMP_HEADER.pack(ICMP_ECHO_REQUEST, 0, 0, 0, 1))
+            await loop.sock_recv(sock, 512)
+            return "icmp"
+        except OSError:
+            return None
+        finally:
+            sock.close()
+
+    async def probe_host(self, ip, limit):
+        """Probe one host; return (method, rtt in ms) for the first answer, or None."""
+        probes = [self._probe_tcp(ip, port) for port in self.tcp_ports]
+        probes += [self._probe_udp(ip, port) for port in self.udp_ports]
+        if self.icmp:
+            probes.append(self._probe_icmp(ip))
+
+        async def bounded(probe):
+            # The timeout starts once a probe slot is free, not while queued for one
+            async with limit:
+                try:
+                    return await asyncio.wait_for(probe, self.timeout)
+                except asyncio.TimeoutError:
+                    return None
+
+        start = time.perf_counter()
+        pending = {asyncio.ensure_future(bounded(probe)) for probe in probes}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    method = task.result()
+                    if method is not None:
+                        return method, (time.perf_counter() - start) * 1000
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def sweep(self, networks, on_host, on_progress=None, should_stop=None):
+        """Probe every host address of `networks`, calling on_host(ip, method, rtt_ms) per live host.
+
+        on_progress(done, total) is called as hosts finish; should_stop() is
+        polled so a caller on another thread can cancel. Returns the number
+        of hosts probed.
+        """
+        networks = [ipaddress.ip_network(network, strict=False) for network in networks]
+        total = sum(max(network.num_addresses - 2, 1) if network.prefixlen < 31 else network.num_addresses
+                    for network in networks)
+        hosts = itertools.chain.from_iterable(network.hosts() for network in networks)
+        raise_fd_limit(self.concurrency + 64)
+        limit = asyncio.Semaphore(self.concurrency)
+        done = 0
+
+        async def worker():
+            nonlocal done
+            for ip in hosts:
+                if should_stop is not None and should_stop():
+                    return
+                result = await self.probe_host(str(ip), limit)
+                if result is not None:
+                    on_host(str(ip), *result)
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, total)
+
+        # Enough host workers to keep every probe slot busy
+        workers = max(self.concurrency // self.probes_per_host(), 1)
+        await asyncio.gather(*(worker() for _ in range(min(workers, total))))
+        return done
@@ -0,0 +1,120 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import time
+
+
+def entry_keys(open_ports):
+    """Key port entries by (proto, port, pid).
+
+    Entries logged before the port table carried 'proto' could list the same
+    (port, pid) twice (IPv4 and IPv6 twins); those keep the old (port, pid, n)
+    keys, n numbering the repeats, so older logs still replay exactly.
+    """
+    keyed = {}
+    seen = {}
+    for entry in open_ports:
+        if 'proto' in entry:
+            keyed[(entry['proto'], entry['port'], entry['pid'])] = entry
+            continue
+        base = (entry['port'], entry['pid'])
+        seen[base] = seen.get(base, -1) + 1
+        keyed[base + (seen[base],)] = entry
+    return keyed
+
+
+class PortEventLog:
+    """Delta-encoded log of the open port table.
+
+    A full snapshot is written when the log starts and every
+    `snapshot_interval` seconds; in between only 'opened', 'closed' and
+    'changed' events are written, one JSON object per line. Writes go through
+    a QueueHandler so the caller never waits on disk I/O. replay_port_log()
+    rebuilds the exact port list, in its original order, at any timestamp.
+
+    Order is kept cheaply: 'opened' events carry the entry's index in the new
+    list, and an 'order' event (a permutation of list positions) is written
+    only when entries that stayed open were themselves reordered.
+    """
+
+    def __init__(self, path, snapshot_interval=300):
+        self.snapshot_interval = snapshot_interval
+        self.current = None
+        self.last_snapshot = 0
+
+        self.logger = logging.getLogger(f"port_events.{path}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False  # keep events out of the CSV log
+        file_handler = logging.FileHandler(path)
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self.listener = logging.handlers.QueueListener(log_queue, file_handler)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def record(self, open_ports, timestamp=None):
+        """Log the difference between this port list and the previous one."""
+        now = time.time() if timestamp is None else timestamp
+        keyed = entry_keys(open_ports)
+        if self.current is None or now - self.last_snapshot >= self.snapshot_interval:
+            self._write({'ts': now, 'event': 'snapshot', 'ports': list(keyed.values())})
+            self.last_snapshot = now
+        else:
+            # Closed first, then opened in ascending index: replay applies them in that order
+            for key in self.current:
+                if key not in keyed:
+                    self._write({'ts': now, 'event': 'closed', 'key': key})
+            replayed = [key for key in self.current if key in keyed]
+            for index, (key, entry) in enumerate(keyed.items()):
+                old = self.current.get(key)
+                if old is None:
+                    self._write({'ts': now, 'event': 'opened', 'key': key, 'index': index, 'port': entry})
+                    replayed.insert(index, key)
+                elif old != entry:
+                    self._write({'ts': now, 'event': 'changed', 'key': key, 'port': entry})
+            if replayed != list(keyed):
+                position = {key: i for i, key in enumerate(replayed)}
+                self._write({'ts': now, 'event': 'order', 'permutation': [position[key] for key in keyed]})
+        self.current = keyed
+
+    def _write(self, event):
+        self.logger.info(json.dumps(event, separators=(',', ':')))
+
+    def close(self):
+        """Flush queued events to disk and stop the writer thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+def replay_port_log(path, timestamp=None):
+    """Rebuild the open port list, in logged order, as it was at `timestamp` (default: end of log)."""
+    state = {}
+    order = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if timestamp is not None and event['ts'] > timestamp:
+                break
+            kind = event['event']
+            if kind == 'snapshot':
+                state = entry_keys(event['ports'])
+                order = list(state)
+            elif kind == 'order':
+                order = [order[i] for i in event['permutation']]
+            else:
+                key = tuple(event['key'])
+                if kind == 'closed':
+                    if state.pop(key, None) is not None:
+                        order.remove(key)
+                else:
+                    if kind == 'opened':
+                        order.insert(event.get('index', len(order)), key)
+                    state[key] = event['port']
+    return [state[key] for key in order]
@@ -0,0 +1,200 @@
+"""Service identification from banners.
+
+Every signature is compiled once into a single alternation regex, so a
+banner is matched against the whole set in one pass of the regex engine
+instead of one re.search per signature. The alternative that matched
+names the service; its first capture group, if any, is the version.
+"""
+import asyncio
+import re
+import socket
+from collections import namedtuple
+from functools import lru_cache
+
+# (service, product, pattern). Patterns are bytes regexes matched against the
+# start of the banner unless they say otherwise; one optional capture group
+# extracts the version.
+SIGNATURES = [
+    ("ssh", "OpenSSH", rb"^SSH-[\d.]+-OpenSSH[_-]([\w.]+)"),
+    ("ssh", "Dropbear", rb"^SSH-[\d.]+-dropbear[_-]?([\w.]*)"),
+    ("ssh", None, rb"^SSH-[\d.]+-([^\s]+)"),
+    ("ftp", "vsftpd", rb"^220[- ].*?\(vsFTPd ([\d.]+)\)"),
+    ("ftp", "ProFTPD", rb"^220[- ].*?ProFTPD ([\d.]+\w*)"),
+    ("ftp", "FileZilla Server", rb"^220[- ].*?FileZilla Server(?: version)? ?([\d.]*)"),
+    ("ftp", "Pure-FTPd", rb"^220[- ].*?Pure-FTPd"),
+    ("smtp", "Postfix", rb"^220[- ][^\r\n]*ESMTP Postfix"),
+    ("smtp", "Exim", rb"^220[- ][^\r\n]*ESMTP Exim ([\d.]+)"),
+    ("smtp", "Microsoft ESMTP", rb"^220[- ][^\r\n]*Microsoft ESMTP MAIL Service(?:, Version: ([\d.]+))?"),
+    ("smtp", "Sendmail", rb"^220[- ][^\r\n]*ESMTP Sendmail ([\w.]+)"),
+    ("smtp", None, rb"^220[- ][^\r\n]*E?SMTP"),
+    ("ftp", None, rb"^220[- ][^\r\n]*FTP"),
+    ("pop3", "Dovecot", rb"^\+OK Dovecot"),
+    ("pop3", None, rb"^\+OK"),
+    ("imap", "Dovecot", rb"^\* OK [^\r\n]*Dovecot"),
+    ("imap", None, rb"^\* OK"),
+    ("mysql", "MySQL", rb"^.\x00\x00\x00\x0a(\d[\w.-]*)\x00"),
+    ("postgresql", "PostgreSQL", rb"^E\x00\x00\x00.S(?:FATAL|ERROR)"),
+    ("redis", "Redis", rb"^-(?:ERR|NOAUTH|DENIED)[^\r\n]*\r\n"),
+    ("redis", "Redis", rb"^\$\d+\r\n# Server\r\nredis_version:([\d.]+)"),
+    ("vnc", "VNC", rb"^RFB (\d{3}\.\d{3})\n"),
+    ("rdp", "Microsoft Terminal Services", rb"^\x03\x00\x00[\x0b\x13]\x0e\xd0"),
+    ("telnet", None, rb"^\xff[\xfb-\xfe]"),
+    ("mongodb", "MongoDB", rb"^.{4}.{8}\x01\x00\x00\x00.*ismaster"),
+    ("memcached", "memcached", rb"^(?:ERROR|VERSION ([\d.]+))\r\n"),
+    ("amqp", "AMQP", rb"^AMQP\x00\x00\x09\x01"),
+    ("mqtt", "MQTT", rb"^\x20\x02\x00[\x00-\x05]"),
+    ("sip", None, rb"^SIP/2\.0 \d{3}"),
+    ("rtsp", None, rb"^RTSP/1\.0 \d{3}"),
+    ("http", "nginx", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: nginx/?([\d.]*)"),
+    ("http", "Apache httpd", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: Apache/?([\d.]*)"),
+    ("http", "Microsoft IIS", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: Microsoft-IIS/([\d.]+)"),
+    ("http", "lighttpd", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: lighttpd/?([\d.]*)"),
+    ("http", "Caddy", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: Caddy"),
+    ("http", "Python http.server", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: (?:SimpleHTTP|BaseHTTP)/[\d.]+ Python/([\d.]+)"),
+    ("http", "Jetty", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: Jetty\(([\w.-]+)\)"),
+    ("http", "lwIP / embedded", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: (?:lwIP|GoAhead|Boa|mini_httpd|micro_httpd)"),
+    ("ipp", "CUPS", rb"^HTTP/1\.[01] \d{3}.*?\r\nServer: CUPS/([\d.]+)"),
+    ("http", None, rb"^HTTP/(?:1\.[01]|2) \d{3}.*?\r\nServer: ([^\r\n]+)"),
+    ("http", None, rb"^HTTP/(?:1\.[01]|2) \d{3}"),
+    ("tls", None, rb"^\x16\x03[\x00-\x04]..\x02"),
+    ("tls", None, rb"^\x15\x03[\x00-\x04]\x00\x02"),
+]
+
+# What to send when a service does not speak first
+HTTP_PROBE = b"GET / HTTP/1.0\r\nUser-Agent: NetworkMonitor\r\nAccept: */*\r\n\r\n"
+TLS_PORTS = {443, 465, 636, 853, 993, 995, 5061, 8443}
+TLS_CLIENT_HELLO = bytes.fromhex(
+    # Minimal TLS 1.2 ClientHello; any TLS server answers with a ServerHello or an alert
+    "16030100310100002d0303" + "00" * 32 + "00" + "0004002f0035" + "0100" + "0000"
+)
+PORT_PROBES = {
+    6379: b"INFO server\r\n",
+    11211: b"version\r\n",
+    554: b"OPTIONS * RTSP/1.0\r\nCSeq: 1\r\n\r\n",
+}
+
+# matched is False when the service is only guessed from the port number
+Fingerprint = namedtuple('Fingerprint', ['service', 'product', 'version', 'banner', 'matched'])
+
+
+class ServiceMatcher:
+    """Identify services from banners with one combined regex over all signatures."""
+
+    def __init__(self, signatures=SIGNATURES):
+        self.signatures = []
+        alternatives = []
+        for i, (service, product, pattern) in enumerate(signatures):
+            groups = re.compile(pattern).groups
+            if groups > 1:
+                raise ValueError(f"Signature for {service} has more than one capture group")
+            self.signatures.append((service, product, bool(groups)))
+            alternatives.append(b"(?P<s%d>" % i + pattern + b")")
+        self.pattern = re.compile(b"|".join(alternatives), re.DOTALL)
+        self.version_group = {}
+        for name, index in self.pattern.groupindex.items():
+            i = int(name[1:])
+            if self.signatures[i][2]:
+                self.version_group[i] = index + 1
+
+    def match(self, banner):
+        """Return (service, product, version) for a banner, or None if nothing matches.
+
+        Signatures are tried in list order, so specific ones must come before
+        the generic fallbacks for the same service.
+        """
+        m = self.pattern.match(banner)
+        if m is None:
+            return None
+        i = int(m.lastgroup[1:])
+        service, product, _ = self.signatures[i]
+        version = m.group(self.version_group[i]) if i in self.version_group else None
+        return service, product, version.decode('ascii', 'replace') if version else None
+
+
+@lru_cache(maxsize=4096)
+def service_for_port(port, proto='tcp'):
+    """Registered service name for a port (from the system services database), or ''."""
+    try:
+        return socket.getservbyport(port, proto)
+    except (OSError, OverflowError):
+        return ''
+
+
+def probe_for_port(port):
+    """Payload to send to a silent service on `port`."""
+    if port in TLS_PORTS:
+        return TLS_CLIENT_HELLO
+    return PORT_PROBES.get(port, HTTP_PROBE)
+
+
+class BannerGrabber:
+    """Asynchronous banner grab and service identification for open TCP ports.
+
+    Each connection first waits `wait` seconds for a server-first banner
+    (SSH, FTP, SMTP, ...). If the service stays silent, a probe chosen by
+    port (HTTP request, TLS ClientHello, ...) is sent and the reply read
+    until `timeout`. At most `read_size` bytes are kept.
+    """
+
+    def __init__(self, matcher=None, timeout=2.0, wait=0.5, read_size=1024):
+        self.matcher = matcher or default_matcher()
+        self.timeout = timeout
+        self.wait = wait
+        self.read_size = read_size
+
+    async def _read(self, reader, timeout):
+        try:
+            return await asyncio.wait_for(reader.read(self.read_size), timeout)
+        except asyncio.TimeoutError:
+            return b''
+
+    async def grab(self, host, port):
+        """Return the raw banner of host:port (b'' if the service never answered)."""
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return b''
+        try:
+            banner = await self._read(reader, self.wait)
+            if not banner:
+                writer.write(probe_for_port(port))
+                await writer.drain()
+                banner = await self._read(reader, self.timeout)
+            return banner
+        except OSError:
+            return b''
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def identify(self, host, port):
+        """Grab and match a banner; returns a Fingerprint."""
+        banner = await self.grab(host, port)
+        match = self.matcher.match(banner) if banner else None
+        if match is None:
+            return Fingerprint(service_for_port(port) or None, None, None, banner, False)
+        return Fingerprint(*match, banner, True)
+
+
+_matcher = None
+
+
+def default_matcher():
+    """The ServiceMatcher for SIGNATURES, compiled on first use."""
+    global _matcher
+    if _matcher is None:
+        _matcher = ServiceMatcher()
+    return _matcher
+
+
+def describe(fingerprint):
+    """Short display form, e.g. "ssh (OpenSSH 9.6p1)" or "http?" for a port-number guess."""
+    if fingerprint.service is None:
+        return ""
+    if not fingerprint.matched:
+        return f"{fingerprint.service}?"
+    detail = " ".join(part for part in (fingerprint.product, fingerprint.version) if part)
+    return f"{fingerprint.service} ({detail})" if detail else fingerprint.service
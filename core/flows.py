@@ -0,0 +1,298 @@
+"""Indexed table of network flows (established connections) for the Connections page.
+
+FlowIndex keeps every flow in a dict, an inverted index per filterable
+field and one sorted order of the visible flows. A refresh applies only
+the flows that appeared, closed or changed. Sorting, filtering and
+grouping all work from the indexes, so none of them revisits all rows on a
+refresh:
+
+- added and removed flows are bisected into or out of a blocked sorted
+  list, so an update never shifts the whole table;
+- a filter is matched against the distinct values of the indexed fields
+  (far fewer than the flows), and typing more characters only re-checks
+  the values the shorter filter matched;
+- groups are the index buckets themselves.
+"""
+import bisect
+import socket
+from collections import namedtuple
+
+Flow = namedtuple('Flow', ['proto', 'local_ip', 'local_port', 'remote_ip', 'remote_port',
+                           'status', 'pid', 'process'])
+
+# Fields a filter is matched against and flows can be grouped by. Local ports are left
+# out: nearly every flow has its own, so their index would be as large as the table.
+INDEXED_FIELDS = ('remote_ip', 'process', 'status', 'remote_port')
+
+
+def flow_key(conn):
+    """Identity of a connection: protocol, both endpoints and owner (-1 when unknown)."""
+    proto = 'tcp' if conn.type == socket.SOCK_STREAM else 'udp'
+    pid = conn.pid if conn.pid is not None else -1
+    return proto, conn.laddr.ip, conn.laddr.port, conn.raddr.ip, conn.raddr.port, pid
+
+
+def sort_value(flow, field):
+    """Comparable value of a field; endpoints sort by address then port."""
+    if field == 'local_ip':
+        return flow.local_ip, flow.local_port
+    if field == 'remote_ip':
+        return flow.remote_ip, flow.remote_port
+    if field == 'pid':
+        return flow.pid if flow.pid is not None else -1
+    return getattr(flow, field)
+
+
+class SortedBlocks:
+    """A sorted list kept as blocks of up to 2 * `load` items.
+
+    add() and remove() bisect the block maxima and then one block, so an
+    update moves at most a few hundred pointers instead of shifting a list
+    of every flow. Positional reads bisect the block start offsets, which
+    are recomputed (one pass over the blocks) after the list changes.
+    """
+
+    def __init__(self, items=(), load=512):
+        """`items` must already be sorted."""
+        self.load = load
+        items = list(items)
+        self.blocks = [items[i:i + load] for i in range(0, len(items), load)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self.length = len(items)
+        self.offsets = None
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    def add(self, item):
+        self.length += 1
+        self.offsets = None
+        if not self.blocks:
+            self.blocks.append([item])
+            self.maxes.append(item)
+            return
+        i = min(bisect.bisect_left(self.maxes, item), len(self.blocks) - 1)
+        block = self.blocks[i]
+        bisect.insort(block, item)
+        self.maxes[i] = block[-1]
+        if len(block) > 2 * self.load:
+            self.blocks[i:i + 1] = [block[:self.load], block[self.load:]]
+            self.maxes[i:i + 1] = [block[self.load - 1], block[-1]]
+
+    def _find(self, item):
+        """(block, position in block) of `item`, or None."""
+        i = bisect.bisect_left(self.maxes, item)
+        if i == len(self.blocks):
+            return None
+        j = bisect.bisect_left(self.blocks[i], item)
+        if j < len(self.blocks[i]) and self.blocks[i][j] == item:
+            return i, j
+        return None
+
+    def remove(self, item):
+        """Remove `item` if present; returns whether it was."""
+        found = self._find(item)
+        if found is None:
+            return False
+        i, j = found
+        block = self.blocks[i]
+        del block[j]
+        if block:
+            self.maxes[i] = block[-1]
+        else:
+            del self.blocks[i]
+            del self.maxes[i]
+        self.length -= 1
+        self.offsets = None
+        return True
+
+    def _offsets(self):
+        if self.offsets is None:
+            self.offsets = []
+            start = 0
+            for block in self.blocks:
+                self.offsets.append(start)
+                start += len(block)
+        return self.offsets
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.length:
+            raise IndexError(position)
+        offsets = self._offsets()
+        i = bisect.bisect_right(offsets, position) - 1
+        return self.blocks[i][position - offsets[i]]
+
+    def index(self, item):
+        """Position of `item`, or -1."""
+        found = self._find(item)
+        if found is None:
+            return -1
+        i, j = found
+        return self._offsets()[i] + j
+
+
+class FlowIndex:
+    """Flows with incremental sorting, index-based filtering and grouping.
+
+    `ordered` holds (sort value, key) for every flow and `visible` for the
+    flows passing the filter (the same object when there is no filter),
+    both as SortedBlocks. With `descending` set, rows are read back to
+    front, so reversing the sort costs nothing.
+    """
+
+    def __init__(self, sort_field='remote_ip'):
+        self.flows = {}
+        self.index = {field: {} for field in INDEXED_FIELDS}  # field -> value -> set of keys
+        self.sort_field = sort_field
+        self.descending = False
+        self.filter_text = ""
+        self.matched_values = None  # field -> values matching filter_text; None = no filter
+        self.ordered = SortedBlocks()
+        self.visible = self.ordered
+
+    def __len__(self):
+        return len(self.flows)
+
+    def key_at(self, row):
+        if self.descending:
+            row = len(self.visible) - 1 - row
+        return self.visible[row][1]
+
+    def flow_at(self, row):
+        return self.flows[self.key_at(row)]
+
+    def row_of(self, key):
+        """Row currently showing the flow `key`, or -1."""
+        flow = self.flows.get(key)
+        if flow is None:
+            return -1
+        row = self.visible.index((sort_value(flow, self.sort_field), key))
+        if row < 0 or not self.descending:
+            return row
+        return len(self.visible) - 1 - row
+
+    def _index_values(self, flow):
+        # Spelled out rather than looped over INDEXED_FIELDS: this runs once per flow update
+        return (('remote_ip', flow.remote_ip), ('process', flow.process or ""),
+                ('status', flow.status), ('remote_port', str(flow.remote_port)))
+
+    def _matches(self, flow):
+        if self.matched_values is None:
+            return True
+        return any(value in self.matched_values[field] for field, value in self._index_values(flow))
+
+    def _add(self, key, flow):
+        self.flows[key] = flow
+        index = self.index
+        for field, value in self._index_values(flow):
+            buckets = index[field]
+            if value in buckets:
+                buckets[value].add(key)
+            else:
+                buckets[value] = {key}
+                if self.matched_values is not None and self.filter_text in value.lower():
+                    self.matched_values[field].add(value)
+
+    def _remove(self, key):
+        flow = self.flows.pop(key)
+        for field, value in self._index_values(flow):
+            bucket = self.index[field][value]
+            bucket.discard(key)
+            if not bucket:
+                del self.index[field][value]
+                if self.matched_values is not None:
+                    self.matched_values[field].discard(value)
+        return flow
+
+    def apply(self, added, removed, changed):
+        """Apply one refresh: `added` and `changed` map key -> Flow, `removed` lists keys."""
+        field = self.sort_field
+        filtered = self.visible is not self.ordered
+        if not self.flows:
+            # First load: one sort instead of one insert per flow
+            for key, flow in added.items():
+                self._add(key, flow)
+            self.ordered = SortedBlocks(sorted((sort_value(flow, field), key) for key, flow in added.items()))
+            self.visible = self.ordered
+            if filtered:
+                self._refilter(self.ordered)
+            return
+        for key in list(removed) + [key for key in changed if key in self.flows]:
+            if key in self.flows:
+                item = (sort_value(self._remove(key), field), key)
+                self.ordered.remove(item)
+                if filtered:
+                    self.visible.remove(item)
+        for key, flow in list(changed.items()) + list(added.items()):
+            self._add(key, flow)
+            item = (sort_value(flow, field), key)
+            self.ordered.add(item)
+            if filtered and self._matches(flow):
+                self.visible.add(item)
+
+    def set_sort(self, field, descending=False):
+        """Sort by another field; the only operation that sorts every flow."""
+        self.descending = descending
+        if field != self.sort_field:
+            self.sort_field = field
+            self.ordered = SortedBlocks(sorted((sort_value(flow, field), key) for key, flow in self.flows.items()))
+            if self.visible is not self.ordered and self.matched_values is not None:
+                self._refilter(self.ordered)
+            else:
+                self.visible = self.ordered
+
+    def _refilter(self, source):
+        keys = set()
+        for field, values in self.matched_values.items():
+            buckets = self.index[field]
+            for value in values:
+                keys |= buckets[value]
+        # `source` is sorted already, so the filtered subsequence is too
+        self.visible = SortedBlocks([item for item in source if item[1] in keys])
+
+    def set_filter(self, text):
+        """Show only flows with `text` in any indexed field (case-insensitive)."""
+        text = text.strip().lower()
+        if text == self.filter_text:
+            return
+        if not text:
+            self.filter_text = ""
+            self.matched_values = None
+            self.visible = self.ordered
+            return
+        # A longer filter can only match values (and flows) the shorter one matched
+        narrowing = self.matched_values is not None and self.filter_text in text
+        self.matched_values = {
+            field: {value for value in (self.matched_values[field] if narrowing else buckets)
+                    if text in value.lower()}
+            for field, buckets in self.index.items()
+        }
+        self.filter_text = text
+        self._refilter(self.visible if narrowing else self.ordered)
+
+    def groups(self, field):
+        """Return (value, flow count) for every value of an indexed field, largest first.
+
+        Only flows passing the current filter are counted.
+        """
+        buckets = self.index[field]
+        if self.matched_values is None:
+            counts = [(value, len(keys)) for value, keys in buckets.items()]
+        else:
+            shown = {key for _, key in self.visible}
+            counts = [(value, len(keys & shown)) for value, keys in buckets.items()]
+            counts = [(value, count) for value, count in counts if count]
+        counts.sort(key=lambda item: (-item[1], item[0]))
+        return counts
+
+
+def diff_flows(previous, current):
+    """Compare two {key: status} maps; returns (added keys, removed keys, status-changed keys)."""
+    added = current.keys() - previous.keys()
+    removed = previous.keys() - current.keys()
+    changed = [key for key, status in current.items() if key not in added and previous[key] != status]
+    return added, removed, changed
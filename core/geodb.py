@@ -0,0 +1,435 @@
+"""Offline IP geolocation and ASN lookup from MaxMind DB (.mmdb) files.
+
+The reader understands the MaxMind DB format, so GeoLite2-City and
+GeoLite2-ASN files work as they are. Other prefix tables (CSV exports with
+one network or address range per row) are compiled into the same format:
+
+    python -m core.geodb table.csv [table.csv ...] [-o core/data/geo.mmdb]
+
+CSV columns: `network` (or `start_ip` and `end_ip`), `latitude`,
+`longitude`, `country_code`, `country`, `city`, `asn` and `as_org`; any
+of the data columns may be empty. Records are stored in GeoLite2's shape.
+
+A database file is memory-mapped and nothing is parsed on open. A lookup
+walks the format's binary search tree (a radix trie over address bits), so
+the deepest node reached is the longest matching prefix. Only the tree
+nodes on that path and the one record are read.
+"""
+import csv
+import ipaddress
+import logging
+import mmap
+import os
+import socket
+import struct
+import sys
+import time
+from functools import lru_cache
+
+METADATA_MARKER = b'\xab\xcd\xefMaxMind.com'
+DATA_SEPARATOR = 16  # zero bytes between the search tree and the data section
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+# Looked up in this order; the first file with a value for a field wins
+DEFAULT_FILES = ('geo.mmdb', 'GeoLite2-City.mmdb', 'GeoLite2-ASN.mmdb')
+
+# Data section types
+POINTER, UTF8, DOUBLE, BYTES, UINT16, UINT32, MAP, INT32, UINT64, UINT128, ARRAY, \
+    CONTAINER, END, BOOLEAN, FLOAT = range(1, 16)
+POINTER_BIAS = (0, 2048, 526336, 0)
+
+
+class MmdbReader:
+    """Memory-mapped MaxMind DB with longest-prefix lookup by walking the search tree."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = self.map.rfind(METADATA_MARKER, max(0, len(self.map) - 128 * 1024))
+        if start < 0:
+            self.map.close()
+            raise ValueError(f"{path} is not a MaxMind DB file")
+        self.data_start = start + len(METADATA_MARKER)  # metadata pointers are relative to itself
+        self.metadata = self._decode(self.data_start)[0]
+        self.node_count = self.metadata['node_count']
+        self.record_size = self.metadata['record_size']
+        self.ip_version = self.metadata['ip_version']
+        if self.record_size not in (24, 28, 32):
+            self.map.close()
+            raise ValueError(f"{path}: unsupported record size {self.record_size}")
+        self.node_bytes = self.record_size // 4
+        self.data_start = self.node_count * self.node_bytes + DATA_SEPARATOR
+        # IPv4 addresses live under ::/96 in an IPv6 tree; find that node once
+        self.ipv4_start = 0
+        if self.ip_version == 6:
+            for _ in range(96):
+                if self.ipv4_start >= self.node_count:
+                    break
+                self.ipv4_start = self._read_node(self.ipv4_start, 0)
+        # Records are shared by many networks and a trace repeats its hops
+        self.record = lru_cache(maxsize=4096)(self._record)
+        self.lookup = lru_cache(maxsize=4096)(self._lookup)
+
+    def _read_node(self, node, bit):
+        if self.record_size == 28:
+            # 28-bit records share their high nibbles in the middle byte
+            offset = node * 7
+            middle = self.map[offset + 3]
+            if bit:
+                return ((middle & 0x0f) << 24) | int.from_bytes(self.map[offset + 4:offset + 7], 'big')
+            return ((middle >> 4) << 24) | int.from_bytes(self.map[offset:offset + 3], 'big')
+        size = self.record_size >> 3
+        offset = (2 * node + bit) * size
+        return int.from_bytes(self.map[offset:offset + size], 'big')
+
+    def find(self, ip):
+        """(data offset, prefix length) of the longest prefix containing `ip`, or (None, depth)."""
+        try:
+            packed = socket.inet_pton(socket.AF_INET, ip)
+            node = self.ipv4_start
+        except OSError:
+            packed = socket.inet_pton(socket.AF_INET6, ip)  # OSError for anything else
+            if self.ip_version == 4:
+                return None, 0
+            node = 0
+        bits = len(packed) * 8
+        value = int.from_bytes(packed, 'big')
+        node_count = self.node_count
+        read = self._read_node
+        depth = 0
+        while depth < bits and node < node_count:
+            node = read(node, (value >> (bits - 1 - depth)) & 1)
+            depth += 1
+        if node > node_count:
+            return node - node_count - DATA_SEPARATOR, depth
+        return None, depth
+
+    def _lookup(self, ip):
+        """Record stored for the longest prefix containing `ip`, or None."""
+        offset, _ = self.find(ip)
+        return None if offset is None else self.record(offset)
+
+    def _record(self, offset):
+        return self._decode(self.data_start + offset)[0]
+
+    def _decode(self, offset):
+        """Decode the value at absolute `offset`; returns (value, offset after it)."""
+        m = self.map
+        control = m[offset]
+        offset += 1
+        kind = control >> 5
+        if kind == POINTER:
+            size = (control >> 3) & 0x3
+            extra = m[offset:offset + size + 1]
+            offset += size + 1
+            if size == 3:
+                target = int.from_bytes(extra, 'big')
+            else:
+                target = ((control & 0x7) << (8 * (size + 1))) | int.from_bytes(extra, 'big')
+            target += POINTER_BIAS[size]
+            return self._decode(self.data_start + target)[0], offset
+        if kind == 0:
+            kind = 7 + m[offset]
+            offset += 1
+        size = control & 0x1f
+        if size >= 29:
+            extra = size - 28
+            size = (29, 285, 65821)[extra - 1] + int.from_bytes(m[offset:offset + extra], 'big')
+            offset += extra
+        if kind == MAP:
+            value = {}
+            for _ in range(size):
+                key, offset = self._decode(offset)
+                value[key], offset = self._decode(offset)
+            return value, offset
+        if kind == ARRAY:
+            value = []
+            for _ in range(size):
+                item, offset = self._decode(offset)
+                value.append(item)
+            return value, offset
+        if kind == BOOLEAN:
+            return bool(size), offset
+        end = offset + size
+        if kind == UTF8:
+            return m[offset:end].decode('utf-8'), end
+        if kind == DOUBLE:
+            return struct.unpack('>d', m[offset:end])[0], end
+        if kind == FLOAT:
+            return struct.unpack('>f', m[offset:end])[0], end
+        if kind == BYTES:
+            return bytes(m[offset:end]), end
+        if kind == INT32:
+            return int.from_bytes(m[offset:end], 'big', signed=size == 4), end
+        if kind in (UINT16, UINT32, UINT64, UINT128):
+            return int.from_bytes(m[offset:end], 'big'), end
+        raise ValueError(f"unsupported MaxMind DB data type {kind} at offset {offset}")
+
+    def close(self):
+        self.lookup.cache_clear()
+        self.record.cache_clear()
+        self.map.close()
+
+
+def location_from_records(ip, records):
+    """Merge GeoLite2-shaped records into the location dict the HTTP provider returns."""
+    location = {}
+    for record in records:
+        if not record:
+            continue
+        if 'lat' not in location and 'location' in record:
+            location['lat'] = record['location'].get('latitude')
+            location['lon'] = record['location'].get('longitude')
+        country = record.get('country') or record.get('registered_country')
+        if country and 'countryCode' not in location:
+            location['countryCode'] = country.get('iso_code', '')
+            location['country'] = country.get('names', {}).get('en', '')
+        if 'city' in record and 'city' not in location:
+            location['city'] = record['city'].get('names', {}).get('en', '')
+        if 'autonomous_system_number' in record and 'as' not in location:
+            organization = record.get('autonomous_system_organization', '')
+            location['as'] = f"AS{record['autonomous_system_number']} {organization}".strip()
+    if not location:
+        return None
+    location.setdefault('country', '')
+    location.setdefault('countryCode', '')
+    location.setdefault('city', '')
+    location.update(status='success', query=ip)
+    return location
+
+
+class OfflineGeoProvider:
+    """Geolocation from local .mmdb files, with the same lookup_many() as IpApiProvider.
+
+    Several files can be combined, e.g. GeoLite2-City for the location and
+    GeoLite2-ASN for the network; lookup() returns None when no file has
+    anything for the address (or it is not a valid address).
+    """
+
+    def __init__(self, paths):
+        self.readers = [MmdbReader(path) for path in paths]
+
+    def lookup(self, ip):
+        try:
+            return location_from_records(ip, [reader.lookup(ip) for reader in self.readers])
+        except (OSError, TypeError):  # not an IP address
+            return None
+
+    def lookup_many(self, ips):
+        return {ip: self.lookup(ip) for ip in ips}
+
+    def close(self):
+        for reader in self.readers:
+            reader.close()
+        self.readers = []
+
+
+def default_offline_provider(directory=DATA_DIR):
+    """OfflineGeoProvider over whichever DEFAULT_FILES exist in `directory`, or None."""
+    paths = [os.path.join(directory, name) for name in DEFAULT_FILES
+             if os.path.exists(os.path.join(directory, name))]
+    if not paths:
+        return None
+    try:
+        return OfflineGeoProvider(paths)
+    except (OSError, ValueError) as e:
+        logging.error(f"Offline geolocation database unavailable ({e})")
+        return None
+
+
+class MmdbWriter:
+    """Builds a MaxMind DB file from (network, record) pairs; records are deduplicated.
+
+    Insert networks shortest prefix first: a longer prefix is then carved
+    out of the shorter one containing it.
+    """
+
+    def __init__(self, ip_version=6, record_size=28, database_type="NetworkMonitor-Geo"):
+        self.ip_version = ip_version
+        self.record_size = record_size
+        self.database_type = database_type
+        self.nodes = [[None, None]]  # child node index, ('data', key) or None
+        self.data = bytearray()
+        self.data_offsets = {}  # encoded record -> offset in the data section
+
+    def insert(self, network, record):
+        network = ipaddress.ip_network(network, strict=False)
+        bits = 128 if self.ip_version == 6 else 32
+        if network.version == 6 and self.ip_version == 4:
+            raise ValueError(f"IPv6 network {network} in an IPv4 database")
+        value = int(network.network_address)
+        prefix = network.prefixlen
+        if network.version == 4 and self.ip_version == 6:
+            prefix += 96  # IPv4 lives under ::/96
+        encoded = encode(record)
+        if encoded not in self.data_offsets:
+            self.data_offsets[encoded] = len(self.data)
+            self.data += encoded
+        leaf = ('data', self.data_offsets[encoded])
+        node = 0
+        for depth in range(prefix):
+            bit = (value >> (bits - 1 - depth)) & 1
+            if depth == prefix - 1:
+                child = self.nodes[node][bit]
+                if isinstance(child, int):
+                    self._fill(child, leaf)  # longer prefixes already below: fill around them
+                else:
+                    self.nodes[node][bit] = leaf
+                return
+            child = self.nodes[node][bit]
+            if not isinstance(child, int):
+                # Split a shorter prefix's leaf (or an empty branch) into a node
+                self.nodes.append([child, child])
+                child = self.nodes[node][bit] = len(self.nodes) - 1
+            node = child
+
+    def _fill(self, node, leaf):
+        """Give every empty branch under `node` the record `leaf`."""
+        stack = [node]
+        while stack:
+            children = self.nodes[stack.pop()]
+            for bit in (0, 1):
+                if isinstance(children[bit], int):
+                    stack.append(children[bit])
+                elif children[bit] is None:
+                    children[bit] = leaf
+
+    def write(self, path):
+        node_count = len(self.nodes)
+
+        def record_value(child):
+            if child is None:
+                return node_count
+            if isinstance(child, int):
+                return child
+            return node_count + DATA_SEPARATOR + child[1]
+
+        if node_count + DATA_SEPARATOR + len(self.data) >= 1 << self.record_size:
+            raise ValueError(f"database too large for {self.record_size}-bit records")
+        tree = bytearray()
+        for left, right in self.nodes:
+            left, right = record_value(left), record_value(right)
+            if self.record_size == 24:
+                tree += left.to_bytes(3, 'big') + right.to_bytes(3, 'big')
+            elif self.record_size == 32:
+                tree += left.to_bytes(4, 'big') + right.to_bytes(4, 'big')
+            else:
+                tree += (left & 0xffffff).to_bytes(3, 'big')
+                tree.append(((left >> 24) << 4) | (right >> 24))
+                tree += (right & 0xffffff).to_bytes(3, 'big')
+        metadata = {
+            'node_count': (UINT32, node_count),
+            'record_size': (UINT16, self.record_size),
+            'ip_version': (UINT16, self.ip_version),
+            'database_type': self.database_type,
+            'languages': ['en'],
+            'binary_format_major_version': (UINT16, 2),
+            'binary_format_minor_version': (UINT16, 0),
+            'build_epoch': (UINT64, int(time.time())),
+            'description': {'en': "Compiled by core.geodb"},
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(bytes(tree))
+            f.write(bytes(DATA_SEPARATOR))
+            f.write(bytes(self.data))
+            f.write(METADATA_MARKER)
+            f.write(encode(metadata))
+        os.replace(tmp_path, path)
+        return node_count
+
+
+def _control(kind, size):
+    if size < 29:
+        head, extra = size, b''
+    elif size < 285:
+        head, extra = 29, bytes([size - 29])
+    elif size < 65821:
+        head, extra = 30, (size - 285).to_bytes(2, 'big')
+    else:
+        head, extra = 31, (size - 65821).to_bytes(3, 'big')
+    if kind <= 7:
+        return bytes([(kind << 5) | head]) + extra
+    return bytes([head, kind - 7]) + extra
+
+
+def encode(value):
+    """MaxMind DB encoding of a value; pass (type, int) to choose an integer type."""
+    if isinstance(value, tuple):
+        kind, number = value
+        length = {UINT16: 2, UINT32: 4, UINT64: 8, UINT128: 16}[kind]
+        raw = number.to_bytes(length, 'big').lstrip(b'\x00')
+        return _control(kind, len(raw)) + raw
+    if isinstance(value, bool):
+        return _control(BOOLEAN, int(value))
+    if isinstance(value, str):
+        raw = value.encode('utf-8')
+        return _control(UTF8, len(raw)) + raw
+    if isinstance(value, float):
+        return _control(DOUBLE, 8) + struct.pack('>d', value)
+    if isinstance(value, int):
+        return encode((UINT32 if value < 1 << 32 else UINT64, value))
+    if isinstance(value, dict):
+        return _control(MAP, len(value)) + b''.join(encode(k) + encode(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return _control(ARRAY, len(value)) + b''.join(encode(item) for item in value)
+    raise TypeError(f"cannot encode {type(value).__name__} in a MaxMind DB")
+
+
+def record_from_row(row):
+    """GeoLite2-shaped record from one prefix-table CSV row (empty columns are left out)."""
+    record = {}
+    if row.get('latitude') and row.get('longitude'):
+        record['location'] = {'latitude': float(row['latitude']), 'longitude': float(row['longitude'])}
+    if row.get('country_code') or row.get('country'):
+        record['country'] = {'iso_code': row.get('country_code', ''), 'names': {'en': row.get('country', '')}}
+    if row.get('city'):
+        record['city'] = {'names': {'en': row['city']}}
+    if row.get('asn'):
+        record['autonomous_system_number'] = int(row['asn'].upper().lstrip('AS'))
+        record['autonomous_system_organization'] = row.get('as_org', '')
+    return record
+
+
+def read_prefix_table(paths):
+    """Yield (network, record) from prefix-table CSV files; address ranges are split into networks."""
+    for path in paths:
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                record = record_from_row(row)
+                if not record:
+                    continue
+                if row.get('network'):
+                    yield ipaddress.ip_network(row['network'].strip(), strict=False), record
+                else:
+                    first = ipaddress.ip_address(row['start_ip'].strip())
+                    last = ipaddress.ip_address(row['end_ip'].strip())
+                    for network in ipaddress.summarize_address_range(first, last):
+                        yield network, record
+
+
+def compile_prefix_table(csv_paths, out_path=os.path.join(DATA_DIR, DEFAULT_FILES[0]), record_size=28):
+    """Compile prefix-table CSVs into a .mmdb file; returns the number of networks."""
+    networks = list(read_prefix_table(csv_paths))
+    ip_version = 6 if any(network.version == 6 for network, _ in networks) else 4
+    writer = MmdbWriter(ip_version, record_size)
+    # Shortest prefixes first, so longer ones are carved out of them
+    order = sorted(range(len(networks)),
+                   key=lambda i: networks[i][0].prefixlen + (96 if networks[i][0].version == 4 and ip_version == 6 else 0))
+    for i in order:
+        writer.insert(*networks[i])
+    writer.write(out_path)
+    return len(networks)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m core.geodb TABLE.csv [TABLE.csv ...] [-o OUT.mmdb]")
+    args = sys.argv[1:]
+    out = os.path.join(DATA_DIR, DEFAULT_FILES[0])
+    if '-o' in args:
+        i = args.index('-o')
+        out = args[i + 1]
+        del args[i:i + 2]
+    print(f"{compile_prefix_table(args, out)} networks written to {out}")
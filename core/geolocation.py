@@ -0,0 +1,194 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.geodb import default_offline_provider
+
+# Fields requested from ip-api; the trace visualizer reads lat/lon, country, countryCode and city
+IP_API_FIELDS = "status,message,country,countryCode,city,lat,lon,as,query"
+
+
+class IpApiProvider:
+    """ip-api.com lookups through its batch endpoint on one pooled requests.Session.
+
+    lookup_many() posts up to `batch_size` addresses per request (the
+    endpoint's limit is 100) and returns {ip: location dict or None}.
+    Addresses the API could not locate map to None; a failed request raises.
+    """
+
+    def __init__(self, url="http://ip-api.com/batch", batch_size=100, timeout=5.0):
+        self.url = url
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        # One host, so one pool; keep-alive saves a TCP handshake per batch
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def lookup_many(self, ips):
+        results = {}
+        for start in range(0, len(ips), self.batch_size):
+            chunk = ips[start:start + self.batch_size]
+            body = [{"query": ip, "fields": IP_API_FIELDS} for ip in chunk]
+            response = self.session.post(self.url, json=body, timeout=self.timeout)
+            response.raise_for_status()
+            for ip, location in zip(chunk, response.json()):
+                results[ip] = location if location.get('status') == 'success' else None
+        return results
+
+    def close(self):
+        self.session.close()
+
+
+class GeoLocator:
+    """Shared geolocation service: in-memory LRU over an on-disk SQLite cache.
+
+    Addresses missing from both caches are queued and looked up together:
+    the first miss waits `batch_delay` seconds for others to arrive, then
+    one provider call covers the whole queue. All I/O (SQLite and HTTP)
+    runs on a single worker thread, so callers never block on it unless
+    they choose to wait on the returned futures. Each address is fetched at
+    most once per `ttl` seconds (`negative_ttl` for addresses the provider
+    could not locate); failed requests are not cached.
+
+    With an `offline` provider (see core.geodb), addresses it can place on
+    the map are answered at once without touching either cache; `provider`
+    is then only the fallback for addresses the local database lacks.
+    """
+
+    def __init__(self, provider=None, offline=None, path="geo_cache.sqlite3", ttl=7 * 86400,
+                 negative_ttl=3600, max_entries=4096, batch_delay=0.05, timeout=10.0, clock=time.time):
+        self.provider = provider or IpApiProvider()
+        self.offline = offline
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.batch_delay = batch_delay
+        self.timeout = timeout
+        self.clock = clock  # wall clock: expiry times are stored on disk
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geo")
+        self.db = None  # opened by the worker thread on first use
+        self.cache = OrderedDict()  # ip -> (location or None, expires at)
+        self.in_flight = {}  # ip -> Future
+        self.queue = []
+        self.lock = threading.Lock()
+
+    def _cached(self, ip):
+        entry = self.cache.get(ip)
+        if entry is None:
+            return False, None
+        location, expires = entry
+        if expires < self.clock():
+            del self.cache[ip]
+            return False, None
+        self.cache.move_to_end(ip)
+        return True, location
+
+    def _remember(self, ip, location, expires):
+        self.cache[ip] = (location, expires)
+        self.cache.move_to_end(ip)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    def submit(self, ip):
+        """Start (or join) a lookup; returns a Future resolving to a location dict or None."""
+        if self.offline is not None:
+            location = self.offline.lookup(ip)  # microseconds: safe on the caller's thread
+            if location and location.get('lat') is not None:
+                future = Future()
+                future.set_result(location)
+                return future
+        with self.lock:
+            hit, location = self._cached(ip)
+            if hit:
+                future = Future()
+                future.set_result(location)
+                return future
+            future = self.in_flight.get(ip)
+            if future is None:
+                future = self.in_flight[ip] = Future()
+                self.queue.append(ip)
+                if len(self.queue) == 1:
+                    self.pool.submit(self._flush)
+            return future
+
+    def lookup_many(self, ips, timeout=None):
+        """Locate many addresses, waiting at most `timeout` seconds in total.
+
+        Returns {ip: location or None}; lookups still running when the
+        timeout expires report None now and fill the cache when they finish.
+        """
+        futures = {ip: self.submit(ip) for ip in ips}
+        wait(futures.values(), timeout=self.timeout if timeout is None else timeout)
+        return {ip: future.result() if future.done() else None for ip, future in futures.items()}
+
+    def lookup(self, ip, timeout=None):
+        return self.lookup_many([ip], timeout)[ip]
+
+    def _open(self):
+        if self.db is None:
+            # Created on the worker thread, but close() runs elsewhere
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS locations "
+                            "(ip TEXT PRIMARY KEY, expires REAL NOT NULL, data TEXT)")
+        return self.db
+
+    def _flush(self):
+        time.sleep(self.batch_delay)  # let the rest of a burst join this batch
+        with self.lock:
+            ips, self.queue = self.queue, []
+        results = {}
+        try:
+            db = self._open()
+            now = self.clock()
+            for start in range(0, len(ips), 500):  # stay under SQLite's bound-parameter limit
+                chunk = ips[start:start + 500]
+                rows = db.execute(
+                    f"SELECT ip, expires, data FROM locations WHERE ip IN ({','.join('?' * len(chunk))})",
+                    chunk)
+                for ip, expires, data in rows:
+                    if expires >= now:
+                        results[ip] = (json.loads(data) if data else None, expires)
+            missing = [ip for ip in ips if ip not in results]
+            if missing:
+                fetched = self.provider.lookup_many(missing)
+                rows = []
+                for ip in missing:
+                    location = fetched.get(ip)
+                    expires = now + (self.ttl if location else self.negative_ttl)
+                    results[ip] = (location, expires)
+                    rows.append((ip, expires, json.dumps(location) if location else None))
+                with db:
+                    db.executemany("INSERT OR REPLACE INTO locations VALUES (?, ?, ?)", rows)
+        except Exception as e:
+            logging.error(f"Geolocation lookup failed for {len(ips)} addresses: {e}")
+        with self.lock:
+            for ip, (location, expires) in results.items():
+                self._remember(ip, location, expires)
+            futures = [(self.in_flight.pop(ip), results.get(ip, (None,))[0]) for ip in ips]
+        for future, location in futures:
+            future.set_result(location)
+
+    def close(self):
+        """Finish queued lookups, then release the database and the HTTP session."""
+        self.pool.shutdown(wait=True)
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        self.provider.close()
+        if self.offline is not None:
+            self.offline.close()
+
+
+# One service shared by the trace visualizer's lookups; offline first when
+# a database has been installed in core/data
+geo_locator = GeoLocator(offline=default_offline_provider())
@@ -0,0 +1,117 @@
+import heapq
+import time
+from collections import deque
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter summary (Metwally et al., 2005).
+
+    Tracks at most `capacity` items no matter how many distinct items are
+    seen. With N the total weight added so far:
+      - every reported count over-estimates the true count by at most N / capacity,
+        and by at most the item's own `error` value;
+      - every item whose true count exceeds N / capacity is guaranteed to be tracked.
+    Summaries merge (see merge()) with the same bound over the combined weight.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}  # item -> [count, error]
+        self.heap = []    # (count, item) with lazy deletion of stale entries
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def update(self, item, weight=1):
+        """Add `weight` occurrences of `item`."""
+        self.total += weight
+        entry = self.counts.get(item)
+        if entry is not None:
+            entry[0] += weight
+        elif len(self.counts) < self.capacity:
+            entry = self.counts[item] = [weight, 0]
+        else:
+            # Replace the current minimum; the newcomer inherits its count as error
+            floor = self._pop_min()
+            entry = self.counts[item] = [floor + weight, floor]
+        heapq.heappush(self.heap, (entry[0], item))
+        if len(self.heap) > 4 * self.capacity:
+            self.heap = [(count, key) for key, (count, _) in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def _pop_min(self):
+        while True:
+            count, item = heapq.heappop(self.heap)
+            entry = self.counts.get(item)
+            if entry is not None and entry[0] == count:
+                del self.counts[item]
+                return count
+
+    def min_count(self):
+        """Smallest tracked count once full (0 while there is still room)."""
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counts.values())
+
+    def error_bound(self):
+        """Largest possible over-estimate of any reported count."""
+        return self.total / self.capacity
+
+    def merge(self, other):
+        """Fold another summary into this one (Agarwal et al., mergeable summaries)."""
+        own_floor, other_floor = self.min_count(), other.min_count()
+        merged = {}
+        for item, (count, error) in self.counts.items():
+            other_count, other_error = other.counts.get(item, (other_floor, other_floor))
+            merged[item] = [count + other_count, error + other_error]
+        for item, (count, error) in other.counts.items():
+            if item not in merged:
+                merged[item] = [count + own_floor, error + own_floor]
+        keep = heapq.nlargest(self.capacity, merged.items(), key=lambda kv: kv[1][0])
+        self.counts = dict(keep)
+        self.heap = [(count, item) for item, (count, _) in keep]
+        heapq.heapify(self.heap)
+        self.total += other.total
+
+    def top(self, k=10):
+        """Return the k heaviest items as (item, count, error), heaviest first."""
+        ranked = heapq.nlargest(k, self.counts.items(), key=lambda kv: kv[1][0])
+        return [(item, count, error) for item, (count, error) in ranked]
+
+
+class WindowedTopK:
+    """Space-Saving summaries over fixed time buckets, merged on demand.
+
+    One summary is kept per `bucket_seconds`; buckets older than `retention`
+    are dropped, so memory is bounded by capacity * retention / bucket_seconds
+    entries. top() merges only the buckets inside the requested window.
+    """
+
+    def __init__(self, capacity=1000, bucket_seconds=3600, retention=24 * 3600):
+        self.capacity = capacity
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        self.buckets = deque()  # (bucket start, SpaceSaving), oldest first
+
+    def update(self, item, weight=1, timestamp=None):
+        now = time.time() if timestamp is None else timestamp
+        start = now - now % self.bucket_seconds
+        if not self.buckets or self.buckets[-1][0] != start:
+            self.buckets.append((start, SpaceSaving(self.capacity)))
+            while self.buckets and self.buckets[0][0] <= now - self.retention - self.bucket_seconds:
+                self.buckets.popleft()
+        self.buckets[-1][1].update(item, weight)
+
+    def summary(self, window=None, now=None):
+        """Return one SpaceSaving summary covering the last `window` seconds (default: everything kept)."""
+        now = time.time() if now is None else now
+        merged = SpaceSaving(self.capacity)
+        for start, sketch in self.buckets:
+            if window is None or start + self.bucket_seconds > now - window:
+                merged.merge(sketch)
+        return merged
+
+    def top(self, k=10, window=None):
+        """Return the k heaviest items in the window as (item, count, error)."""
+        return self.summary(window).top(k)
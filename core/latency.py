@@ -0,0 +1,95 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class LatencyHistogram:
+    """Fixed-size log-bucketed latency histogram (HDR/DDSketch style).
+
+    Values between `lowest` and `highest` ms fall into geometric buckets that
+    grow by `growth`, so any quantile is reported within (growth - 1) / 2
+    relative error using a fixed number of counters, however many samples
+    are added. Histograms with the same layout merge by adding counts.
+    """
+
+    def __init__(self, lowest=0.001, highest=100000.0, growth=1.04):
+        self.lowest = lowest
+        self.growth = growth
+        self.log_growth = math.log(growth)
+        self.size = int(math.ceil(math.log(highest / lowest) / self.log_growth)) + 1
+        self.counts = np.zeros(self.size, dtype=np.int64)
+        self.total = 0
+
+    def add(self, values):
+        """Add one value or an array of values (ms), vectorized."""
+        values = np.atleast_1d(np.asarray(values, dtype='f8'))
+        if not len(values):
+            return
+        index = np.log(np.maximum(values, self.lowest) / self.lowest) / self.log_growth
+        index = np.clip(index.astype(np.int64), 0, self.size - 1)
+        self.counts += np.bincount(index, minlength=self.size)
+        self.total += len(values)
+
+    def add_one(self, value):
+        """Add a single value (ms); cheaper than add() for one sample at a time."""
+        index = int(math.log(max(value, self.lowest) / self.lowest) / self.log_growth)
+        self.counts[min(index, self.size - 1)] += 1
+        self.total += 1
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.total += other.total
+
+    def bucket_edges(self):
+        """Lower edge of every bucket plus the upper edge of the last, in ms."""
+        return self.lowest * self.growth ** np.arange(self.size + 1)
+
+    def quantile(self, q):
+        """Return the value at quantile q (0..1), or None if empty."""
+        if not self.total:
+            return None
+        rank = q * (self.total - 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank, side='right'))
+        index = min(index, self.size - 1)
+        # Midpoint of the bucket keeps the relative error symmetric
+        return self.lowest * self.growth ** index * (1 + self.growth) / 2
+
+
+class LatencyWindow:
+    """Per-minute latency histograms; any time range is answered by merging buckets.
+
+    Memory is bounded by `retention` / 60 histograms of fixed size.
+    """
+
+    def __init__(self, bucket_seconds=60, retention=24 * 3600, **histogram_options):
+        self.bucket_seconds = bucket_seconds
+        self.retention = retention
+        self.histogram_options = histogram_options
+        self.buckets = OrderedDict()  # bucket start -> LatencyHistogram
+        self.lock = threading.Lock()
+
+    def add(self, values, timestamp=None):
+        """Record latency samples (ms) taken at `timestamp`."""
+        now = time.time() if timestamp is None else timestamp
+        start = now - now % self.bucket_seconds
+        with self.lock:
+            histogram = self.buckets.get(start)
+            if histogram is None:
+                histogram = self.buckets[start] = LatencyHistogram(**self.histogram_options)
+                while self.buckets and next(iter(self.buckets)) < now - self.retention - self.bucket_seconds:
+                    self.buckets.popitem(last=False)
+            histogram.add(values)
+
+    def merged(self, start=None, end=None):
+        """Return one histogram covering buckets overlapping [start, end]."""
+        result = LatencyHistogram(**self.histogram_options)
+        with self.lock:
+            for bucket_start, histogram in self.buckets.items():
+                if start is not None and bucket_start + self.bucket_seconds <= start:
+                    continue
+                if end is not None and bucket_start > end:
+                    continue
+                result.merge(histogram)
+        return result
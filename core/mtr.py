@@ -0,0 +1,284 @@
+"""Continuous per-hop probing of many targets (mtr style) from one thread.
+
+Every `interval` seconds each target gets one probe per TTL, sent and
+matched as in core.traceroute: UDP probes whose destination port encodes
+(round, TTL), answered by ICMP errors read from the socket error queue.
+All targets of an address family share one socket, and a single thread
+sends, receives and expires probes, so the cost grows with probes per
+second, not with threads or descriptors per target.
+
+Each hop's results are folded into a HopStats, whose size does not grow
+with the number of probes: counters, a running mean and variance
+(Welford), and a LatencyHistogram for percentiles.
+"""
+import heapq
+import itertools
+import logging
+import math
+import random
+import select
+import socket
+import threading
+import time
+
+from core.latency import LatencyHistogram
+from core.traceroute import TIME_EXCEEDED, open_probe_socket, read_errors, resolve, send_probe
+
+
+class HopStats:
+    """Constant-memory accumulator for the probes sent to one hop."""
+
+    def __init__(self):
+        self.ip = None  # address that answered last
+        self.sent = 0
+        self.received = 0
+        self.lost = 0
+        self.last = None
+        self.best = None
+        self.worst = None
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.histogram = LatencyHistogram(lowest=0.01, highest=60000.0)
+
+    def add(self, rtt):
+        """Record an answered probe's round-trip time (ms)."""
+        self.received += 1
+        self.last = rtt
+        self.best = rtt if self.best is None else min(self.best, rtt)
+        self.worst = rtt if self.worst is None else max(self.worst, rtt)
+        delta = rtt - self.mean
+        self.mean += delta / self.received
+        self.m2 += delta * (rtt - self.mean)
+        self.histogram.add_one(rtt)
+
+    def add_loss(self):
+        """Record a probe that was not answered within the timeout."""
+        self.lost += 1
+
+    @property
+    def loss(self):
+        """Percentage of finished probes that were lost; probes still in flight don't count."""
+        finished = self.received + self.lost
+        return 100.0 * self.lost / finished if finished else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.m2 / (self.received - 1)) if self.received > 1 else 0.0
+
+    def snapshot(self, hop):
+        """Plain dict of the current figures, safe to hand to another thread."""
+        p50, p95 = (self.histogram.quantile(q) for q in (0.5, 0.95))
+        return {
+            'hop': hop, 'ip': self.ip or "Timeout", 'sent': self.sent, 'received': self.received,
+            'loss': round(self.loss, 1), 'last': self.last, 'best': self.best,
+            'avg': round(self.mean, 2) if self.received else None, 'worst': self.worst,
+            'stddev': round(self.stddev, 2), 'p50': p50 and round(p50, 2), 'p95': p95 and round(p95, 2),
+        }
+
+
+class MonitoredTarget:
+    """State of one target: its probes in flight and a HopStats per TTL probed."""
+
+    def __init__(self, name, family, address, on_update):
+        self.name = name
+        self.family = family
+        self.address = address
+        self.on_update = on_update
+        self.hops = {}  # TTL -> HopStats, for TTLs up to the end of the route
+        self.in_flight = {}  # port -> (ttl, sent at)
+        self.round = 0
+        self.final = None  # lowest TTL answered by the target itself, or where the route ends
+        self.final_seen = 0.0  # when that hop last answered
+        self.removed = False
+
+    def snapshot(self):
+        """Hop figures up to the end of the route, or one hop past the last that answered."""
+        last = self.final
+        if last is None:
+            answered = [ttl for ttl, hop in self.hops.items() if hop.received]
+            last = min(max(answered, default=0) + 1, len(self.hops))
+        return [self.hops[ttl].snapshot(ttl) for ttl in range(1, last + 1)]
+
+
+class MtrScheduler(threading.Thread):
+    """Background thread that probes every hop of its targets each `interval` seconds.
+
+    add() starts monitoring a host and remove() stops it; both may be
+    called from any thread. After each round a target's `on_update` is
+    called on this thread with its hop snapshots (see HopStats.snapshot).
+    A probe counts as lost once `timeout` seconds pass without an answer;
+    losses are noted at the target's next round. Rounds missed because
+    the thread fell behind are skipped rather than sent in a burst.
+    """
+
+    def __init__(self, interval=1.0, timeout=2.0, max_hops=30, base_port=33434):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.timeout = timeout
+        self.max_hops = max_hops
+        self.base_port = base_port
+        # Ports are reused after `slots` rounds, by which time the old probe has expired
+        self.slots = int(timeout // interval) + 2
+        # Rounds due within `slack` of each other are sent on the same wake-up
+        self.slack = interval / 100
+        if base_port + self.slots * max_hops > 65536:
+            raise ValueError("too many probes in flight per target for the port range")
+        self.targets = {}  # destination address -> MonitoredTarget
+        self.schedule = []  # heap of (due, sequence, target)
+        self.sequence = itertools.count()
+        self.sockets = {}  # family -> probe socket
+        self.changes = []  # (target, new socket or None) added or removed by other threads
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.waker, self.wake_reader = socket.socketpair()
+        self.waker.setblocking(False)
+        self.wake_reader.setblocking(False)
+        self.poller = select.poll()
+        self.poller.register(self.wake_reader, select.POLLIN)
+
+    def add(self, name, on_update):
+        """Start monitoring host `name`; returns its MonitoredTarget.
+
+        Resolves the name on the caller's thread, so it raises socket.gaierror
+        for unknown hosts and OSError if probe sockets cannot be opened.
+        Adding an address that is already monitored replaces it.
+        """
+        family, address = resolve(name)
+        sock = None
+        if family not in self.sockets:
+            sock = open_probe_socket(family)
+            # Room for a burst of answers between two reads
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        target = MonitoredTarget(name, family, address, on_update)
+        with self.lock:
+            self.changes.append((target, sock))
+        self._wake()
+        return target
+
+    def remove(self, target):
+        target.removed = True  # no more rounds or reports from here on
+        with self.lock:
+            self.changes.append((target, None))
+        self._wake()
+
+    def stop(self):
+        self.stop_event.set()
+        self._wake()
+
+    def _wake(self):
+        try:
+            self.waker.send(b'\0')
+        except OSError:
+            pass  # already woken (buffer full), or stopped
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                self._apply_changes()
+                now = time.perf_counter()
+                while self.schedule and self.schedule[0][0] <= now + self.slack:
+                    due, _, target = heapq.heappop(self.schedule)
+                    if target.removed:
+                        continue
+                    try:
+                        self._probe(target, now)
+                    except Exception as e:
+                        logging.error(f"Error probing {target.name}: {e}")
+                    due += self.interval
+                    if due < now:
+                        due = now + self.interval
+                    heapq.heappush(self.schedule, (due, next(self.sequence), target))
+                wake = self.schedule[0][0] - now if self.schedule else 1.0
+                for fd, _ in self.poller.poll(max(wake, 0.0) * 1000):
+                    if fd == self.wake_reader.fileno():
+                        while True:
+                            try:
+                                self.wake_reader.recv(4096)
+                            except BlockingIOError:
+                                break
+                        continue
+                    for sock in self.sockets.values():
+                        if sock.fileno() == fd:
+                            self._receive(sock)
+        finally:
+            for sock in self.sockets.values():
+                sock.close()
+            self.wake_reader.close()
+            self.waker.close()
+
+    def _apply_changes(self):
+        with self.lock:
+            changes, self.changes = self.changes, []
+        for target, sock in changes:
+            if sock is not None:
+                if target.family in self.sockets:
+                    sock.close()  # opened by two add() calls at once
+                else:
+                    self.sockets[target.family] = sock
+                    self.poller.register(sock, select.POLLIN)
+            if not target.removed:
+                old = self.targets.get(target.address)
+                if old is not None:
+                    old.removed = True
+                self.targets[target.address] = target
+                # Spread new targets over an interval so they don't all probe at once
+                due = time.perf_counter() + random.random() * self.interval
+                heapq.heappush(self.schedule, (due, next(self.sequence), target))
+            elif self.targets.get(target.address) is target:
+                del self.targets[target.address]
+
+    def _probe(self, target, now):
+        """Expire the target's overdue probes, report it, then send its next round."""
+        for port, (ttl, sent_at) in list(target.in_flight.items()):
+            if now - sent_at >= self.timeout:
+                del target.in_flight[port]
+                if ttl in target.hops:
+                    target.hops[ttl].add_loss()
+        if target.final is not None and now - target.final_seen > self.timeout + 3 * self.interval:
+            target.final = None  # the end stopped answering: the route may have grown
+
+        if target.round:
+            try:
+                target.on_update(target.snapshot())
+            except Exception as e:
+                logging.error(f"Error reporting {target.name}: {e}")
+
+        sock = self.sockets[target.family]
+        slot = target.round % self.slots
+        for ttl in range(1, (target.final or self.max_hops) + 1):
+            hop = target.hops.get(ttl)
+            if hop is None:
+                hop = target.hops[ttl] = HopStats()
+            hop.sent += 1
+            port = self.base_port + slot * self.max_hops + ttl - 1
+            try:
+                send_probe(sock, target.family, target.address, port, ttl)
+            except OSError:
+                hop.add_loss()  # e.g. no route to the target from here
+                continue
+            target.in_flight[port] = (ttl, time.perf_counter())
+        target.round += 1
+
+    def _receive(self, sock):
+        for reply in read_errors(sock):
+            target = self.targets.get(reply.address)
+            if target is None:
+                continue
+            probe = target.in_flight.pop(reply.port, None)
+            if probe is None:
+                continue  # answered after it was counted as lost
+            ttl, sent_at = probe
+            hop = target.hops.get(ttl)
+            if hop is None:
+                continue
+            hop.ip = reply.ip
+            hop.add(round((reply.received - sent_at) * 1000, 3))
+            if reply.kind != TIME_EXCEEDED:
+                target.final_seen = reply.received
+                if target.final is None or ttl < target.final:
+                    # Probes past the end of the route all reach it; only the first one counts
+                    target.final = ttl
+                    target.in_flight = {port: probe for port, probe in target.in_flight.items()
+                                        if probe[0] <= ttl}
+                    for extra in [t for t in target.hops if t > ttl]:
+                        del target.hops[extra]
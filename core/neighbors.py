@@ -0,0 +1,146 @@
+import os
+import re
+import socket
+import struct
+import logging
+import subprocess
+from collections import namedtuple
+
+from core.sockdiag import (NLMSG_HEADER, RTATTR_HEADER, NLM_F_REQUEST, NLM_F_DUMP,
+                           NLMSG_DONE, NLMSG_ERROR)
+
+# One entry of the kernel's neighbor (ARP / NDP) cache
+Neighbor = namedtuple('Neighbor', ['ip', 'mac', 'interface', 'state', 'family'])
+
+# RTNETLINK constants, see linux/rtnetlink.h and linux/neighbour.h
+NETLINK_ROUTE = 0
+RTM_NEWNEIGH = 28
+RTM_GETNEIGH = 30
+NDA_DST = 1
+NDA_LLADDR = 2
+NDMSG = struct.Struct('=BxxxiHBB')
+
+# Neighbor unreachability detection states (NUD_*)
+NUD_STATES = {
+    0x01: 'INCOMPLETE',
+    0x02: 'REACHABLE',
+    0x04: 'STALE',
+    0x08: 'DELAY',
+    0x10: 'PROBE',
+    0x20: 'FAILED',
+    0x40: 'NOARP',
+    0x80: 'PERMANENT',
+}
+
+# /proc/net/arp flags (ATF_*)
+ATF_COM = 0x02
+ATF_PERM = 0x04
+
+# Fallback for hosts without /proc or netlink: Windows "ip  aa-bb-.." and BSD "(ip) at a:b:.."
+ARP_LINE = re.compile(r"(\d+\.\d+\.\d+\.\d+)\)?\s+(?:at\s+)?([0-9a-fA-F]{1,2}(?:[:-][0-9a-fA-F]{1,2}){5})")
+
+
+def format_mac(mac):
+    """Normalize a MAC address to lower-case, colon-separated, zero-padded form."""
+    return ":".join(part.zfill(2) for part in re.split(r"[:-]", mac.lower()))
+
+
+def read_proc_arp(path='/proc/net/arp'):
+    """Return IPv4 neighbors with a known MAC from /proc/net/arp."""
+    neighbors = []
+    with open(path) as f:
+        lines = f.readlines()
+    for line in lines[1:]:
+        fields = line.split()
+        if len(fields) < 6:
+            continue
+        flags = int(fields[2], 16)
+        if not flags & ATF_COM:
+            continue  # incomplete: no reply yet
+        state = 'PERMANENT' if flags & ATF_PERM else 'REACHABLE'
+        neighbors.append(Neighbor(fields[0], format_mac(fields[3]), fields[5], state, socket.AF_INET))
+    return neighbors
+
+
+def netlink_neighbors(families=(socket.AF_INET, socket.AF_INET6)):
+    """Return IPv4 and IPv6 neighbors with a link-layer address from one RTM_GETNEIGH dump each."""
+    neighbors = []
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as sock:
+        for seq, family in enumerate(families, 1):
+            request = NDMSG.pack(family, 0, 0, 0, 0)
+            sock.send(NLMSG_HEADER.pack(NLMSG_HEADER.size + NDMSG.size, RTM_GETNEIGH,
+                                        NLM_F_REQUEST | NLM_F_DUMP, seq, 0) + request)
+            _read_neighbors(sock, neighbors)
+    return neighbors
+
+
+def _read_neighbors(sock, neighbors):
+    while True:
+        data = sock.recv(65536)
+        offset = 0
+        while offset + NLMSG_HEADER.size <= len(data):
+            length, msg_type, _, _, _ = NLMSG_HEADER.unpack_from(data, offset)
+            if length < NLMSG_HEADER.size or msg_type == NLMSG_DONE:
+                return
+            if msg_type == NLMSG_ERROR:
+                logging.error("RTM_GETNEIGH request rejected by the kernel")
+                return
+            if msg_type == RTM_NEWNEIGH:
+                neighbor = _parse_neighbor(data, offset + NLMSG_HEADER.size, offset + length)
+                if neighbor is not None:
+                    neighbors.append(neighbor)
+            offset += (length + 3) & ~3
+
+
+def _parse_neighbor(data, offset, end):
+    family, ifindex, state, _, _ = NDMSG.unpack_from(data, offset)
+    if state & (0x01 | 0x20 | 0x40):
+        return None  # INCOMPLETE / FAILED have no usable address; NOARP are multicast/loopback
+    dst = lladdr = None
+    offset += NDMSG.size
+    while offset + RTATTR_HEADER.size <= end:
+        attr_len, attr_type = RTATTR_HEADER.unpack_from(data, offset)
+        if attr_len < RTATTR_HEADER.size:
+            break
+        value = data[offset + RTATTR_HEADER.size:offset + attr_len]
+        if attr_type == NDA_DST:
+            dst = socket.inet_ntop(family, value)
+        elif attr_type == NDA_LLADDR and len(value) == 6:
+            lladdr = ":".join(f"{b:02x}" for b in value)
+        offset += (attr_len + 3) & ~3
+    if dst is None or lladdr is None:
+        return None
+    try:
+        interface = socket.if_indextoname(ifindex)
+    except OSError:
+        interface = str(ifindex)
+    state_name = NUD_STATES.get(state & -state, 'NONE')  # lowest set bit
+    return Neighbor(dst, lladdr, interface, state_name, family)
+
+
+def parse_arp_output(output):
+    """Parse `arp -a` output (Windows or BSD/macOS) into IPv4 neighbors."""
+    neighbors = []
+    for line in output.splitlines():
+        match = ARP_LINE.search(line)
+        if match:
+            ip, mac = match.groups()
+            neighbors.append(Neighbor(ip, format_mac(mac), '', 'NONE', socket.AF_INET))
+    return neighbors
+
+
+def neighbor_table():
+    """Return the host's neighbor cache as a list of Neighbor records.
+
+    Linux reads it natively (netlink, then /proc/net/arp); other platforms
+    fall back to running `arp -a`.
+    """
+    if hasattr(socket, 'AF_NETLINK'):
+        try:
+            return netlink_neighbors()
+        except OSError as e:
+            logging.error(f"Netlink neighbor dump failed, falling back to /proc/net/arp: {e}")
+    if os.path.exists('/proc/net/arp'):
+        return read_proc_arp()
+    output = subprocess.check_output(["arp", "-a"]).decode(errors='replace')
+    return parse_arp_output(output)
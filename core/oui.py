@@ -0,0 +1,211 @@
+"""Offline MAC vendor lookup from the IEEE OUI (MA-L), MA-M and MA-S registries.
+
+The registry CSVs are compiled once into a compact sorted binary file:
+
+    python -m core.oui oui.csv mam.csv oui36.csv
+
+which is then memory-mapped, so opening it costs nothing and only the pages
+a lookup touches are ever read. Layout (little-endian):
+
+    header   magic, blob offset, then (count, keys offset, names offset) for /36, /28, /24
+    keys     per prefix length: sorted u64 prefixes
+    names    per prefix length: u32 offset of each vendor name within the blob
+    blob     newline-terminated UTF-8 vendor names, deduplicated
+"""
+import bisect
+import csv
+import logging
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+MAGIC = b'OUIDB\x00\x00\x01'
+PREFIX_BITS = (36, 28, 24)  # longest first
+HEADER = struct.Struct('<8sI' + 'III' * len(PREFIX_BITS))
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'oui.bin')
+LOCALLY_ADMINISTERED = "Locally administered (randomized)"
+
+
+def mac_to_int(mac):
+    """48-bit integer for a MAC in any of the usual notations, or None."""
+    digits = mac.replace(':', '').replace('-', '').replace('.', '')
+    if len(digits) != 12:
+        return None
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+
+def read_registry(paths):
+    """Yield (prefix bits, prefix value, organization) from IEEE registry CSV files."""
+    for path in paths:
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                assignment = row.get('Assignment', '').strip()
+                name = ' '.join(row.get('Organization Name', '').split())
+                bits = len(assignment) * 4
+                if bits not in PREFIX_BITS or not name:
+                    continue
+                yield bits, int(assignment, 16), name
+
+
+def compile_registry(csv_paths, out_path=DEFAULT_PATH):
+    """Compile registry CSVs into the binary lookup file; returns the number of entries."""
+    tables = {bits: {} for bits in PREFIX_BITS}
+    for bits, prefix, name in read_registry(csv_paths):
+        tables[bits][prefix] = name
+
+    blob = bytearray()
+    name_offsets = {}
+    sections = []
+    offset = HEADER.size
+    for bits in PREFIX_BITS:
+        prefixes = sorted(tables[bits])
+        names = []
+        for prefix in prefixes:
+            name = tables[bits][prefix]
+            if name not in name_offsets:
+                name_offsets[name] = len(blob)
+                blob += name.encode('utf-8') + b'\n'
+            names.append(name_offsets[name])
+        keys = np.array(prefixes, dtype='<u8')
+        offsets = np.array(names, dtype='<u4')
+        keys_at = offset
+        names_at = keys_at + keys.nbytes
+        offset = names_at + offsets.nbytes
+        offset += -offset % 8  # keep every keys array 8-byte aligned
+        sections.append((len(prefixes), keys_at, names_at, keys, offsets))
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        fields = []
+        for count, keys_at, names_at, _, _ in sections:
+            fields += [count, keys_at, names_at]
+        f.write(HEADER.pack(MAGIC, offset, *fields))
+        for _, keys_at, names_at, keys, offsets in sections:
+            f.seek(keys_at)
+            f.write(keys.tobytes())
+            f.write(offsets.tobytes())
+        f.seek(offset)
+        f.write(bytes(blob))
+    os.replace(tmp_path, out_path)
+    return sum(section[0] for section in sections)
+
+
+class OuiDatabase:
+    """Memory-mapped vendor table with longest-prefix lookup by binary search.
+
+    Nothing is parsed or copied on open. lookup() bisects the /36, /28 and
+    /24 key arrays in turn (longest prefix first); lookup_many() does the
+    same for a whole batch with numpy.searchsorted.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.blob_at, *fields = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled OUI database")
+        self.sections = []
+        self.views = [memoryview(self.map)]  # released in reverse order by close()
+        for i, bits in enumerate(PREFIX_BITS):
+            count, keys_at, names_at = fields[3 * i:3 * i + 3]
+            keys = np.frombuffer(self.map, dtype='<u8', count=count, offset=keys_at)
+            names = np.frombuffer(self.map, dtype='<u4', count=count, offset=names_at)
+            if sys.byteorder == 'little':
+                # memoryview keys give bisect C-speed item access without numpy scalars
+                self.views.append(self.views[0][keys_at:keys_at + 8 * count])
+                self.views.append(self.views[-1].cast('Q'))
+                view = self.views[-1]
+            else:
+                view = keys.tolist()
+            self.sections.append((bits, keys, names, view))
+        self.lookup = lru_cache(maxsize=65536)(self._lookup)
+
+    def __len__(self):
+        return sum(len(keys) for _, keys, _, _ in self.sections)
+
+    def _name(self, offset):
+        offset += self.blob_at
+        end = self.map.find(b'\n', offset)
+        return self.map[offset:end].decode('utf-8')
+
+    def _lookup(self, mac):
+        """Vendor for a MAC address string, or None."""
+        value = mac_to_int(mac)
+        if value is None:
+            return None
+        for bits, _, names, view in self.sections:
+            key = value >> (48 - bits)
+            i = bisect.bisect_left(view, key)
+            if i < len(view) and view[i] == key:
+                return self._name(int(names[i]))
+        if (value >> 40) & 0x02:
+            return LOCALLY_ADMINISTERED
+        return None
+
+    def lookup_many(self, values):
+        """Vectorized lookup for an array of 48-bit MAC integers; returns name offsets (-1 = unknown)."""
+        values = np.asarray(values, dtype='<u8')
+        result = np.full(len(values), -1, dtype=np.int64)
+        for bits, keys, names, _ in self.sections:
+            if not len(keys):
+                continue
+            unresolved = result < 0
+            wanted = values[unresolved] >> np.uint64(48 - bits)
+            i = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+            hit = keys[i] == wanted
+            index = np.flatnonzero(unresolved)[hit]
+            result[index] = names[i[hit]]
+        return result
+
+    def name_at(self, offset):
+        """Vendor name for an offset returned by lookup_many()."""
+        return None if offset < 0 else self._name(int(offset))
+
+    def close(self):
+        self.lookup.cache_clear()
+        self.sections = []
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.map.close()
+
+
+_database = None
+
+
+def vendor_for(mac):
+    """Vendor name for a MAC address, or 'Unknown'. Opens the default database on first use."""
+    global _database
+    if _database is None:
+        try:
+            _database = OuiDatabase(DEFAULT_PATH)
+        except (OSError, ValueError) as e:
+            logging.error(f"OUI vendor database unavailable ({e}); "
+                          f"build it with: python -m core.oui oui.csv mam.csv oui36.csv")
+            _database = False
+    if _database:
+        return _database.lookup(mac) or "Unknown"
+    value = mac_to_int(mac)
+    if value is not None and (value >> 40) & 0x02:
+        return LOCALLY_ADMINISTERED
+    return "Unknown"
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m core.oui REGISTRY.csv [REGISTRY.csv ...] [-o OUT]")
+    args = sys.argv[1:]
+    out = DEFAULT_PATH
+    if '-o' in args:
+        i = args.index('-o')
+        out = args[i + 1]
+        del args[i:i + 2]
+    print(f"{compile_registry(args, out)} entries written to {out}")
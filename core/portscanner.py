@@ -0,0 +1,329 @@
+import asyncio
+import errno
+import ipaddress
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import socket
+import time
+from collections import namedtuple
+
+from core.discovery import raise_fd_limit, default_concurrency
+from core.fingerprint import BannerGrabber, describe
+
+OPEN = "open"
+CLOSED = "closed"
+FILTERED = "filtered"
+OPEN_FILTERED = "open|filtered"  # UDP with no answer: nothing listening can't be told from a drop
+
+# A remote stack answered, so the probe is conclusive and its RTT is a valid sample
+ANSWERED_ERRNOS = {errno.ECONNREFUSED, errno.ECONNRESET}
+
+# Minimal well-formed requests for UDP services that ignore empty datagrams
+UDP_PAYLOADS = {
+    53: b'\x12\x34\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00\x01',  # DNS query for "."
+    123: b'\x1b' + b'\x00' * 47,                                                   # NTP v3 client
+    137: (b'\x80\xf0\x00\x10\x00\x01\x00\x00\x00\x00\x00\x00\x20CKAAAAAAAAAAAAAAAA'
+          b'AAAAAAAAAAAAAA\x00\x00\x21\x00\x01'),                                  # NetBIOS node status
+    161: (b'\x30\x26\x02\x01\x01\x04\x06public\xa0\x19\x02\x04\x00\x00\x00\x01\x02\x01\x00'
+          b'\x02\x01\x00\x30\x0b\x30\x09\x06\x05\x2b\x06\x01\x02\x01\x05\x00'),       # SNMPv2c get
+    1900: b'M-SEARCH * HTTP/1.1\r\nHOST: 239.255.255.250:1900\r\nMAN: "ssdp:discover"\r\nMX: 1\r\nST: ssdp:all\r\n\r\n',
+}
+
+# Most addresses one scan may target (a /16); larger ranges are refused before expanding
+MAX_TARGETS = 65536
+
+# service: description of what answered on an open TCP port, when the scan identifies services
+ScanResult = namedtuple('ScanResult', ['host', 'port', 'proto', 'state', 'rtt_ms', 'service'], defaults=(None,))
+
+
+def parse_ports(text):
+    """Parse "22,80,8000-8100" into a sorted list of unique port numbers."""
+    ports = set()
+    for part in text.replace(' ', '').split(','):
+        if not part:
+            continue
+        low, _, high = part.partition('-')
+        low = int(low)
+        high = int(high) if high else low
+        if not 0 < low <= high <= 65535:
+            raise ValueError(f"Invalid port range: {part}")
+        ports.update(range(low, high + 1))
+    return sorted(ports)
+
+
+def parse_targets(text, max_targets=MAX_TARGETS):
+    """Expand comma/space separated addresses, CIDR networks and host names into address strings.
+
+    Host names are resolved here, so call this off the GUI thread. Raises
+    ValueError if the targets add up to more than `max_targets` addresses.
+    """
+    targets = []
+    for part in text.replace(',', ' ').split():
+        try:
+            network = ipaddress.ip_network(part, strict=False)
+        except ValueError:
+            try:
+                targets.append(socket.getaddrinfo(part, None, type=socket.SOCK_STREAM)[0][4][0])
+            except socket.gaierror as e:
+                raise ValueError(f"Cannot resolve {part}: {e}")
+            if len(targets) > max_targets:
+                raise ValueError(f"Too many targets: more than {max_targets} addresses")
+            continue
+        # Checked before expanding so "::/0" fails at once instead of exhausting memory
+        if len(targets) + network.num_addresses > max_targets:
+            raise ValueError(f"Too many targets: {part} would exceed {max_targets} addresses")
+        if network.num_addresses == 1:
+            targets.append(str(network.network_address))
+        else:
+            targets.extend(str(ip) for ip in network.hosts())
+    return list(dict.fromkeys(targets))
+
+
+class RttEstimator:
+    """Per-host retransmission timeout from measured RTTs (RFC 6298 SRTT/RTTVAR).
+
+    Until the first answer arrives the timeout is `initial`; afterwards it is
+    SRTT + 4 * RTTVAR, clamped to [`minimum`, `maximum`].
+    """
+
+    def __init__(self, initial, minimum, maximum):
+        self.srtt = None
+        self.rttvar = None
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def update(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def timeout(self, attempt=0):
+        """Timeout for the given retry attempt, doubling per retry (exponential backoff)."""
+        base = self.initial if self.srtt is None else self.srtt + 4 * self.rttvar
+        return min(max(base, self.minimum) * (2 ** attempt), self.maximum)
+
+
+class PortScanner:
+    """Asynchronous TCP connect / UDP scanner over host x port ranges.
+
+    At most `concurrency` probes are in flight in total (default: see
+    core.discovery.default_concurrency) and at most `per_host` against any
+    one host, so a single target is not flooded while a wide scan still
+    keeps every slot busy. Probes are issued port-major (each port across
+    all hosts before the next port) to spread load between hosts.
+
+    Timeouts adapt per host to the RTTs of its answered probes (open or
+    closed ports); a probe that gets no answer is retried up to `retries`
+    times with doubled timeouts before it is reported filtered (TCP) or
+    open|filtered (UDP).
+
+    With `identify` set, every open TCP port then goes through a banner
+    grab (see core.fingerprint.BannerGrabber) and the result carries the
+    identified service.
+    """
+
+    def __init__(self, concurrency=None, per_host=256, timeout=1.0, min_timeout=0.05,
+                 max_timeout=4.0, retries=1, identify=False):
+        self.concurrency = concurrency or default_concurrency()
+        self.per_host = per_host
+        self.timeout = timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.retries = retries
+        self.estimators = {}
+        self.grabber = BannerGrabber() if identify else None
+
+    def estimator(self, host):
+        estimator = self.estimators.get(host)
+        if estimator is None:
+            estimator = RttEstimator(self.timeout, self.min_timeout, self.max_timeout)
+            self.estimators[host] = estimator
+        return estimator
+
+    async def _probe_tcp(self, host, port, family, timeout):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (host, port)), timeout)
+            return OPEN
+        except asyncio.TimeoutError:
+            return None
+        except OSError as e:
+            # Unreachable / no route errors come from routers or the local stack, not the host
+            return CLOSED if e.errno in ANSWERED_ERRNOS else FILTERED
+        finally:
+            sock.close()
+
+    async def _probe_udp(self, host, port, family, timeout):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            # Connected UDP sockets surface ICMP port-unreachable as ECONNREFUSED
+            await loop.sock_connect(sock, (host, port))
+            await loop.sock_sendall(sock, UDP_PAYLOADS.get(port, b''))
+            await asyncio.wait_for(loop.sock_recv(sock, 512), timeout)
+            return OPEN
+        except asyncio.TimeoutError:
+            return None
+        except OSError as e:
+            return CLOSED if e.errno in ANSWERED_ERRNOS else FILTERED
+        finally:
+            sock.close()
+
+    async def probe(self, host, port, proto):
+        """Probe one port with retries; returns a ScanResult."""
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        probe = self._probe_tcp if proto == 'tcp' else self._probe_udp
+        estimator = self.estimator(host)
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            state = await probe(host, port, family, estimator.timeout(attempt))
+            rtt = time.perf_counter() - start
+            if state is not None:
+                if state != FILTERED:
+                    estimator.update(rtt)
+                return ScanResult(host, port, proto, state, rtt * 1000)
+        return ScanResult(host, port, proto, FILTERED if proto == 'tcp' else OPEN_FILTERED, None)
+
+    async def scan(self, targets, ports, on_result, protocols=('tcp',), report=(OPEN,),
+                   should_stop=None, on_progress=None):
+        """Probe every (target, port, protocol), calling on_result(ScanResult) for states in `report`.
+
+        on_progress(done, total) is called as probes finish; should_stop() is
+        polled so a caller on another thread can cancel. Returns the number
+        of probes completed.
+        """
+        targets = list(targets)
+        ports = list(ports)
+        total = len(targets) * len(ports) * len(protocols)
+        probes = ((host, port, proto) for port in ports for proto in protocols for host in targets)
+        raise_fd_limit(self.concurrency + 64)
+        host_limits = {host: asyncio.Semaphore(self.per_host) for host in targets}
+        done = 0
+
+        async def worker():
+            nonlocal done
+            for host, port, proto in probes:
+                if should_stop is not None and should_stop():
+                    return
+                async with host_limits[host]:
+                    result = await self.probe(host, port, proto)
+                    if self.grabber is not None and result.state == OPEN and proto == 'tcp':
+                        fingerprint = await self.grabber.identify(host, port)
+                        result = result._replace(service=describe(fingerprint))
+                if result.state in report:
+                    on_result(result)
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, total)
+
+        # One worker per global slot; the per-host semaphores hold back the rest
+        workers = min(self.concurrency, total, self.per_host * len(targets))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return done
+
+
+def _scan_shard(conn, stop, targets, ports, protocols, report, options, flush_interval=0.05):
+    """Process entry point for sharded_scan(): scan one shard and stream results down `conn`.
+
+    Results go out as plain tuples in batches, each followed by the shard's
+    progress, at most every `flush_interval` seconds.
+    """
+    pending = []
+    last_flush = 0
+
+    def flush(done):
+        if pending:
+            conn.send(('results', pending[:]))
+            pending.clear()
+        conn.send(('progress', done))
+
+    def on_progress(done, total):
+        nonlocal last_flush
+        now = time.monotonic()
+        if now - last_flush >= flush_interval:
+            last_flush = now
+            flush(done)
+
+    try:
+        scanner = PortScanner(**options)
+        done = asyncio.run(scanner.scan(targets, ports, lambda result: pending.append(tuple(result)),
+                                        protocols, report, stop.is_set, on_progress))
+        flush(done)
+    finally:
+        conn.close()
+
+
+def sharded_scan(targets, ports, on_result, protocols=('tcp',), report=(OPEN,), processes=None,
+                 should_stop=None, on_progress=None, concurrency=None, per_host=256, **options):
+    """Run PortScanner.scan() across a pool of processes, one event loop each.
+
+    The port list is dealt out round-robin, so every shard covers all
+    targets and neighbouring ports land on different cores. `concurrency`
+    and `per_host` stay global limits: each of the shards gets an equal
+    share. Results stream back over one pipe per shard and on_result,
+    on_progress and should_stop behave as for PortScanner.scan(), called
+    on the calling thread. Extra keyword arguments go to PortScanner.
+    Returns the number of probes completed.
+    """
+    targets = list(targets)
+    ports = list(ports)
+    shards = max(min(processes or os.cpu_count() or 1, len(ports)), 1)
+    concurrency = concurrency or default_concurrency()
+    if shards == 1:
+        scanner = PortScanner(concurrency=concurrency, per_host=per_host, **options)
+        return asyncio.run(scanner.scan(targets, ports, on_result, protocols, report, should_stop, on_progress))
+
+    # Spawned, not forked: the caller may be a Qt application with live threads
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    options = dict(options, concurrency=max(concurrency // shards, 1), per_host=max(per_host // shards, 1))
+    total = len(targets) * len(ports) * len(protocols)
+    readers = {}
+    done = [0] * shards
+    workers = []
+    for shard in range(shards):
+        reader, writer = context.Pipe(duplex=False)
+        worker = context.Process(target=_scan_shard, daemon=True, args=(
+            writer, stop, targets, ports[shard::shards], tuple(protocols), tuple(report), options))
+        worker.start()
+        writer.close()
+        readers[reader] = shard
+        workers.append(worker)
+
+    try:
+        while readers:
+            if should_stop is not None and should_stop():
+                stop.set()
+            for reader in multiprocessing.connection.wait(list(readers), timeout=0.1):
+                try:
+                    kind, payload = reader.recv()
+                except EOFError:
+                    # The shard finished (or died) and closed its end
+                    reader.close()
+                    del readers[reader]
+                    continue
+                if kind == 'results':
+                    for result in payload:
+                        on_result(ScanResult(*result))
+                else:
+                    done[readers[reader]] = payload
+                    if on_progress is not None:
+                        on_progress(sum(done), total)
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.close()
+        for worker in workers:
+            worker.join()
+            if worker.exitcode:
+                logging.error(f"Port scan shard {worker.name} exited with code {worker.exitcode}")
+    return sum(done)
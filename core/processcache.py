@@ -0,0 +1,79 @@
+import time
+import psutil
+
+# Everything the port table needs, read in a single process_iter() pass
+PROCESS_ATTRS = ['pid', 'name', 'status', 'create_time', 'cpu_times', 'memory_info']
+
+
+class ProcessCache:
+    """Per-tick process metadata, keyed by (pid, create_time).
+
+    refresh() walks the process list once and stores name/status/memory for
+    every process, so looking up the owner of each socket is a dict lookup.
+    Keeping the previous CPU times per process lets cpu_percent be a real
+    delta between two ticks instead of a first-call 0.0. A PID whose
+    create_time changed is treated as a brand new process.
+    """
+
+    def __init__(self):
+        self.entries = {}  # pid -> info dict (see _make_info)
+        self.last_refresh = 0
+
+    def refresh(self):
+        """Sweep all processes once, update CPU deltas and evict exited PIDs."""
+        now = time.monotonic()
+        entries = {}
+        for proc in psutil.process_iter(attrs=PROCESS_ATTRS, ad_value=None):
+            info = proc.info
+            if info['create_time'] is None:
+                continue
+            entries[info['pid']] = self._make_info(info, now)
+        self.entries = entries
+        self.last_refresh = now
+
+    def get(self, pid):
+        """Return cached info for a PID, looking it up directly if it is new."""
+        if pid is None:
+            return None
+        if not self.last_refresh:
+            self.refresh()
+        entry = self.entries.get(pid)
+        if entry is None:
+            # Started since the last sweep; fetch just this one
+            try:
+                proc = psutil.Process(pid)
+                with proc.oneshot():
+                    info = proc.as_dict(attrs=PROCESS_ATTRS, ad_value=None)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                return None
+            if info['create_time'] is None:
+                return None
+            entry = self._make_info(info, time.monotonic())
+            self.entries[pid] = entry
+        return entry
+
+    def _make_info(self, info, now):
+        pid = info['pid']
+        key = (pid, info['create_time'])
+        cpu_times = info['cpu_times']
+        cpu_total = cpu_times.user + cpu_times.system if cpu_times else None
+
+        cpu_percent = 0.0
+        previous = self.entries.get(pid)
+        if previous is not None and previous['key'] == key:
+            elapsed = now - previous['sampled_at']
+            if cpu_total is not None and previous['cpu_total'] is not None and elapsed > 0:
+                cpu_percent = round(max(cpu_total - previous['cpu_total'], 0) / elapsed * 100, 1)
+
+        memory = info['memory_info']
+        return {
+            'key': key,
+            'pid': pid,
+            'name': info['name'] or "N/A",
+            'status': info['status'],
+            'create_time': info['create_time'],
+            'cpu_percent': cpu_percent,
+            'memory_info': memory.rss if memory else 0,
+            'cpu_total': cpu_total,
+            'sampled_at': now,
+        }
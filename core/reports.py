@@ -6,20 +6,9 @@ from PyQt5.QtCore import pyqtSignal, QObject
 class ReportGenerator(QObject):
     report_generated = pyqtSignal(str)  # Signal to emit generated reports
     
-    def __init__(self):
+    def __init__(self, data_analysis=None):
         super().__init__()
-        self.sample_devices = [
-            ("192.168.1.15", "Workstation-15"),
-            ("192.168.1.23", "Server-23"),
-            ("192.168.1.42", "Workstation-42"),
-            ("192.168.1.8", "NAS-8"),
-            ("192.168.1.19", "Workstation-19"),
-            ("192.168.1.3", "Printer-3"),
-            ("192.168.1.11", "Workstation-11"),
-            ("192.168.1.7", "IP-Phone-7"),
-            ("192.168.1.30", "Tablet-30"),
-            ("192.168.1.5", "Security-Cam-5")
-        ]
+        self.data_analysis = data_analysis  # source of live traffic statistics
     
     def generate_daily_traffic_report(self):
         """Generate daily traffic summary report."""
@@ -42,29 +31,33 @@ class ReportGenerator(QObject):
     
     def generate_bandwidth_report(self):
         """Generate top bandwidth consumers report."""
-        devices = [(ip, name, f"{random.uniform(1.5, 45.2):.1f} GB") 
-                  for ip, name in self.sample_devices]
-        devices.sort(key=lambda x: float(x[2].split()[0]), reverse=True)
+        top = self.data_analysis.top_talkers(10, 24 * 3600) if self.data_analysis else []
         
         report = f"""
         <h3>Top 10 Bandwidth Consumers - Last 24 Hours</h3>
         <table border="1" cellpadding="5">
-            <tr><th>Rank</th><th>IP Address</th><th>Device</th><th>Usage</th></tr>
+            <tr><th>Rank</th><th>IP Address</th><th>Connection Samples</th><th>Max Over-count</th></tr>
         """
         
-        for i, (ip, device, usage) in enumerate(devices[:10], 1):
+        for i, (ip, count, error) in enumerate(top, 1):
             report += f"""
             <tr>
                 <td>{i}</td>
                 <td>{ip}</td>
-                <td>{device}</td>
-                <td>{usage}</td>
+                <td>{count:,}</td>
+                <td>{error:,}</td>
             </tr>
             """
         
+        if not top:
+            report += """
+            <tr><td colspan="4">No remote connections observed yet.</td></tr>
+            """
+        
         report += """
         </table>
-        <p>Note: Data includes both incoming and outgoing traffic.</p>
+        <p>Note: Ranked by how often a remote address had an open connection, sampled once per second.
+        Counts come from a bounded-memory heavy-hitter sketch and may be over-estimated by at most the value shown.</p>
         <p>Report generated at: """ + time.strftime('%H:%M:%S') + """</p>
         """
         self.report_generated.emit(report)
@@ -0,0 +1,113 @@
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+
+def gethostname_for(ip):
+    """Blocking reverse lookup; returns the hostname or None."""
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except (socket.herror, socket.gaierror, OSError):
+        return None
+
+
+def hostname_from(future):
+    """Hostname a finished lookup produced; None if it failed, was cancelled or is still running."""
+    if not future.done() or future.cancelled() or future.exception():
+        return None
+    return future.result()
+
+
+class ReverseResolver:
+    """Shared reverse-DNS service with a bounded thread pool and a TTL'd LRU cache.
+
+    socket.gethostbyaddr() has no timeout and can block for seconds per
+    address, so lookups run on a pool of `workers` threads and callers wait
+    at most `timeout` seconds. Results are cached (hits for `positive_ttl`,
+    failures for `negative_ttl`), and concurrent requests for the same
+    address share one in-flight lookup.
+    """
+
+    def __init__(self, workers=256, timeout=2.0, positive_ttl=3600, negative_ttl=300,
+                 max_entries=4096, resolve=gethostname_for):
+        self.timeout = timeout
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.resolve = resolve
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rdns")
+        self.cache = OrderedDict()  # ip -> (hostname or None, expires at)
+        self.in_flight = {}         # ip -> Future
+        self.lock = threading.RLock()  # done-callbacks may run inline under submit()
+
+    def _cached(self, ip):
+        entry = self.cache.get(ip)
+        if entry is None:
+            return False, None
+        hostname, expires = entry
+        if expires < time.monotonic():
+            del self.cache[ip]
+            return False, None
+        self.cache.move_to_end(ip)
+        return True, hostname
+
+    def _store(self, ip, future):
+        with self.lock:
+            if self.in_flight.get(ip) is future:
+                del self.in_flight[ip]
+            if future.cancelled():
+                return  # not an answer: the next request looks the address up again
+            hostname = future.result() if not future.exception() else None
+            ttl = self.positive_ttl if hostname else self.negative_ttl
+            self.cache[ip] = (hostname, time.monotonic() + ttl)
+            self.cache.move_to_end(ip)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def submit(self, ip):
+        """Start (or join) a lookup; returns a Future resolving to the hostname or None."""
+        with self.lock:
+            hit, hostname = self._cached(ip)
+            if hit:
+                future = Future()
+                future.set_result(hostname)
+                return future
+            future = self.in_flight.get(ip)
+            if future is None or future.cancelled():
+                future = self.pool.submit(self.resolve, ip)
+                self.in_flight[ip] = future
+                future.add_done_callback(lambda f, ip=ip: self._store(ip, f))
+            return future
+
+    def lookup_many(self, ips, timeout=None):
+        """Resolve many addresses concurrently, waiting at most one timeout in total.
+
+        Returns {ip: hostname or None}; lookups still running when the timeout
+        expires report None now and fill the cache when they finish.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        results = {}
+        pending = {}
+        with self.lock:
+            for ip in ips:
+                hit, hostname = self._cached(ip)
+                if hit:
+                    results[ip] = hostname
+        for ip in ips:
+            if ip not in results and ip not in pending:
+                pending[ip] = self.submit(ip)
+        if pending:
+            wait(pending.values(), timeout=timeout)
+        for ip, future in pending.items():
+            results[ip] = hostname_from(future)
+        return results
+
+    def lookup(self, ip, timeout=None):
+        """Resolve one address, waiting at most `timeout` seconds."""
+        return self.lookup_many([ip], timeout)[ip]
+
+
+# One resolver shared by the backend, the network scanner and the trace visualizer
+reverse_resolver = ReverseResolver()
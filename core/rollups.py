@@ -0,0 +1,185 @@
+import threading
+import time
+import numpy as np
+
+# Rollup levels in seconds; raw samples are the 1 s level
+RESOLUTIONS = (60, 3600, 86400)
+RAW_RESOLUTION = 1
+AGGREGATES = ('min', 'max', 'sum', 'count')
+
+
+def rollup_metric(metric, resolution, aggregate):
+    """Name of the store column holding one aggregate of one rollup level."""
+    return f"{metric}@{resolution}.{aggregate}"
+
+
+def aggregate_buckets(timestamps, values, resolution):
+    """Vectorized min/max/sum/count of samples grouped into aligned buckets."""
+    buckets = np.floor(np.asarray(timestamps) / resolution) * resolution
+    starts, first = np.unique(buckets, return_index=True)
+    values = np.asarray(values, dtype='f8')
+    return (
+        starts,
+        np.minimum.reduceat(values, first),
+        np.maximum.reduceat(values, first),
+        np.add.reduceat(values, first),
+        np.diff(np.append(first, len(values))).astype('f8'),
+    )
+
+
+def downsample_starts(timestamps, points):
+    """Indices splitting a sorted series into about `points` equal-width time buckets."""
+    edges = np.linspace(timestamps[0], timestamps[-1], points + 1)
+    first = np.unique(np.searchsorted(timestamps, edges[:-1], side='left'))
+    return first[first < len(timestamps)]
+
+
+def minmax_downsample(timestamps, mins, maxs, sums, counts, points):
+    """Reduce a series to about `points` buckets keeping each bucket's min and max.
+
+    Unlike striding or averaging, this never drops a spike, which is what the
+    charts need to show.
+    """
+    if len(timestamps) <= points:
+        return timestamps, mins, maxs, sums, counts
+    first = downsample_starts(timestamps, points)
+    return (
+        timestamps[first],
+        np.minimum.reduceat(mins, first),
+        np.maximum.reduceat(maxs, first),
+        np.add.reduceat(sums, first),
+        np.add.reduceat(counts, first),
+    )
+
+
+def minmax_envelope(timestamps, mins, maxs):
+    """Interleave per-bucket min and max into one line that traces the envelope."""
+    x = np.repeat(timestamps, 2)
+    y = np.empty(len(x), dtype='f8')
+    y[0::2] = mins
+    y[1::2] = maxs
+    return x, y
+
+
+class RollupStore:
+    """TimeSeriesStore wrapper that maintains 1m/1h/1d rollups as samples arrive.
+
+    Raw samples are written unchanged. For every rollup level an in-progress
+    bucket is kept in memory and written as min/max/sum/count columns when a
+    sample lands in the next bucket. query() picks the coarsest level that
+    still gives roughly one point per requested pixel, so charting a month
+    reads a few thousand rollup rows instead of millions of raw samples.
+    Raw samples older than `raw_retention` seconds are trimmed once a day;
+    the rollups keep the long-term history.
+    """
+
+    def __init__(self, store, raw_retention=7 * 86400):
+        self.store = store
+        self.raw_retention = raw_retention
+        self.partial = {}  # metric -> {resolution: [bucket, min, max, sum, count]}
+        self.lock = threading.Lock()
+
+    def append(self, metric, timestamp, value):
+        """Append a raw sample and fold it into every rollup level."""
+        with self.lock:
+            levels = self.partial.get(metric)
+            if levels is None:
+                levels = self._restore(metric)
+            self.store.append(metric, timestamp, value)
+            for resolution in RESOLUTIONS:
+                bucket = timestamp - timestamp % resolution
+                current = levels.get(resolution)
+                if current is not None and current[0] == bucket:
+                    current[1] = min(current[1], value)
+                    current[2] = max(current[2], value)
+                    current[3] += value
+                    current[4] += 1
+                    continue
+                if current is not None:
+                    self._flush(metric, resolution, *current)
+                    if resolution == RESOLUTIONS[-1] and self.raw_retention is not None:
+                        self.store.trim(metric, timestamp - self.raw_retention)
+                levels[resolution] = [bucket, value, value, value, 1]
+
+    def append_many(self, metric, timestamps, values):
+        for timestamp, value in zip(timestamps, values):
+            self.append(metric, timestamp, value)
+
+    def _flush(self, metric, resolution, bucket, low, high, total, count):
+        for aggregate, value in zip(AGGREGATES, (low, high, total, count)):
+            self.store.append(rollup_metric(metric, resolution, aggregate), bucket, value)
+
+    def _restore(self, metric):
+        """Rebuild in-progress buckets from raw samples written by an earlier run."""
+        levels = {}
+        for resolution in RESOLUTIONS:
+            done, _ = self.store.range(rollup_metric(metric, resolution, 'count'))
+            start = done[-1] + resolution if len(done) else None
+            timestamps, values = self.store.range(metric, start)
+            if not len(timestamps):
+                continue
+            starts, lows, highs, sums, counts = aggregate_buckets(timestamps, values, resolution)
+            # Every bucket but the last is complete
+            for i in range(len(starts) - 1):
+                self._flush(metric, resolution, starts[i], lows[i], highs[i], sums[i], counts[i])
+            levels[resolution] = [starts[-1], lows[-1], highs[-1], sums[-1], counts[-1]]
+        if self.raw_retention is not None:
+            # Everything older is already folded into the rollups above
+            self.store.trim(metric, time.time() - self.raw_retention)
+        self.partial[metric] = levels
+        return levels
+
+    def range(self, metric, start=None, end=None):
+        return self.store.range(metric, start, end)
+
+    def metrics(self, prefix=""):
+        return [name for name in self.store.metrics(prefix) if '@' not in name]
+
+    def choose_resolution(self, start, end, points):
+        """Coarsest level that still yields at least `points` buckets over [start, end]."""
+        span = max(end - start, 0)
+        for resolution in reversed(RESOLUTIONS):
+            if span / resolution >= points:
+                return resolution
+        return RAW_RESOLUTION
+
+    def query(self, metric, start, end, points):
+        """Return (timestamps, mins, maxs, avgs, resolution) with at most ~`points` buckets.
+
+        Only the chosen rollup level is read, so zooming in or out re-queries
+        a small column rather than rescanning raw data.
+        """
+        resolution = self.choose_resolution(start, end, points)
+        if resolution == RAW_RESOLUTION:
+            timestamps, values = self.store.range(metric, start, end)
+            mins = maxs = sums = values
+            counts = np.ones(len(values))
+        else:
+            # Include the bucket that straddles `start`
+            lo = start - resolution
+            # Hold the lock so no bucket is flushed halfway through reading its columns
+            with self.lock:
+                timestamps, mins = self.store.range(rollup_metric(metric, resolution, 'min'), lo, end)
+                maxs = self._column(metric, resolution, 'max', lo, end)
+                sums = self._column(metric, resolution, 'sum', lo, end)
+                counts = self._column(metric, resolution, 'count', lo, end)
+                current = self.partial.get(metric, {}).get(resolution)
+            # Fold in the in-progress bucket so the newest data is visible
+            if current is not None and lo <= current[0] <= end:
+                timestamps = np.append(timestamps, current[0])
+                mins = np.append(mins, current[1])
+                maxs = np.append(maxs, current[2])
+                sums = np.append(sums, current[3])
+                counts = np.append(counts, current[4])
+
+        if len(timestamps) > 2 * points:
+            timestamps, mins, maxs, sums, counts = minmax_downsample(
+                np.asarray(timestamps), np.asarray(mins), np.asarray(maxs),
+                np.asarray(sums), np.asarray(counts), points
+            )
+        avgs = np.divide(sums, counts, out=np.zeros(len(sums)), where=np.asarray(counts) > 0)
+        return timestamps, mins, maxs, avgs, resolution
+
+    def _column(self, metric, resolution, aggregate, start, end):
+        _, values = self.store.range(rollup_metric(metric, resolution, aggregate), start, end)
+        return values
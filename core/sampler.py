@@ -0,0 +1,81 @@
+import threading
+import time
+import logging
+import socket
+import psutil
+
+from core.backend import get_socket_summary
+
+
+class MetricsSampler(threading.Thread):
+    """Background thread that samples network counters into a TimeSeriesStore.
+
+    Every `interval` seconds it records:
+      - bandwidth.total: throughput in Mbps, loopback excluded
+      - bandwidth.<nic>: the same per interface, only for interfaces listed in `nics`
+      - packet_loss: dropped packets as a percentage of packets seen
+      - sockets.tcp / sockets.udp: number of open inet sockets per protocol
+    Callables in `remote_listeners` receive ({remote ip: sockets}, timestamp)
+    after each sample. Socket owners are not resolved here: that is the port
+    table's job, and doing it every second would cost a full refresh.
+    """
+
+    def __init__(self, store, interval=1.0, nics=()):
+        super().__init__(daemon=True)
+        self.store = store
+        self.interval = interval
+        # Per-interface series are opt-in: hosts with churning veth/tap devices
+        # would otherwise grow a new series for every interface ever seen
+        self.nics = set(nics)
+        self.remote_listeners = []
+        self.stop_event = threading.Event()
+        self.previous = None  # (timestamp, pernic counters)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logging.error(f"Error sampling network metrics: {e}")
+            self.stop_event.wait(self.interval)
+
+    def sample(self):
+        """Take one sample of every metric."""
+        now = time.time()
+        counters = psutil.net_io_counters(pernic=True)
+        if self.previous is not None:
+            self._record_counters(now, counters)
+        self.previous = (now, counters)
+
+        per_type, per_remote = get_socket_summary()
+        self.store.append("sockets.tcp", now, per_type[socket.SOCK_STREAM])
+        self.store.append("sockets.udp", now, per_type[socket.SOCK_DGRAM])
+        for listener in self.remote_listeners:
+            listener(per_remote, now)
+
+    def _record_counters(self, now, counters):
+        last_time, last_counters = self.previous
+        elapsed = now - last_time
+        if elapsed <= 0:
+            return
+        total_bytes = 0
+        packets = 0
+        dropped = 0
+        for nic, current in counters.items():
+            last = last_counters.get(nic)
+            if last is None:
+                continue
+            # Counters can wrap or reset when an interface is re-created
+            nic_bytes = max(current.bytes_sent - last.bytes_sent, 0) + max(current.bytes_recv - last.bytes_recv, 0)
+            if nic in self.nics:
+                self.store.append(f"bandwidth.{nic}", now, nic_bytes * 8 / elapsed / 1e6)
+            if nic == 'lo' or nic.lower().startswith('loopback'):
+                continue
+            total_bytes += nic_bytes
+            packets += max(current.packets_sent - last.packets_sent, 0) + max(current.packets_recv - last.packets_recv, 0)
+            dropped += max(current.dropin - last.dropin, 0) + max(current.dropout - last.dropout, 0)
+        self.store.append("bandwidth.total", now, total_bytes * 8 / elapsed / 1e6)
+        self.store.append("packet_loss", now, dropped / (packets + dropped) * 100 if packets + dropped else 0.0)
@@ -0,0 +1,264 @@
+import os
+import socket
+import struct
+import logging
+import time
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+# Same shape as psutil's sconn/addr tuples so callers can swap sources freely
+Address = namedtuple('Address', ['ip', 'port'])
+Connection = namedtuple('Connection', ['fd', 'family', 'type', 'laddr', 'raddr', 'status', 'pid'])
+
+# Kernel TCP states (include/net/tcp_states.h) mapped to psutil's status strings
+TCP_STATES = {
+    '01': 'ESTABLISHED',
+    '02': 'SYN_SENT',
+    '03': 'SYN_RECV',
+    '04': 'FIN_WAIT1',
+    '05': 'FIN_WAIT2',
+    '06': 'TIME_WAIT',
+    '07': 'CLOSE',
+    '08': 'CLOSE_WAIT',
+    '09': 'LAST_ACK',
+    '0A': 'LISTEN',
+    '0B': 'CLOSING',
+}
+
+# (table file, family, socket type)
+PROC_TABLES = [
+    ('tcp', socket.AF_INET, socket.SOCK_STREAM),
+    ('tcp6', socket.AF_INET6, socket.SOCK_STREAM),
+    ('udp', socket.AF_INET, socket.SOCK_DGRAM),
+    ('udp6', socket.AF_INET6, socket.SOCK_DGRAM),
+]
+
+
+@lru_cache(maxsize=65536)
+def decode_ip(ip_hex, family):
+    """Decode a hex address from /proc/net; the same few addresses repeat a lot."""
+    if family == socket.AF_INET:
+        packed = struct.pack('<I', int(ip_hex, 16))
+    else:
+        # IPv6 is stored as four host-endian 32-bit words
+        packed = struct.pack('<4I', *(int(ip_hex[i:i + 8], 16) for i in range(0, 32, 8)))
+    return socket.inet_ntop(family, packed)
+
+
+def decode_address(hex_addr, family):
+    """Decode an 'ADDR:PORT' hex pair from /proc/net/{tcp,udp}[6]."""
+    ip_hex, port_hex = hex_addr.split(':')
+    return Address(decode_ip(ip_hex, family), int(port_hex, 16))
+
+
+def parse_socket_table(path, family, sock_type):
+    """Yield (laddr, raddr, status, inode) rows from one /proc/net socket table."""
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        # e.g. IPv6 disabled
+        return
+    for line in lines[1:]:
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        laddr = decode_address(fields[1], family)
+        raddr = decode_address(fields[2], family)
+        if sock_type == socket.SOCK_STREAM:
+            status = TCP_STATES.get(fields[3], 'NONE')
+        else:
+            status = 'NONE'
+        if not raddr.port and raddr.ip in ('0.0.0.0', '::'):
+            raddr = ()
+        yield laddr, raddr, status, int(fields[9])
+
+
+def read_socket_tables(proc_root='/proc'):
+    """Yield (family, type, laddr, raddr, status, inode) for every inet socket."""
+    for name, family, sock_type in PROC_TABLES:
+        path = os.path.join(proc_root, 'net', name)
+        for laddr, raddr, status, inode in parse_socket_table(path, family, sock_type):
+            yield family, sock_type, laddr, raddr, status, inode
+
+
+def socket_summary(proc_root='/proc'):
+    """Return (sockets per socket type, sockets per remote address) for all inet sockets.
+
+    Only the remote-address column of the socket tables is read and each
+    distinct address is decoded once, so this stays cheap with 100k+
+    sockets. Owners are not resolved and no collector state is touched.
+    """
+    per_type = Counter()
+    per_remote = Counter()
+    for name, family, sock_type in PROC_TABLES:
+        try:
+            with open(os.path.join(proc_root, 'net', name)) as f:
+                next(f, None)  # header
+                raw = Counter(fields[2] for fields in (line.split(None, 3) for line in f) if len(fields) > 3)
+        except FileNotFoundError:
+            # e.g. IPv6 disabled
+            continue
+        for hex_addr, count in raw.items():
+            per_type[sock_type] += count
+            ip_hex, port_hex = hex_addr.split(':')
+            if int(port_hex, 16) or int(ip_hex, 16):  # unconnected sockets have no remote end
+                per_remote[decode_ip(ip_hex, family)] += count
+    return per_type, per_remote
+
+
+class ProcSocketCollector:
+    """Linux socket collector reading /proc/net directly.
+
+    psutil.net_connections() resolves socket owners by readlink()ing every fd
+    of every process on each call. This collector keeps an inode -> (pid, fd)
+    map between scans and only readlinks fds it has not seen before, so a
+    steady-state refresh costs one listdir per process instead of one
+    readlink per fd.
+
+    A socket whose owner is not found is retried against the processes whose
+    fd set changed; the full re-read of every fd (for an fd number reused
+    without its process's fd set changing) runs at most once per
+    `full_reread_interval` seconds.
+    """
+
+    def __init__(self, proc_root='/proc', full_reread_interval=30.0):
+        self.proc_root = proc_root
+        self.full_reread_interval = full_reread_interval
+        self.next_full_reread = 0.0
+        self.inode_owner = {}     # socket inode -> (pid, fd)
+        self.pid_fds = {}         # pid -> {fd: socket inode or None}
+        self.pid_start = {}       # pid -> start time, to catch PID reuse
+        self.orphans = set()      # inodes no readable process owns
+        self.live_inodes = set()  # inet socket inodes seen by the last scan
+
+    @staticmethod
+    def available(proc_root='/proc'):
+        """Return True if the /proc socket tables can be read on this host."""
+        return os.path.exists(os.path.join(proc_root, 'net', 'tcp'))
+
+    def connections(self):
+        """Return psutil-style connection tuples for all inet sockets."""
+        rows = list(read_socket_tables(self.proc_root))
+
+        live_inodes = {row[5] for row in rows if row[5]}
+        self._refresh_owners(live_inodes)
+
+        connections = []
+        for family, sock_type, laddr, raddr, status, inode in rows:
+            pid, fd = self.inode_owner.get(inode, (None, -1))
+            connections.append(Connection(fd, family, sock_type, laddr, raddr, status, pid))
+        return connections
+
+    def _refresh_owners(self, live_inodes):
+        """Bring the inode -> owner map up to date, touching only changed fds."""
+        pids = set()
+        for entry in os.listdir(self.proc_root):
+            if entry.isdigit():
+                pids.add(int(entry))
+
+        first_scan = not self.pid_start
+        # Forget processes that have exited
+        for pid in list(self.pid_fds):
+            if pid not in pids:
+                self._forget_pid(pid)
+
+        changed = set()
+        for pid in pids:
+            start = self._start_time(pid)
+            if start is None:
+                self._forget_pid(pid)
+                continue
+            if self.pid_start.get(pid) != start:
+                # New process or PID reuse: drop anything cached for it
+                self._forget_pid(pid)
+                self.pid_start[pid] = start
+            if self._scan_pid(pid):
+                changed.add(pid)
+
+        self.orphans &= live_inodes
+        if live_inodes - self.inode_owner.keys() - self.orphans:
+            # An fd number may have been closed and reused for a new socket
+            # between scans. Re-read fds that pointed at an inet socket that
+            # has since gone away, then the other fds of processes that
+            # opened or closed something, and everything only when due.
+            gone = self.live_inodes - live_inodes
+            self._reread_fds(lambda inode: inode in gone)
+            if changed and live_inodes - self.inode_owner.keys() - self.orphans:
+                self._reread_fds(lambda inode: inode not in live_inodes, changed)
+            now = time.monotonic()
+            if live_inodes - self.inode_owner.keys() - self.orphans and now >= self.next_full_reread:
+                self.next_full_reread = now + self.full_reread_interval
+                if not first_scan:  # every fd was just read
+                    self._reread_fds(lambda inode: inode not in live_inodes)
+                # Owned by processes we cannot read, or already closed
+                self.orphans = live_inodes - self.inode_owner.keys()
+        self.live_inodes = live_inodes
+
+    def _reread_fds(self, is_stale, pids=None):
+        for pid in self.pid_fds if pids is None else pids:
+            fds = self.pid_fds.get(pid, {})
+            for fd, inode in list(fds.items()):
+                if is_stale(inode):
+                    self._read_fd(pid, fd)
+
+    def _scan_pid(self, pid):
+        """Read the fds opened since the last scan; True if an already known process's fd set changed."""
+        fd_dir = os.path.join(self.proc_root, str(pid), 'fd')
+        try:
+            current = {int(fd) for fd in os.listdir(fd_dir)}
+        except (FileNotFoundError, ProcessLookupError, PermissionError, NotADirectoryError):
+            self.pid_fds.setdefault(pid, {})
+            return False
+        known = pid in self.pid_fds
+        cached = self.pid_fds.setdefault(pid, {})
+        if cached.keys() == current:
+            return False
+        for fd in list(cached):
+            if fd not in current:
+                self._drop_fd(pid, fd)
+        for fd in current:
+            if fd not in cached:
+                self._read_fd(pid, fd)
+        return known
+
+    def _read_fd(self, pid, fd):
+        cached = self.pid_fds[pid]
+        old = cached.get(fd)
+        try:
+            target = os.readlink(os.path.join(self.proc_root, str(pid), 'fd', str(fd)))
+        except OSError:
+            target = ''
+        inode = None
+        if target.startswith('socket:['):
+            inode = int(target[8:-1])
+        if old is not None and old != inode and self.inode_owner.get(old) == (pid, fd):
+            del self.inode_owner[old]
+        cached[fd] = inode
+        if inode is not None:
+            self.inode_owner[inode] = (pid, fd)
+
+    def _drop_fd(self, pid, fd):
+        inode = self.pid_fds[pid].pop(fd, None)
+        if inode is not None and self.inode_owner.get(inode) == (pid, fd):
+            del self.inode_owner[inode]
+
+    def _forget_pid(self, pid):
+        for fd in list(self.pid_fds.get(pid, ())):
+            self._drop_fd(pid, fd)
+        self.pid_fds.pop(pid, None)
+        self.pid_start.pop(pid, None)
+
+    def _start_time(self, pid):
+        try:
+            with open(os.path.join(self.proc_root, str(pid), 'stat')) as f:
+                stat = f.read()
+        except OSError:
+            return None
+        # comm may contain spaces/parens, so split after the last ')'
+        fields = stat.rsplit(')', 1)[-1].split()
+        try:
+            return int(fields[19])
+        except (IndexError, ValueError):
+            logging.error(f"Unexpected /proc/{pid}/stat format")
+            return None
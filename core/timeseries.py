@@ -0,0 +1,154 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def column_name(metric):
+    """File-safe form of a metric name; also used as the column key."""
+    return re.sub(r'[^\w.@-]', '_', metric)
+
+
+class MetricColumn:
+    """One metric stored as two append-only float64 files: timestamps and values.
+
+    No file handle is held between calls: appends open, write and close, and
+    reads go through a memory map that the store may drop at any time, so
+    the number of open descriptors does not grow with the number of metrics.
+    """
+
+    def __init__(self, directory, name):
+        self.ts_path = os.path.join(directory, f"{name}.ts.f8")
+        self.val_path = os.path.join(directory, f"{name}.val.f8")
+        self.unmap()
+
+    def append(self, timestamps, values):
+        # Values first so a reader never sees a timestamp without its value
+        with open(self.val_path, 'ab') as f:
+            f.write(np.asarray(values, dtype='<f8').tobytes())
+        with open(self.ts_path, 'ab') as f:
+            f.write(np.asarray(timestamps, dtype='<f8').tobytes())
+
+    def length(self):
+        try:
+            return min(os.path.getsize(self.ts_path), os.path.getsize(self.val_path)) // 8
+        except FileNotFoundError:
+            return 0
+
+    def arrays(self):
+        """Return memory-mapped (timestamps, values) covering everything written so far."""
+        length = self.length()
+        if length != self._maps[0]:
+            if length:
+                self._maps = (
+                    length,
+                    np.memmap(self.ts_path, dtype='<f8', mode='r', shape=(length,)),
+                    np.memmap(self.val_path, dtype='<f8', mode='r', shape=(length,)),
+                )
+            else:
+                self.unmap()
+        return self._maps[1], self._maps[2]
+
+    def unmap(self):
+        """Drop the cached mapping (and the descriptors mmap holds for it)."""
+        empty = np.empty(0, dtype='<f8')
+        self._maps = (0, empty, empty)  # (length, timestamps memmap, values memmap)
+
+    def trim(self, before):
+        """Drop samples older than `before` by rewriting both files atomically."""
+        timestamps, values = self.arrays()
+        keep = int(np.searchsorted(timestamps, before, side='left'))
+        if not keep:
+            return 0
+        tail_ts = np.array(timestamps[keep:])
+        tail_val = np.array(values[keep:len(timestamps)])
+        self.unmap()
+        for path, data in ((self.val_path, tail_val), (self.ts_path, tail_ts)):
+            with open(path + ".tmp", 'wb') as f:
+                f.write(data.astype('<f8').tobytes())
+            os.replace(path + ".tmp", path)
+        return keep
+
+
+class TimeSeriesStore:
+    """Local columnar time-series store with one pair of memory-mapped files per metric.
+
+    Samples must be appended in time order per metric, which lets range
+    queries binary-search the timestamp column and return array views
+    without copying or scanning the data.
+
+    At most `max_mapped` columns are kept mapped at once (least recently read
+    are unmapped first).
+    """
+
+    def __init__(self, directory="network_monitor_data", max_mapped=16):
+        self.directory = directory
+        self.max_mapped = max_mapped
+        os.makedirs(directory, exist_ok=True)
+        self.columns = {}
+        self.mapped = OrderedDict()  # column name -> None, least recently read first
+        self.lock = threading.Lock()
+        # Pick up metrics written by earlier runs
+        for file_name in os.listdir(directory):
+            if file_name.endswith(".ts.f8"):
+                self._column(file_name[:-len(".ts.f8")])
+
+    def _column(self, metric):
+        name = column_name(metric)
+        column = self.columns.get(name)
+        if column is None:
+            column = MetricColumn(self.directory, name)
+            self.columns[name] = column
+        return column
+
+    def _arrays(self, name, column):
+        self.mapped[name] = None
+        self.mapped.move_to_end(name)
+        while len(self.mapped) > self.max_mapped:
+            evicted, _ = self.mapped.popitem(last=False)
+            self.columns[evicted].unmap()
+        return column.arrays()
+
+    def append(self, metric, timestamp, value):
+        """Append a single sample to a metric."""
+        self.append_many(metric, [timestamp], [value])
+
+    def append_many(self, metric, timestamps, values):
+        """Append samples (in time order) to a metric."""
+        with self.lock:
+            self._column(metric).append(timestamps, values)
+
+    def metrics(self, prefix=""):
+        """Return the names of stored metrics, optionally filtered by prefix."""
+        with self.lock:
+            return sorted(name for name in self.columns if name.startswith(prefix))
+
+    def range(self, metric, start=None, end=None):
+        """Return (timestamps, values) array views for samples in [start, end]."""
+        with self.lock:
+            name = column_name(metric)
+            column = self.columns.get(name)
+            if column is None:
+                empty = np.empty(0, dtype='<f8')
+                return empty, empty
+            timestamps, values = self._arrays(name, column)
+        lo = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+        hi = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='right')
+        return timestamps[lo:hi], values[lo:hi]
+
+    def trim(self, metric, before):
+        """Delete a metric's samples older than `before`; returns how many were dropped."""
+        with self.lock:
+            name = column_name(metric)
+            column = self.columns.get(name)
+            if column is None:
+                return 0
+            self.mapped.pop(name, None)
+            return column.trim(before)
+
+    def close(self):
+        with self.lock:
+            for column in self.columns.values():
+                column.unmap()
+            self.mapped.clear()
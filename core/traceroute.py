@@ -0,0 +1,195 @@
+"""Parallel UDP traceroute for Linux, without raw sockets or an external tool.
+
+Every TTL's probe is sent at once from one ordinary (unprivileged) UDP
+socket with IP_RECVERR / IPV6_RECVERR enabled. The ICMP errors the probes
+trigger (time exceeded from each router, port unreachable from the
+target) are queued on that socket's error queue. Each carries the address
+of the router that sent it and the original destination port, which
+encodes the probe's TTL. Hops are therefore reported as their answers
+arrive, in any order, and a whole trace takes about one round trip plus
+`timeout` for the hops that never answer, instead of a timeout per silent
+hop. Unanswered TTLs are probed again part-way through the timeout, since
+routers rate-limit their ICMP errors and drop probes queued behind
+neighbour discovery.
+"""
+import select
+import socket
+import struct
+import time
+from collections import namedtuple
+
+IP_RECVERR = getattr(socket, 'IP_RECVERR', 11)
+IPV6_RECVERR = getattr(socket, 'IPV6_RECVERR', 25)
+SO_EE_ORIGIN_ICMP = 2
+SO_EE_ORIGIN_ICMP6 = 3
+# struct sock_extended_err: errno, origin, type, code, pad, info, data; the offender's sockaddr follows
+EXTENDED_ERR = struct.Struct('=IBBBBII')
+
+TIME_EXCEEDED = 'time exceeded'
+REACHED = 'reached'          # port unreachable from the target itself
+UNREACHABLE = 'unreachable'  # any other destination unreachable: the route ends here
+
+# port and address are the probe's destination; ip is the address of the host that answered
+Reply = namedtuple('Reply', ['port', 'ip', 'kind', 'received', 'address'])
+
+
+def classify(origin, icmp_type, code):
+    """TIME_EXCEEDED, REACHED, UNREACHABLE or None (not an ICMP answer to a probe)."""
+    if origin == SO_EE_ORIGIN_ICMP:
+        if icmp_type == 11:
+            return TIME_EXCEEDED
+        if icmp_type == 3:
+            return REACHED if code == 3 else UNREACHABLE
+    elif origin == SO_EE_ORIGIN_ICMP6:
+        if icmp_type == 3:
+            return TIME_EXCEEDED
+        if icmp_type == 1:
+            return REACHED if code == 4 else UNREACHABLE
+    return None
+
+
+def open_probe_socket(family):
+    """Non-blocking UDP socket that queues received ICMP errors for read_errors()."""
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    try:
+        if family == socket.AF_INET6:
+            sock.setsockopt(socket.IPPROTO_IPV6, IPV6_RECVERR, 1)
+        else:
+            sock.setsockopt(socket.SOL_IP, IP_RECVERR, 1)
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def send_probe(sock, family, address, port, ttl):
+    if family == socket.AF_INET6:
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_UNICAST_HOPS, ttl)
+        destination = (address, port, 0, 0)
+    else:
+        sock.setsockopt(socket.SOL_IP, socket.IP_TTL, ttl)
+        destination = (address, port)
+    for _ in range(4):
+        try:
+            sock.sendto(b'', destination)
+            return
+        except OSError as e:
+            # An answer to an earlier probe was already queued: the kernel reports it
+            # here and drops this datagram. The answer stays in the error queue.
+            last_error = e
+    raise last_error
+
+
+def read_errors(sock):
+    """Drain the socket's error queue; yields a Reply per ICMP answer."""
+    while True:
+        try:
+            _, ancillary, _, destination = sock.recvmsg(0, 512, socket.MSG_ERRQUEUE)
+        except (BlockingIOError, InterruptedError):
+            return
+        received = time.perf_counter()
+        for level, kind, data in ancillary:
+            if (level, kind) not in ((socket.SOL_IP, IP_RECVERR), (socket.IPPROTO_IPV6, IPV6_RECVERR)):
+                continue
+            _, origin, icmp_type, code, _, _, _ = EXTENDED_ERR.unpack_from(data)
+            answer = classify(origin, icmp_type, code)
+            if answer is None:
+                continue
+            offender = data[EXTENDED_ERR.size:]
+            family = struct.unpack_from('=H', offender)[0]
+            if family == socket.AF_INET6:
+                ip = socket.inet_ntop(socket.AF_INET6, offender[8:24])
+            else:
+                ip = socket.inet_ntop(socket.AF_INET, offender[4:8])
+            yield Reply(destination[1], ip, answer, received, destination[0])
+
+
+def resolve(target):
+    """(family, address) of a host name or address, preferring what getaddrinfo lists first."""
+    family, _, _, _, sockaddr = socket.getaddrinfo(target, None, type=socket.SOCK_DGRAM)[0]
+    return family, sockaddr[0]
+
+
+class ParallelTracer:
+    """Traceroute that probes all TTLs at once; see the module docstring.
+
+    Attempt a (from 0) of TTL n is sent to port `base_port + a * max_hops
+    + n - 1`, so the destination port of an answer identifies both, as in
+    the classic traceroute. `retries` further attempts are spread evenly
+    over `timeout`; they add no time to a trace.
+    """
+
+    def __init__(self, max_hops=20, timeout=1.0, retries=1, base_port=33434):
+        self.max_hops = max_hops
+        self.timeout = timeout
+        self.retries = retries
+        self.base_port = base_port
+
+    def trace(self, target, on_hop=None, should_stop=None):
+        """Trace the route to `target`; returns hop dicts sorted by hop number.
+
+        Each hop is {'hop', 'ip', 'time_ms'} with ip "Timeout" for hops that
+        did not answer. `on_hop` is called with each hop as it is known:
+        answers as they arrive, then the silent hops at the end.
+        """
+        family, address = resolve(target)
+        sock = open_probe_socket(family)
+        poller = select.poll()
+        poller.register(sock, select.POLLIN)  # POLLERR (a queued error) is always reported
+        hops = {}
+        sent = {}  # port -> (ttl, sent at)
+        final = None  # lowest TTL answered by the target, or where the route ends
+        try:
+            start = time.perf_counter()
+            deadline = start + self.timeout
+            attempt = 0
+            while not (should_stop and should_stop()):
+                last = final or self.max_hops
+                missing = [ttl for ttl in range(1, last + 1) if ttl not in hops]
+                if not missing:
+                    break
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if attempt <= self.retries and now >= start + attempt * self.timeout / (self.retries + 1):
+                    for ttl in missing:
+                        port = self.base_port + attempt * self.max_hops + ttl - 1
+                        send_probe(sock, family, address, port, ttl)
+                        sent[port] = (ttl, time.perf_counter())
+                    attempt += 1
+                    continue
+                wake = deadline
+                if attempt <= self.retries:
+                    wake = min(wake, start + attempt * self.timeout / (self.retries + 1))
+                # Short polls so should_stop is honoured promptly
+                if not poller.poll(max(0.0, min(wake - now, 0.1)) * 1000):
+                    continue
+                for reply in read_errors(sock):
+                    if reply.port not in sent:
+                        continue
+                    ttl, sent_at = sent[reply.port]
+                    if ttl in hops or (final and ttl > final):
+                        continue
+                    hops[ttl] = {'hop': ttl, 'ip': reply.ip,
+                                 'time_ms': round((reply.received - sent_at) * 1000, 2)}
+                    if reply.kind == TIME_EXCEEDED:
+                        if on_hop:
+                            on_hop(hops[ttl])
+                    elif final is None or ttl < final:
+                        # Every probe past the end of the route gets there too, so the
+                        # end is only reported once no lower TTL can replace it
+                        final = ttl
+                        for extra in [t for t in hops if t > final]:
+                            del hops[extra]
+        finally:
+            sock.close()
+        last = final or self.max_hops
+        for ttl in range(1, last + 1):
+            if ttl not in hops:
+                hops[ttl] = {'hop': ttl, 'ip': "Timeout", 'time_ms': 0}
+                if on_hop:
+                    on_hop(hops[ttl])
+        if final and on_hop:
+            on_hop(hops[final])
+        return [hops[ttl] for ttl in sorted(hops) if ttl <= last]
@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The app is run from the repository root (python main.py), so tests import core/ui the same way
+sys.path.insert(0, REPO)
+
+PREFIX = f"trt{os.getpid() % 10000}"
+
+# client -- r1 -- r2 -- server, dual-stack; r1 and r2 forward
+TOPOLOGY = [
+    "link add {p}a type veth peer name {p}b",
+    "link set {p}a netns {p}c", "link set {p}b netns {p}r1",
+    "link add {p}g type veth peer name {p}d",
+    "link set {p}g netns {p}r1", "link set {p}d netns {p}r2",
+    "link add {p}e type veth peer name {p}f",
+    "link set {p}e netns {p}r2", "link set {p}f netns {p}s",
+    "-n {p}c addr add 10.77.1.2/24 dev {p}a", "-n {p}c addr add fd77:1::2/64 dev {p}a nodad",
+    "-n {p}r1 addr add 10.77.1.1/24 dev {p}b", "-n {p}r1 addr add fd77:1::1/64 dev {p}b nodad",
+    "-n {p}r1 addr add 10.77.2.1/24 dev {p}g", "-n {p}r1 addr add fd77:2::1/64 dev {p}g nodad",
+    "-n {p}r2 addr add 10.77.2.2/24 dev {p}d", "-n {p}r2 addr add fd77:2::2/64 dev {p}d nodad",
+    "-n {p}r2 addr add 10.77.3.1/24 dev {p}e", "-n {p}r2 addr add fd77:3::1/64 dev {p}e nodad",
+    "-n {p}s addr add 10.77.3.2/24 dev {p}f", "-n {p}s addr add fd77:3::2/64 dev {p}f nodad",
+    "-n {p}c link set {p}a up", "-n {p}r1 link set {p}b up", "-n {p}r1 link set {p}g up",
+    "-n {p}r2 link set {p}d up", "-n {p}r2 link set {p}e up", "-n {p}s link set {p}f up",
+    "-n {p}c route add default via 10.77.1.1", "-n {p}c -6 route add default via fd77:1::1",
+    "-n {p}r1 route add 10.77.3.0/24 via 10.77.2.2", "-n {p}r1 -6 route add fd77:3::/64 via fd77:2::2",
+    "-n {p}r2 route add 10.77.1.0/24 via 10.77.2.1", "-n {p}r2 -6 route add fd77:1::/64 via fd77:2::1",
+    "-n {p}s route add default via 10.77.3.1", "-n {p}s -6 route add default via fd77:3::1",
+]
+# r2 stops answering: everything it sends itself (its ICMP errors) is blackholed
+SILENCE_R2 = [
+    "-n {p}r2 route add blackhole 10.77.1.0/24 table 100", "-n {p}r2 rule add iif lo lookup 100",
+    "-n {p}r2 -6 route add blackhole fd77:1::/64 table 100", "-n {p}r2 -6 rule add iif lo lookup 100",
+]
+WARM_UP = """
+import json, time
+from core.traceroute import ParallelTracer
+start = time.perf_counter()
+ParallelTracer(timeout=1.0).trace({target!r})
+print(json.dumps(time.perf_counter() - start))
+"""
+
+
+def ip(command):
+    subprocess.run(["ip"] + command.format(p=PREFIX).split(), check=True, capture_output=True)
+
+
+@pytest.fixture(scope="session")
+def namespaces():
+    """A client namespace two routers away from a server namespace (needs root).
+
+    Yields run(code): runs Python `code` in the client namespace, with the
+    repository importable, and returns the JSON it prints.
+    """
+    if os.geteuid() != 0 or not shutil.which("ip"):
+        pytest.skip("network namespaces need root and iproute2")
+    names = [f"{PREFIX}{n}" for n in ("c", "r1", "r2", "s")]
+    try:
+        for name in names:
+            ip(f"netns add {name}")
+            ip(f"-n {name} link set lo up")
+        for command in TOPOLOGY:
+            ip(command)
+        for router in names[1:3]:
+            subprocess.run(["ip", "netns", "exec", router, "sysctl", "-qw", "net.ipv4.ip_forward=1",
+                            "net.ipv6.conf.all.forwarding=1"], check=True, capture_output=True)
+        # Every trace sends the server a burst of probes; without this, its per-peer ICMP
+        # rate limit would make each test depend on how long ago the previous one ran
+        for name in names[1:]:
+            subprocess.run(["ip", "netns", "exec", name, "sysctl", "-qw", "net.ipv4.icmp_ratelimit=0",
+                            "net.ipv6.icmp.ratelimit=0"], check=True, capture_output=True)
+    except (subprocess.CalledProcessError, OSError) as e:
+        for name in names:
+            subprocess.run(["ip", "netns", "del", name], capture_output=True)
+        pytest.skip(f"cannot build network namespaces: {e}")
+
+    def run(code):
+        script = f"import sys\nsys.path.insert(0, {REPO!r})\n{code}"
+        output = subprocess.run(["ip", "netns", "exec", names[0], sys.executable, "-c", script],
+                                check=True, capture_output=True, text=True).stdout
+        return json.loads(output)
+
+    # Resolve neighbours first: probes queued behind neighbour discovery are delayed or dropped
+    for target in ("10.77.3.2", "fd77:3::2"):
+        for _ in range(5):
+            if run(WARM_UP.format(target=target)) < 0.1:
+                break
+    yield run
+    for name in names:
+        subprocess.run(["ip", "netns", "del", name], capture_output=True)
+
+
+@pytest.fixture
+def silent_router(namespaces):
+    """Make r2, the second hop, drop every ICMP error it would send."""
+    for command in SILENCE_R2:
+        ip(command)
+    yield
+    for command in SILENCE_R2:
+        subprocess.run(["ip"] + command.format(p=PREFIX).replace(" add ", " del ").split(),
+                       capture_output=True)
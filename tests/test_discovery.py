@@ -0,0 +1,109 @@
+import asyncio
+import ipaddress
+import socket
+import threading
+import time
+
+import pytest
+
+from core.discovery import SubnetSweeper, local_networks
+
+RESPONDERS = ['127.0.0.10', '127.0.0.20', '127.0.0.30']
+
+
+@pytest.fixture
+def tcp_responders():
+    """Listeners on a few loopback addresses, all on one port; other addresses have none."""
+    first = socket.socket()
+    first.bind((RESPONDERS[0], 0))
+    first.listen()
+    port = first.getsockname()[1]
+    listeners = [first]
+    for ip in RESPONDERS[1:]:
+        listener = socket.socket()
+        listener.bind((ip, port))
+        listener.listen()
+        listeners.append(listener)
+    yield port
+    for listener in listeners:
+        listener.close()
+
+
+@pytest.fixture
+def udp_responder():
+    """A UDP echo responder on 127.0.0.40."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.40', 0))
+    sock.settimeout(0.1)
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            try:
+                data, peer = sock.recvfrom(512)
+            except socket.timeout:
+                continue
+            sock.sendto(data, peer)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield sock.getsockname()[1]
+    stop.set()
+    thread.join()
+    sock.close()
+
+
+def sweep(sweeper, networks, **kwargs):
+    found = {}
+    progress = []
+    probed = asyncio.run(sweeper.sweep(
+        networks, lambda ip, method, rtt: found.setdefault(ip, method),
+        on_progress=lambda done, total: progress.append((done, total)), **kwargs))
+    return probed, found, progress
+
+
+def test_sweep_reports_only_responding_hosts(tcp_responders):
+    sweeper = SubnetSweeper(tcp_ports=(tcp_responders,), udp_ports=(), icmp=False,
+                            timeout=0.5, refused_is_alive=False)
+    probed, found, progress = sweep(sweeper, ['127.0.0.0/26'])
+    assert probed == 62
+    assert sorted(found) == RESPONDERS
+    assert all(method == f"tcp/{tcp_responders}" for method in found.values())
+    assert progress[-1] == (62, 62)
+
+
+def test_refused_connection_counts_as_alive():
+    sweeper = SubnetSweeper(tcp_ports=(9,), udp_ports=(), icmp=False, timeout=0.5)
+    _, found, _ = sweep(sweeper, ['127.0.1.0/29'])
+    assert sorted(found) == [str(ip) for ip in ipaddress.ip_network('127.0.1.0/29').hosts()]
+    assert set(found.values()) == {"tcp/9 closed"}
+
+
+def test_udp_probe_finds_udp_only_host(udp_responder):
+    sweeper = SubnetSweeper(tcp_ports=(), udp_ports=(udp_responder,), icmp=False,
+                            timeout=0.5, refused_is_alive=False)
+    _, found, _ = sweep(sweeper, ['127.0.0.32/27'])
+    assert found == {'127.0.0.40': f"udp/{udp_responder}"}
+
+
+def test_concurrency_bounds_sweep_time(tcp_responders):
+    # A whole /20 of loopback addresses with every probe answered in well under a second
+    sweeper = SubnetSweeper(tcp_ports=(tcp_responders,), udp_ports=(), icmp=False,
+                            concurrency=512, timeout=0.5)
+    start = time.perf_counter()
+    probed, found, _ = sweep(sweeper, ['127.2.0.0/20'])
+    assert probed == len(found) == 4094
+    assert time.perf_counter() - start < 30
+
+
+def test_sweep_can_be_cancelled(tcp_responders):
+    sweeper = SubnetSweeper(tcp_ports=(tcp_responders,), udp_ports=(), icmp=False,
+                            concurrency=16, timeout=0.5)
+    probed, _, _ = sweep(sweeper, ['127.3.0.0/16'], should_stop=lambda: True)
+    assert probed == 0
+
+
+def test_local_networks_use_real_prefixes():
+    for name, interface in local_networks():
+        assert not interface.ip.is_loopback
+        assert 16 <= interface.network.prefixlen <= 32
@@ -0,0 +1,104 @@
+import asyncio
+import re
+import threading
+
+import pytest
+
+from core.fingerprint import SIGNATURES, BannerGrabber, ServiceMatcher, describe
+from core.portscanner import PortScanner
+
+HOST = '127.0.0.41'
+SSH_BANNER = b"SSH-2.0-OpenSSH_9.6p1 Ubuntu-3ubuntu13\r\n"
+HTTP_REPLY = b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\nServer: nginx/1.25.3\r\n\r\n"
+
+BANNERS = [
+    (SSH_BANNER, ("ssh", "OpenSSH", "9.6p1")),
+    (b"SSH-2.0-dropbear_2022.83\r\n", ("ssh", "Dropbear", "2022.83")),
+    (b"220 (vsFTPd 3.0.5)\r\n", ("ftp", "vsftpd", "3.0.5")),
+    (b"220 mail.example.com ESMTP Postfix (Ubuntu)\r\n", ("smtp", "Postfix", None)),
+    (b"220 mx ESMTP Exim 4.96 Mon, 1 Jan 2024\r\n", ("smtp", "Exim", "4.96")),
+    (b"+OK Dovecot ready.\r\n", ("pop3", "Dovecot", None)),
+    (b"* OK [CAPABILITY IMAP4rev1] Dovecot ready.\r\n", ("imap", "Dovecot", None)),
+    (b"J\x00\x00\x00\x0a8.0.36\x00\x08\x00\x00\x00", ("mysql", "MySQL", "8.0.36")),
+    (b"RFB 003.008\n", ("vnc", "VNC", "003.008")),
+    (HTTP_REPLY, ("http", "nginx", "1.25.3")),
+    (b"HTTP/1.0 200 OK\r\nServer: SimpleHTTP/0.6 Python/3.11.7\r\n\r\n", ("http", "Python http.server", "3.11.7")),
+    (b"HTTP/1.1 401 Unauthorized\r\nServer: CUPS/2.4 IPP/2.1\r\n\r\n", ("ipp", "CUPS", "2.4")),
+    (b"HTTP/1.1 404 Not Found\r\n\r\n", ("http", None, None)),
+    (b"\x16\x03\x03\x00\x51\x02\x00\x00\x4d", ("tls", None, None)),
+]
+
+
+@pytest.fixture
+def services():
+    """SSH-like (talks first), HTTP-like (answers a request) and silent servers; returns their ports."""
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    ports = {}
+
+    async def ssh(reader, writer):
+        writer.write(SSH_BANNER)
+        await writer.drain()
+        writer.close()
+
+    async def http(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(HTTP_REPLY)
+        await writer.drain()
+        writer.close()
+
+    async def silent(reader, writer):
+        await reader.read()
+        writer.close()
+
+    async def start():
+        for name, handler in (('ssh', ssh), ('http', http), ('silent', silent)):
+            server = await asyncio.start_server(handler, HOST, 0)
+            ports[name] = server.sockets[0].getsockname()[1]
+        ready.set()
+
+    thread = threading.Thread(target=lambda: (loop.run_until_complete(start()), loop.run_forever()), daemon=True)
+    thread.start()
+    ready.wait(5)
+    yield ports
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+@pytest.mark.parametrize("banner,expected", BANNERS)
+def test_matcher_identifies_known_banners(banner, expected):
+    assert ServiceMatcher().match(banner) == expected
+
+
+def test_combined_regex_agrees_with_first_matching_signature():
+    matcher = ServiceMatcher()
+    for banner, _ in BANNERS + [(b"garbage", None), (b"", None)]:
+        first = next(((service, product) for service, product, pattern in SIGNATURES
+                      if re.match(pattern, banner, re.DOTALL)), None)
+        match = matcher.match(banner)
+        assert (match[:2] if match else None) == first
+
+
+def test_signatures_with_several_groups_are_rejected():
+    with pytest.raises(ValueError):
+        ServiceMatcher([("x", None, rb"^(a)(b)")])
+
+
+def test_grabber_reads_server_first_and_probed_banners(services):
+    grabber = BannerGrabber(timeout=0.5, wait=0.1)
+
+    async def identify_all():
+        return await asyncio.gather(*(grabber.identify(HOST, port) for port in services.values()))
+
+    ssh, http, silent = asyncio.run(identify_all())
+    assert describe(ssh) == "ssh (OpenSSH 9.6p1)"
+    assert describe(http) == "http (nginx 1.25.3)"
+    assert silent.banner == b"" and not silent.matched
+
+
+def test_scan_attaches_services_to_open_ports(services):
+    results = []
+    asyncio.run(PortScanner(concurrency=8, identify=True).scan(
+        [HOST], [services['ssh'], services['http']], results.append))
+    assert {r.port: r.service for r in results} == {
+        services['ssh']: "ssh (OpenSSH 9.6p1)", services['http']: "http (nginx 1.25.3)"}
@@ -0,0 +1,86 @@
+import random
+
+from core.flows import INDEXED_FIELDS, Flow, FlowIndex, diff_flows, sort_value
+
+PROCESSES = ['nginx', 'haproxy', 'sshd', 'firefox', 'N/A']
+STATUSES = ['ESTABLISHED', 'TIME_WAIT', 'CLOSE_WAIT']
+
+
+def random_flow(rng):
+    return Flow('tcp', '10.0.0.1', rng.randrange(1024, 65536), f"192.0.2.{rng.randrange(1, 60)}",
+                rng.choice([80, 443, 8080]), rng.choice(STATUSES), rng.randrange(100, 110),
+                rng.choice(PROCESSES))
+
+
+def key_of(flow):
+    return flow.proto, flow.local_ip, flow.local_port, flow.remote_ip, flow.remote_port, flow.pid
+
+
+def expected_rows(flows, text, field, descending):
+    text = text.strip().lower()
+    shown = [flow for flow in flows.values()
+             if not text or any(text in str(getattr(flow, f)).lower() for f in INDEXED_FIELDS)]
+    rows = sorted(shown, key=lambda flow: (sort_value(flow, field), key_of(flow)))
+    return rows[::-1] if descending else rows
+
+
+def rows(index):
+    return [index.flow_at(row) for row in range(len(index.visible))]
+
+
+def test_incremental_updates_match_a_full_rebuild():
+    rng = random.Random(7)
+    index = FlowIndex()
+    index.ordered.load = index.visible.load = 4  # many small blocks, so splits and merges are exercised
+    flows = {}
+    filters = ['', '192.0.2.1', '192.0.2.12', 'nginx', 'wait', '']
+    for step in range(60):
+        added = {}
+        for _ in range(rng.randrange(0, 30)):
+            flow = random_flow(rng)
+            if key_of(flow) not in flows:
+                added[key_of(flow)] = flow
+        removed = rng.sample(sorted(flows), min(len(flows), rng.randrange(0, 20)))
+        changed = {}
+        for key in rng.sample(sorted(set(flows) - set(removed)), min(len(flows) - len(removed), 5)):
+            changed[key] = flows[key]._replace(status=rng.choice(STATUSES))
+        for key in removed:
+            del flows[key]
+        flows.update(added)
+        flows.update(changed)
+        index.apply(added, removed, changed)
+
+        if step % 10 == 0:
+            index.set_filter(filters[step // 10])
+        if step % 15 == 0:
+            index.set_sort(rng.choice(['remote_ip', 'status', 'pid', 'local_port']), rng.random() < 0.5)
+        assert rows(index) == expected_rows(flows, index.filter_text, index.sort_field, index.descending)
+
+
+def test_bulk_refresh_and_narrowing_filter():
+    rng = random.Random(3)
+    flows = {}
+    while len(flows) < 2000:
+        flow = random_flow(rng)
+        flows[key_of(flow)] = flow
+    index = FlowIndex()
+    index.apply(flows, [], {})
+    for text in ['1', '19', '192.0.2.5', '192.0.2.55', 'ssh', 'sshd', '']:
+        index.set_filter(text)
+        assert rows(index) == expected_rows(flows, text, 'remote_ip', False)
+
+
+def test_groups_count_filtered_flows():
+    index = FlowIndex()
+    flows = [Flow('tcp', '10.0.0.1', 1000 + i, '192.0.2.1' if i < 3 else '192.0.2.2', 443, 'ESTABLISHED',
+                  1, 'nginx' if i % 2 else 'sshd') for i in range(5)]
+    index.apply({key_of(flow): flow for flow in flows}, [], {})
+    assert index.groups('remote_ip') == [('192.0.2.1', 3), ('192.0.2.2', 2)]
+    index.set_filter('nginx')
+    assert index.groups('remote_ip') == [('192.0.2.1', 1), ('192.0.2.2', 1)]
+
+
+def test_diff_flows():
+    added, removed, changed = diff_flows({'a': 'ESTABLISHED', 'b': 'ESTABLISHED'},
+                                         {'b': 'CLOSE_WAIT', 'c': 'ESTABLISHED'})
+    assert (set(added), set(removed), changed) == ({'c'}, {'a'}, ['b'])
@@ -0,0 +1,125 @@
+import csv
+import ipaddress
+import random
+
+import pytest
+
+from core.geodb import MmdbReader, MmdbWriter, OfflineGeoProvider, compile_prefix_table, encode
+from core.geolocation import GeoLocator
+
+ROWS = [
+    {'network': '0.0.0.0/0', 'country_code': 'ZZ', 'country': 'Anywhere'},
+    {'network': '8.0.0.0/8', 'latitude': '37.75', 'longitude': '-97.82', 'country_code': 'US',
+     'country': 'United States', 'asn': '3356', 'as_org': 'Level 3'},
+    {'network': '8.8.8.0/24', 'latitude': '37.4', 'longitude': '-122.1', 'country_code': 'US',
+     'country': 'United States', 'city': 'Mountain View', 'asn': 'AS15169', 'as_org': 'Google LLC'},
+    {'network': '8.8.8.8/32', 'latitude': '37.42', 'longitude': '-122.08', 'country_code': 'US',
+     'country': 'United States', 'city': 'Googleplex', 'asn': '15169', 'as_org': 'Google LLC'},
+    {'start_ip': '81.2.69.0', 'end_ip': '81.2.69.191', 'latitude': '51.5', 'longitude': '-0.12',
+     'country_code': 'GB', 'country': 'United Kingdom', 'city': 'London'},
+    {'network': '2001:db8::/32', 'latitude': '52.52', 'longitude': '13.40', 'country_code': 'DE',
+     'country': 'Germany', 'city': 'Berlin', 'asn': '64500', 'as_org': 'Example'},
+]
+
+
+def write_table(path, rows):
+    fields = ['network', 'start_ip', 'end_ip', 'latitude', 'longitude', 'country_code', 'country',
+              'city', 'asn', 'as_org']
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.fixture(params=[24, 28, 32])
+def database(tmp_path, request):
+    table = tmp_path / "table.csv"
+    write_table(table, ROWS)
+    path = str(tmp_path / f"geo{request.param}.mmdb")
+    compile_prefix_table([str(table)], path, record_size=request.param)
+    return path
+
+
+def test_longest_prefix_match(database):
+    geo = OfflineGeoProvider([database])
+    assert geo.lookup('8.8.8.8')['city'] == 'Googleplex'
+    assert geo.lookup('8.8.8.9')['city'] == 'Mountain View'
+    assert geo.lookup('8.8.8.9')['as'] == 'AS15169 Google LLC'
+    assert geo.lookup('8.1.2.3')['as'] == 'AS3356 Level 3'
+    assert geo.lookup('8.1.2.3')['lat'] == 37.75
+    assert geo.lookup('9.9.9.9') == {'countryCode': 'ZZ', 'country': 'Anywhere', 'city': '',
+                                     'status': 'success', 'query': '9.9.9.9'}
+    # The address range was split into 81.2.69.0/25 and 81.2.69.128/26
+    assert geo.lookup('81.2.69.191')['city'] == 'London'
+    assert geo.lookup('81.2.69.192')['country'] == 'Anywhere'
+    assert geo.lookup('2001:db8::1')['city'] == 'Berlin'
+    assert geo.lookup('2001:db9::1') is None
+    assert geo.lookup('not an address') is None
+    geo.close()
+
+
+def test_reader_matches_brute_force_on_random_prefixes(tmp_path):
+    rng = random.Random(7)
+    networks = {}
+    while len(networks) < 400:
+        prefix = rng.randrange(8, 33)
+        network = ipaddress.ip_network((rng.getrandbits(32) >> (32 - prefix) << (32 - prefix), prefix))
+        networks[network] = {'n': len(networks)}
+    writer = MmdbWriter(ip_version=4, record_size=24)
+    for network in sorted(networks, key=lambda n: n.prefixlen):
+        writer.insert(network, networks[network])
+    path = str(tmp_path / "random.mmdb")
+    writer.write(path)
+
+    reader = MmdbReader(path)
+    probes = [ipaddress.ip_address(rng.choice(list(networks)).network_address + rng.randrange(256))
+              for _ in range(2000)]
+    for address in probes:
+        containing = [n for n in networks if address in n]
+        expected = networks[max(containing, key=lambda n: n.prefixlen)] if containing else None
+        assert reader.lookup(str(address)) == expected
+    reader.close()
+
+
+def test_decoder_handles_pointers_and_large_sizes(tmp_path):
+    writer = MmdbWriter(ip_version=4, record_size=28)
+    record = {'s': 'x' * 300, 'big': 'y' * 70000, 'list': [1, 2.5, True, {'k': 'v'}], 'n': 1 << 40}
+    writer.insert('10.0.0.0/8', record)
+    # A record whose value is a pointer to the first record's data
+    writer.data += encode('pad')
+    pointer_at = len(writer.data)
+    writer.data += bytes([0x20, 0x00])  # pointer, size 0, target 0
+    writer.nodes[0][0] = ('data', pointer_at)  # 0.0.0.0/1 -> the pointer
+    path = str(tmp_path / "pointers.mmdb")
+    writer.write(path)
+    reader = MmdbReader(path)
+    assert reader.lookup('10.1.2.3') == record
+    assert reader.lookup('20.0.0.1') == record
+    assert reader.lookup('200.0.0.1') is None
+    assert reader.metadata['record_size'] == 28
+    reader.close()
+
+
+def test_offline_hits_skip_the_http_fallback(database, tmp_path):
+    class CountingProvider:
+        def __init__(self):
+            self.asked = []
+
+        def lookup_many(self, ips):
+            self.asked += ips
+            return {ip: {'status': 'success', 'lat': 0.0, 'lon': 0.0} for ip in ips}
+
+        def close(self):
+            pass
+
+    fallback = CountingProvider()
+    geo = GeoLocator(fallback, offline=OfflineGeoProvider([database]),
+                     path=str(tmp_path / "cache.sqlite3"), batch_delay=0.01)
+    assert geo.lookup('8.8.8.8')['city'] == 'Googleplex'
+    # Known only without coordinates offline, and unknown: both go to the fallback
+    assert geo.lookup_many(['9.9.9.9', '2001:db9::1']) == {
+        '9.9.9.9': {'status': 'success', 'lat': 0.0, 'lon': 0.0},
+        '2001:db9::1': {'status': 'success', 'lat': 0.0, 'lon': 0.0},
+    }
+    assert fallback.asked == ['9.9.9.9', '2001:db9::1']
+    geo.close()
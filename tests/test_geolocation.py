@@ -0,0 +1,112 @@
+import json
+import threading
+from concurrent.futures import wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.geolocation import GeoLocator, IpApiProvider
+
+UNLOCATABLE = '192.0.2.1'
+
+
+class BatchHandler(BaseHTTPRequestHandler):
+    """Stand-in for ip-api's /batch endpoint; records every request's addresses."""
+
+    def do_POST(self):
+        queries = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        ips = [query['query'] for query in queries]
+        self.server.requests.append(ips)
+        body = json.dumps([
+            {'status': 'fail', 'message': 'reserved range', 'query': ip} if ip == UNLOCATABLE else
+            {'status': 'success', 'query': ip, 'lat': 1.0, 'lon': float(ip.split('.')[-1]),
+             'country': 'Testland', 'countryCode': 'TL', 'city': 'Testville'}
+            for ip in ips
+        ]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), BatchHandler)
+    httpd.requests = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def locator(server, tmp_path, clock, batch_size=100):
+    url = f"http://127.0.0.1:{server.server_address[1]}/batch"
+    return GeoLocator(IpApiProvider(url, batch_size=batch_size), path=str(tmp_path / "geo.sqlite3"),
+                      ttl=3600, negative_ttl=60, batch_delay=0.02, clock=clock)
+
+
+def test_one_request_per_unique_ip_per_ttl(server, tmp_path):
+    clock = Clock()
+    hops = [f"203.0.113.{n}" for n in range(1, 21)]
+    geo = locator(server, tmp_path, clock)
+    # A trace looks every hop up as it arrives; repeats and re-plots must not refetch
+    futures = [geo.submit(ip) for ip in hops + hops]
+    wait(futures, timeout=5)
+    assert server.requests == [hops]
+    assert geo.lookup_many(hops)['203.0.113.7']['lon'] == 7.0
+    assert len(server.requests) == 1
+    geo.close()
+
+    # A new process reads the SQLite cache instead of the network
+    geo = locator(server, tmp_path, clock)
+    assert geo.lookup(hops[0])['city'] == 'Testville'
+    assert len(server.requests) == 1
+
+    clock.now += 3601
+    assert geo.lookup(hops[0]) is not None
+    assert server.requests[1:] == [[hops[0]]]
+    geo.close()
+
+
+def test_batches_are_split_at_the_endpoint_limit(server, tmp_path):
+    geo = locator(server, tmp_path, Clock(), batch_size=3)
+    ips = [f"198.51.100.{n}" for n in range(1, 8)]
+    results = geo.lookup_many(ips)
+    assert all(results[ip]['lon'] == float(ip.split('.')[-1]) for ip in ips)
+    assert [len(batch) for batch in server.requests] == [3, 3, 1]
+    geo.close()
+
+
+def test_unlocatable_addresses_are_cached_for_the_negative_ttl(server, tmp_path):
+    clock = Clock()
+    geo = locator(server, tmp_path, clock)
+    assert geo.lookup(UNLOCATABLE) is None
+    assert geo.lookup(UNLOCATABLE) is None
+    assert len(server.requests) == 1
+    clock.now += 61
+    geo.lookup(UNLOCATABLE)
+    assert len(server.requests) == 2
+    geo.close()
+
+
+def test_failed_requests_are_not_cached(server, tmp_path):
+    geo = GeoLocator(IpApiProvider("http://127.0.0.1:9/batch", timeout=0.5),
+                     path=str(tmp_path / "geo.sqlite3"), batch_delay=0.01)
+    assert geo.lookup('203.0.113.1') is None
+    assert geo.cache == {}
+    geo.provider = IpApiProvider(f"http://127.0.0.1:{server.server_address[1]}/batch")
+    assert geo.lookup('203.0.113.1')['country'] == 'Testland'
+    geo.close()
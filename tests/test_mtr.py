@@ -0,0 +1,105 @@
+import random
+import socket
+import statistics
+import time
+
+import numpy as np
+import pytest
+
+from core.mtr import HopStats, MtrScheduler
+
+MTR_SCRIPT = """
+import json, time
+from core.mtr import MtrScheduler
+latest = {{}}
+scheduler = MtrScheduler(interval=0.05, timeout=0.2)
+scheduler.start()
+for target in {targets!r}:
+    scheduler.add(target, lambda hops, target=target: latest.__setitem__(target, hops))
+time.sleep({seconds})
+scheduler.stop()
+scheduler.join()
+print(json.dumps(latest))
+"""
+
+
+def test_hop_stats_match_exact_statistics():
+    rng = random.Random(3)
+    rtts = [rng.lognormvariate(3, 0.5) for _ in range(10000)]
+    hop = HopStats()
+    size = hop.histogram.counts.nbytes
+    for rtt in rtts:
+        hop.sent += 1
+        hop.add(rtt)
+    for _ in range(50):
+        hop.sent += 1
+        hop.add_loss()
+    snapshot = hop.snapshot(4)
+    assert snapshot['hop'] == 4
+    assert (snapshot['sent'], snapshot['received']) == (10050, 10000)
+    assert snapshot['loss'] == round(100 * 50 / 10050, 1)
+    assert (snapshot['best'], snapshot['worst']) == (min(rtts), max(rtts))
+    assert hop.mean == pytest.approx(statistics.fmean(rtts))
+    assert hop.stddev == pytest.approx(statistics.stdev(rtts))
+    # Percentiles come from the log-bucketed histogram: within its 2% relative error
+    assert snapshot['p50'] == pytest.approx(np.percentile(rtts, 50), rel=0.025)
+    assert snapshot['p95'] == pytest.approx(np.percentile(rtts, 95), rel=0.025)
+    assert hop.histogram.counts.nbytes == size
+
+
+def test_empty_hop_has_no_figures():
+    snapshot = HopStats().snapshot(1)
+    assert snapshot['ip'] == "Timeout"
+    assert snapshot['loss'] == 0.0
+    assert snapshot['avg'] is None and snapshot['p50'] is None
+
+
+def test_scheduler_probes_many_targets_until_removed():
+    targets = ["127.0.0.1", "127.0.0.2", "127.0.0.3"]
+    if socket.has_ipv6:
+        targets.append("::1")
+    latest = {}
+    scheduler = MtrScheduler(interval=0.02, timeout=0.1)
+    scheduler.start()
+    try:
+        handles = [scheduler.add(target, lambda hops, target=target: latest.__setitem__(target, hops))
+                   for target in targets]
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and not all(
+                target in latest and latest[target][0]['received'] >= 10 for target in targets):
+            time.sleep(0.02)
+        for target in targets:
+            hops = latest[target]
+            assert [(hop['hop'], hop['ip']) for hop in hops] == [(1, target)]
+            assert hops[0]['loss'] == 0.0
+            assert hops[0]['received'] >= 10
+
+        scheduler.remove(handles[0])
+        time.sleep(0.1)
+        sent = latest[targets[0]][0]['sent']
+        time.sleep(0.1)
+        assert latest[targets[0]][0]['sent'] == sent
+        assert latest[targets[1]][0]['sent'] > sent
+    finally:
+        scheduler.stop()
+        scheduler.join(2)
+    assert not scheduler.is_alive()
+
+
+def test_every_hop_of_the_route_is_monitored(namespaces):
+    latest = namespaces(MTR_SCRIPT.format(targets=["10.77.3.2", "fd77:3::2"], seconds=1.0))
+    for target, route in (("10.77.3.2", ["10.77.1.1", "10.77.2.2", "10.77.3.2"]),
+                          ("fd77:3::2", ["fd77:1::1", "fd77:2::2", "fd77:3::2"])):
+        hops = latest[target]
+        assert [hop['ip'] for hop in hops] == route
+        assert all(hop['loss'] == 0.0 and hop['received'] >= 10 for hop in hops)
+
+
+def test_silent_hop_shows_full_loss(namespaces, silent_router):
+    latest = namespaces(MTR_SCRIPT.format(targets=["10.77.3.2", "fd77:3::2"], seconds=1.0))
+    for target in ("10.77.3.2", "fd77:3::2"):
+        hops = latest[target]
+        assert [hop['hop'] for hop in hops] == [1, 2, 3]
+        assert [hop['loss'] for hop in hops] == [0.0, 100.0, 0.0]
+        assert hops[1]['ip'] == "Timeout"
+        assert hops[2]['ip'] == target
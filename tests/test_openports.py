@@ -0,0 +1,121 @@
+import importlib
+import os
+import socket
+
+import pytest
+
+from core.eventlog import PortEventLog, entry_keys, replay_port_log
+from core.socketcollector import Address, Connection, ProcSocketCollector, socket_summary
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    """core.backend with its log files created under a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    import core.backend
+    return importlib.reload(core.backend)
+
+
+def conn(family, sock_type, ip, port, status='NONE', raddr=(), pid=100):
+    return Connection(-1, family, sock_type, Address(ip, port), raddr, status, pid)
+
+
+def test_dual_stack_and_udp_sockets_collapse_per_proto_port_pid(backend, monkeypatch):
+    connections = [
+        conn(socket.AF_INET, socket.SOCK_STREAM, '0.0.0.0', 445, 'LISTEN'),
+        conn(socket.AF_INET6, socket.SOCK_STREAM, '::', 445, 'LISTEN'),
+        conn(socket.AF_INET, socket.SOCK_DGRAM, '0.0.0.0', 5353),
+        conn(socket.AF_INET6, socket.SOCK_DGRAM, '::', 5353),
+        conn(socket.AF_INET, socket.SOCK_DGRAM, '127.0.0.1', 445),
+        # Not listening: an established TCP connection and a connected UDP socket
+        conn(socket.AF_INET, socket.SOCK_STREAM, '10.0.0.2', 50000, 'ESTABLISHED', Address('1.1.1.1', 443)),
+        conn(socket.AF_INET, socket.SOCK_DGRAM, '10.0.0.2', 50001, raddr=Address('8.8.8.8', 53)),
+        # Same port, different process
+        conn(socket.AF_INET6, socket.SOCK_STREAM, '::1', 445, 'LISTEN', pid=200),
+    ]
+    monkeypatch.setattr(backend, 'get_connections', lambda: connections)
+    entries = {(e['proto'], e['port'], e['pid']): e for e in backend.get_open_ports()}
+    assert sorted(entries) == [('tcp', 445, 100), ('tcp', 445, 200), ('udp', 445, 100), ('udp', 5353, 100)]
+    assert entries[('tcp', 445, 100)]['families'] == ['IPv4', 'IPv6']
+    assert entries[('tcp', 445, 100)]['addresses'] == ['0.0.0.0', '::']
+    assert entries[('udp', 5353, 100)]['type'] == 'dgram'
+    assert entries[('tcp', 445, 200)]['families'] == ['IPv6']
+
+
+def test_entry_keys_new_and_legacy_entries():
+    new = [{'port': 53, 'pid': 1, 'proto': 'udp'}, {'port': 53, 'pid': 1, 'proto': 'tcp'}]
+    assert list(entry_keys(new)) == [('udp', 53, 1), ('tcp', 53, 1)]
+    legacy = [{'port': 135, 'pid': 7}, {'port': 135, 'pid': 7}]
+    assert list(entry_keys(legacy)) == [(135, 7, 0), (135, 7, 1)]
+
+
+def test_replay_of_collapsed_entries(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    log = PortEventLog(path)
+    first = [{'port': 53, 'pid': 1, 'proto': 'udp', 'families': ['IPv4']},
+             {'port': 22, 'pid': 2, 'proto': 'tcp', 'families': ['IPv4', 'IPv6']}]
+    second = [{'port': 53, 'pid': 1, 'proto': 'udp', 'families': ['IPv4', 'IPv6']},
+              {'port': 53, 'pid': 1, 'proto': 'tcp', 'families': ['IPv4']}]
+    log.record(first, 1.0)
+    log.record(second, 2.0)
+    log.close()
+    assert replay_port_log(path, 1.5) == first
+    assert replay_port_log(path) == second
+
+
+def test_socket_summary_counts_types_and_remote_addresses(tmp_path):
+    header = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+    rows = {
+        'tcp': ["0100007F:0016 00000000:0000 0A", "0100007F:0016 0A00000A:C350 01",
+                "0100007F:0017 0A00000A:C351 01"],
+        'tcp6': ["00000000000000000000000001000000:0050 000080FE00000000FF00000001000000:1F90 01"],
+        'udp': ["00000000:0035 00000000:0000 07"],
+    }
+    (tmp_path / "net").mkdir()
+    for name, lines in rows.items():
+        body = "".join(f"{i:4d}: {line} 00000000:00000000 00:00000000 00000000     0        0 {100 + i}\n"
+                       for i, line in enumerate(lines))
+        (tmp_path / "net" / name).write_text(header + body)
+    per_type, per_remote = socket_summary(str(tmp_path))
+    assert per_type == {socket.SOCK_STREAM: 4, socket.SOCK_DGRAM: 1}
+    assert per_remote == {'10.0.0.10': 2, 'fe80::ff:0:1': 1}
+
+
+def test_unowned_sockets_do_not_reread_every_fd(tmp_path, monkeypatch):
+    header = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+    fd_dir = tmp_path / "1000" / "fd"
+    fd_dir.mkdir(parents=True)
+    (tmp_path / "1000" / "stat").write_text("1000 (worker) S 1 " + "0 " * 17 + "4242 0 0\n")
+    (tmp_path / "net").mkdir()
+    for fd in range(50):
+        os.symlink("/dev/null", fd_dir / str(fd))
+    os.symlink("socket:[500]", fd_dir / "50")
+
+    def scan(inodes):
+        rows = "".join(f"{i:4d}: 0100007F:{i + 1000:04X} 00000000:0000 0A 00000000:00000000 "
+                       f"00:00000000 00000000     0        0 {inode}\n" for i, inode in enumerate(inodes))
+        (tmp_path / "net" / "tcp").write_text(header + rows)
+        return {c.laddr.port - 1000: c.pid for c in collector.connections()}
+
+    readlinks = []
+    real_readlink = os.readlink
+    monkeypatch.setattr(os, 'readlink', lambda path: readlinks.append(path) or real_readlink(path))
+    collector = ProcSocketCollector(str(tmp_path), full_reread_interval=3600)
+    assert scan([500, 900]) == {0: 1000, 1: None}  # 900 belongs to no readable process
+    readlinks.clear()
+    assert scan([500, 900, 901]) == {0: 1000, 1: None, 2: None}
+    assert scan([500, 900, 901, 902]) == {0: 1000, 1: None, 2: None, 3: None}
+    assert readlinks == []
+
+    # fd 7 reused for a socket without the fd set changing: found by the next full re-read
+    os.remove(fd_dir / "7")
+    os.symlink("socket:[700]", fd_dir / "7")
+    assert scan([500, 700])[1] is None
+    collector.next_full_reread = 0
+    assert scan([500, 700])[1] == 1000
+
+    # fd 8 reused while another fd opened: found at once
+    os.remove(fd_dir / "8")
+    os.symlink("socket:[800]", fd_dir / "8")
+    os.symlink("/dev/null", fd_dir / "60")
+    assert scan([500, 700, 800])[2] == 1000
@@ -0,0 +1,177 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from core.portscanner import (
+    PortScanner, RttEstimator, ScanResult, parse_ports, parse_targets, sharded_scan,
+    OPEN, CLOSED, OPEN_FILTERED,
+)
+
+HOSTS = ['127.0.0.11', '127.0.0.12', '127.0.0.13']
+
+
+@pytest.fixture
+def tcp_listeners():
+    """Two listening ports on each of HOSTS; returns the port numbers."""
+    listeners = []
+    ports = []
+    for _ in range(2):
+        first = socket.socket()
+        first.bind((HOSTS[0], 0))
+        first.listen()
+        listeners.append(first)
+        ports.append(first.getsockname()[1])
+        for ip in HOSTS[1:]:
+            listener = socket.socket()
+            listener.bind((ip, ports[-1]))
+            listener.listen()
+            listeners.append(listener)
+    yield ports
+    for listener in listeners:
+        listener.close()
+
+
+@pytest.fixture
+def udp_sockets():
+    """An echoing UDP socket and a silent one on 127.0.0.21; returns (echo port, silent port)."""
+    echo = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    echo.bind(('127.0.0.21', 0))
+    echo.settimeout(0.1)
+    silent = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    silent.bind(('127.0.0.21', 0))
+    stop = threading.Event()
+
+    def serve():
+        while not stop.is_set():
+            try:
+                data, peer = echo.recvfrom(512)
+            except socket.timeout:
+                continue
+            echo.sendto(data or b'pong', peer)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield echo.getsockname()[1], silent.getsockname()[1]
+    stop.set()
+    thread.join()
+    echo.close()
+    silent.close()
+
+
+def scan(scanner, targets, ports, **kwargs):
+    results = []
+    progress = []
+    done = asyncio.run(scanner.scan(targets, ports, results.append,
+                                    on_progress=lambda d, t: progress.append((d, t)), **kwargs))
+    return done, results, progress
+
+
+def test_parse_ports_and_targets():
+    assert parse_ports("22, 80,8000-8002,80") == [22, 80, 8000, 8001, 8002]
+    with pytest.raises(ValueError):
+        parse_ports("0-10")
+    assert parse_targets("127.0.0.1, 127.0.1.0/30 127.0.0.1") == ['127.0.0.1', '127.0.1.1', '127.0.1.2']
+    assert len(parse_targets("10.0.0.0/16")) == 65534
+    with pytest.raises(ValueError):
+        parse_targets("::/0")  # refused without expanding
+    with pytest.raises(ValueError):
+        parse_targets("127.0.0.0/30, 10.0.0.0/16")
+    with pytest.raises(ValueError):
+        parse_targets("127.0.0.1 127.0.0.2 127.0.0.3", max_targets=2)
+
+
+def test_tcp_scan_finds_open_ports(tcp_listeners):
+    scanner = PortScanner(concurrency=64, timeout=0.5)
+    ports = sorted(tcp_listeners + [1, 2, 3])
+    done, results, progress = scan(scanner, HOSTS + ['127.0.0.14'], ports)
+    assert done == 4 * len(ports)
+    assert progress[-1] == (done, done)
+    assert sorted((r.host, r.port) for r in results) == sorted(
+        (host, port) for host in HOSTS for port in tcp_listeners)
+    assert all(r.state == OPEN and r.proto == 'tcp' for r in results)
+
+
+def test_closed_ports_are_reported_on_request(tcp_listeners):
+    scanner = PortScanner(concurrency=8, timeout=0.5)
+    _, results, _ = scan(scanner, [HOSTS[0]], [1, tcp_listeners[0]], report=(OPEN, CLOSED))
+    assert {r.port: r.state for r in results} == {1: CLOSED, tcp_listeners[0]: OPEN}
+    # Answered probes feed the host's RTT estimate, which shortens its timeout
+    assert scanner.estimator(HOSTS[0]).timeout() < 0.5
+
+
+def test_udp_states_and_retries(udp_sockets):
+    echo_port, silent_port = udp_sockets
+    scanner = PortScanner(concurrency=8, timeout=0.1, max_timeout=0.2, retries=2)
+    _, results, _ = scan(scanner, ['127.0.0.21'], [9, echo_port, silent_port],
+                         protocols=('udp',), report=(OPEN, CLOSED, OPEN_FILTERED))
+    assert {r.port: r.state for r in results} == {
+        9: CLOSED, echo_port: OPEN, silent_port: OPEN_FILTERED}
+
+
+def test_global_and_per_host_caps_are_respected():
+    scanner = PortScanner(concurrency=12, per_host=3)
+    in_flight = {}
+    peak = {'total': 0}
+
+    async def probe(host, port, proto):
+        in_flight[host] = in_flight.get(host, 0) + 1
+        total = sum(in_flight.values())
+        peak['total'] = max(peak['total'], total)
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.001)
+        in_flight[host] -= 1
+        return ScanResult(host, port, proto, CLOSED, 1.0)
+
+    scanner.probe = probe
+    hosts = [f"127.0.2.{i}" for i in range(1, 9)]
+    done = asyncio.run(scanner.scan(hosts, range(1, 51), lambda result: None, report=()))
+    assert done == 400
+    assert peak['total'] <= 12
+    assert max(peak[host] for host in hosts) <= 3
+
+
+def test_scan_can_be_cancelled():
+    scanner = PortScanner(concurrency=16, timeout=0.5)
+    done, results, _ = scan(scanner, ['127.0.0.1'], range(1, 1000), should_stop=lambda: True)
+    assert done == 0 and results == []
+
+
+def test_rtt_estimator_backs_off_and_clamps():
+    estimator = RttEstimator(initial=1.0, minimum=0.05, maximum=3.0)
+    assert estimator.timeout() == 1.0
+    for _ in range(20):
+        estimator.update(0.001)
+    assert estimator.timeout() == 0.05
+    assert estimator.timeout(attempt=2) == 0.2
+    estimator.update(10.0)
+    assert estimator.timeout() == 3.0
+
+
+def test_sustains_thousands_of_probes_per_second():
+    scanner = PortScanner(concurrency=512, timeout=0.5)
+    start = time.perf_counter()
+    done, _, _ = scan(scanner, ['127.0.0.31', '127.0.0.32'], range(1, 5001))
+    assert done == 10000
+    assert done / (time.perf_counter() - start) > 2000
+
+
+def test_sharded_scan_matches_single_process(tcp_listeners):
+    ports = list(range(1, 200)) + tcp_listeners
+    results = []
+    progress = []
+    done = sharded_scan(HOSTS, ports, results.append, processes=3, concurrency=96, timeout=0.5,
+                        on_progress=lambda d, t: progress.append((d, t)))
+    assert done == len(HOSTS) * len(ports)
+    assert progress[-1] == (done, done)
+    assert sorted((r.host, r.port, r.state) for r in results) == sorted(
+        (host, port, OPEN) for host in HOSTS for port in tcp_listeners)
+
+
+def test_sharded_scan_can_be_cancelled():
+    results = []
+    done = sharded_scan(['127.0.0.1'], range(1, 65536), results.append, processes=2,
+                        should_stop=lambda: True)
+    assert done < 65535
@@ -0,0 +1,107 @@
+import threading
+import time
+import types
+
+import core.resolver
+from core.resolver import ReverseResolver
+
+
+def wait_until_stored(resolver):
+    """Wait for done-callbacks to cache finished lookups; wait() returns before they run."""
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        with resolver.lock:
+            if not resolver.in_flight:
+                return
+        time.sleep(0.001)
+
+
+def test_cancelled_lookup_is_retried():
+    release = threading.Event()
+    calls = []
+
+    def resolve(ip):
+        calls.append(ip)
+        release.wait(5)
+        return f"host-{ip}"
+
+    resolver = ReverseResolver(workers=1, resolve=resolve)
+    blocker = resolver.submit("10.0.0.1")  # occupies the only worker
+    queued = resolver.submit("10.0.0.2")
+    assert queued.cancel()
+    assert "10.0.0.2" not in resolver.in_flight
+    assert resolver.lookup_many(["10.0.0.2"], timeout=0) == {"10.0.0.2": None}
+    release.set()
+    blocker.result(5)
+    assert resolver.lookup("10.0.0.2") == "host-10.0.0.2"
+    assert calls == ["10.0.0.1", "10.0.0.2"]
+
+
+def test_answers_and_failures_are_cached_for_their_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(core.resolver, 'time', types.SimpleNamespace(monotonic=lambda: clock[0]))
+    calls = []
+
+    def resolve(ip):
+        calls.append(ip)
+        if ip == "10.0.0.3":
+            raise OSError("resolver failure")
+        return "known.example" if ip == "10.0.0.1" else None
+
+    resolver = ReverseResolver(workers=2, positive_ttl=100, negative_ttl=10, resolve=resolve)
+    ips = ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    expected = {"10.0.0.1": "known.example", "10.0.0.2": None, "10.0.0.3": None}
+    assert resolver.lookup_many(ips, timeout=5) == expected
+    wait_until_stored(resolver)
+    assert sorted(calls) == ips
+
+    clock[0] += 9
+    assert resolver.lookup_many(ips, timeout=5) == expected
+    wait_until_stored(resolver)
+    assert len(calls) == 3  # all cached, failures included
+
+    clock[0] += 2  # past the negative TTL only
+    assert resolver.lookup_many(ips, timeout=5) == expected
+    wait_until_stored(resolver)
+    assert sorted(calls[3:]) == ["10.0.0.2", "10.0.0.3"]
+
+    clock[0] += 90  # past the positive TTL
+    assert resolver.lookup("10.0.0.1", timeout=5) == "known.example"
+    wait_until_stored(resolver)
+    assert calls[5:] == ["10.0.0.1"]
+
+
+def test_concurrent_requests_share_one_lookup():
+    release = threading.Event()
+    calls = []
+
+    def resolve(ip):
+        calls.append(ip)
+        release.wait(5)
+        return "shared.example"
+
+    resolver = ReverseResolver(workers=4, resolve=resolve)
+    futures = [resolver.submit("10.0.0.1") for _ in range(3)]
+    assert all(future is futures[0] for future in futures)
+    # Still running: callers get None now instead of waiting
+    assert resolver.lookup_many(["10.0.0.1", "10.0.0.1"], timeout=0) == {"10.0.0.1": None}
+    release.set()
+    assert futures[0].result(5) == "shared.example"
+    assert resolver.lookup("10.0.0.1") == "shared.example"
+    wait_until_stored(resolver)
+    assert calls == ["10.0.0.1"]
+    assert not resolver.in_flight
+
+
+def test_slow_lookups_cost_one_timeout_in_total():
+    def resolve(ip):
+        time.sleep(1.0 if ip.endswith(".9") else 0.05)
+        return f"host-{ip}"
+
+    resolver = ReverseResolver(workers=32, resolve=resolve)
+    ips = [f"10.0.0.{i}" for i in range(1, 33)]
+    start = time.monotonic()
+    results = resolver.lookup_many(ips, timeout=0.3)
+    assert time.monotonic() - start < 0.6
+    assert results["10.0.0.9"] is None
+    assert all(results[ip] == f"host-{ip}" for ip in ips if ip != "10.0.0.9")
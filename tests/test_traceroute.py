@@ -0,0 +1,67 @@
+import socket
+import time
+
+import pytest
+
+from core.traceroute import ParallelTracer
+
+TRACE_SCRIPT = """
+import json, time
+from core.traceroute import ParallelTracer
+arrived = []
+start = time.perf_counter()
+hops = ParallelTracer(timeout={timeout}).trace({target!r}, on_hop=arrived.append)
+print(json.dumps({{'hops': hops, 'arrived': arrived, 'elapsed': time.perf_counter() - start}}))
+"""
+
+
+def trace(namespaces, target, timeout=1.0):
+    return namespaces(TRACE_SCRIPT.format(target=target, timeout=timeout))
+
+
+def test_loopback_is_one_hop():
+    arrived = []
+    start = time.perf_counter()
+    hops = ParallelTracer(timeout=1.0).trace("127.0.0.1", on_hop=arrived.append)
+    assert time.perf_counter() - start < 0.5
+    assert [(hop['hop'], hop['ip']) for hop in hops] == [(1, "127.0.0.1")]
+    assert arrived == hops
+
+
+def test_loopback_ipv6():
+    if not socket.has_ipv6:
+        pytest.skip("no IPv6")
+    try:
+        hops = ParallelTracer(timeout=1.0).trace("::1")
+    except OSError as e:
+        pytest.skip(f"IPv6 loopback unavailable: {e}")
+    assert [(hop['hop'], hop['ip']) for hop in hops] == [(1, "::1")]
+
+
+@pytest.mark.parametrize("target, route", [
+    ("10.77.3.2", ["10.77.1.1", "10.77.2.2", "10.77.3.2"]),
+    ("fd77:3::2", ["fd77:1::1", "fd77:2::2", "fd77:3::2"]),
+])
+def test_route_through_namespaces(namespaces, target, route):
+    result = trace(namespaces, target)
+    assert [hop['ip'] for hop in result['hops']] == route
+    assert all(hop['time_ms'] > 0 for hop in result['hops'])
+    # Every hop answered, so the trace did not wait for the timeout
+    assert result['elapsed'] < 0.5
+    assert sorted(hop['hop'] for hop in result['arrived']) == [1, 2, 3]
+
+
+def test_silent_hop_costs_one_timeout_for_the_whole_trace(namespaces, silent_router):
+    for target, first in (("10.77.3.2", "10.77.1.1"), ("fd77:3::2", "fd77:1::1")):
+        result = trace(namespaces, target, timeout=0.5)
+        assert [hop['ip'] for hop in result['hops']] == [first, "Timeout", target]
+        assert 0.5 <= result['elapsed'] < 1.0
+        # The answered hops arrive first; the silent one is reported at the end
+        assert [hop['hop'] for hop in result['arrived']][-2:] == [2, 3]
+
+
+def test_unreachable_network_ends_the_route(namespaces):
+    # r1 has no route to 10.77.9.0/24 and answers "network unreachable"
+    result = trace(namespaces, "10.77.9.9", timeout=0.5)
+    assert [hop['ip'] for hop in result['hops']] == ["10.77.1.1"]
+    assert result['elapsed'] < 0.5
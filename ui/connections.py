@@ -0,0 +1,220 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, QTimer, pyqtSignal
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QTableView, QHeaderView
+)
+import psutil
+
+from core.backend import get_connections
+from core.flows import Flow, FlowIndex, diff_flows, flow_key
+from core.processcache import ProcessCache
+
+FLOW_COLUMNS = ["Protocol", "Local Address", "Remote Address", "Status", "PID", "Process"]
+SORT_FIELDS = ['proto', 'local_ip', 'remote_ip', 'status', 'pid', 'process']
+GROUPINGS = [("No grouping", None), ("Group by remote host", 'remote_ip'), ("Group by process", 'process')]
+
+
+def endpoint(ip, port):
+    return f"[{ip}]:{port}" if ':' in ip else f"{ip}:{port}"
+
+
+class FlowCollector(QThread):
+    """Reads the connection table off the GUI thread and emits only what changed.
+
+    The collector remembers the status of every flow it reported, so each
+    refresh sends the flows that opened, closed or changed state, and Flow
+    records (with their process names) are built for those alone.
+    """
+    diff_ready = pyqtSignal(dict, list, dict)  # (added, removed keys, changed)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.statuses = {}  # flow key -> status at the last refresh
+        self.process_cache = ProcessCache()
+
+    def run(self):
+        connections = {}
+        for conn in get_connections():
+            if conn.raddr and conn.status != psutil.CONN_LISTEN:
+                connections[flow_key(conn)] = conn
+        statuses = {key: conn.status for key, conn in connections.items()}
+        added, removed, changed = diff_flows(self.statuses, statuses)
+        self.statuses = statuses
+        if not (added or removed or changed):
+            return
+        self.process_cache.refresh()
+        self.diff_ready.emit(
+            {key: self.make_flow(key, connections[key]) for key in added},
+            list(removed),
+            {key: self.make_flow(key, connections[key]) for key in changed},
+        )
+
+    def make_flow(self, key, conn):
+        process = self.process_cache.get(conn.pid)
+        return Flow(key[0], conn.laddr.ip, conn.laddr.port, conn.raddr.ip, conn.raddr.port,
+                    conn.status, conn.pid, process['name'] if process else "N/A")
+
+
+class FlowTableModel(QAbstractTableModel):
+    """Virtual table over a FlowIndex.
+
+    Nothing is copied into the model: rowCount() is the number of visible
+    flows and data() formats a cell only when the view asks for it, which
+    it does for the rows on screen. In grouped mode the rows are the group
+    values with their flow counts instead.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index_ = FlowIndex()
+        self.group_field = None
+        self.group_rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.group_rows) if self.group_field else len(self.index_.visible)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return 2 if self.group_field else len(FLOW_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            if self.group_field:
+                return ["Remote Host" if self.group_field == 'remote_ip' else "Process", "Connections"][section]
+            return FLOW_COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        if self.group_field:
+            return self.group_rows[index.row()][index.column()]
+        flow = self.index_.flow_at(index.row())
+        column = index.column()
+        if column == 0:
+            return flow.proto.upper()
+        if column == 1:
+            return endpoint(flow.local_ip, flow.local_port)
+        if column == 2:
+            return endpoint(flow.remote_ip, flow.remote_port)
+        if column == 3:
+            return flow.status
+        if column == 4:
+            return "" if flow.pid is None else flow.pid
+        return flow.process
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if self.group_field:
+            return
+        self.layoutAboutToBeChanged.emit()
+        self.index_.set_sort(SORT_FIELDS[column], order == Qt.DescendingOrder)
+        self.layoutChanged.emit()
+
+    def _update(self, change):
+        """Run `change` on the index, keeping selected flows selected."""
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        keys = [] if self.group_field else [
+            self.index_.key_at(p.row()) if p.row() < len(self.index_.visible) else None for p in persistent]
+        change()
+        if self.group_field:
+            self.group_rows = self.index_.groups(self.group_field)
+            self.changePersistentIndexList(persistent, [QModelIndex()] * len(persistent))
+        else:
+            moved = []
+            for p, key in zip(persistent, keys):
+                row = self.index_.row_of(key) if key is not None else -1
+                moved.append(self.index(row, p.column()) if row >= 0 else QModelIndex())
+            self.changePersistentIndexList(persistent, moved)
+        self.layoutChanged.emit()
+
+    def apply_diff(self, added, removed, changed):
+        self._update(lambda: self.index_.apply(added, removed, changed))
+
+    def set_filter(self, text):
+        self._update(lambda: self.index_.set_filter(text))
+
+    def set_grouping(self, field):
+        self.beginResetModel()
+        self.group_field = field
+        self.group_rows = self.index_.groups(field) if field else []
+        self.endResetModel()
+
+    def group_value(self, row):
+        return self.group_rows[row][0] if self.group_field and 0 <= row < len(self.group_rows) else None
+
+
+class ConnectionsPage(QWidget):
+    """Live view of established connections, refreshed every `interval` ms while visible."""
+
+    def __init__(self, interval=3000, parent=None):
+        super().__init__(parent)
+        self.model = FlowTableModel(self)
+        self.collector = FlowCollector(self)
+        self.collector.diff_ready.connect(self.on_diff)
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter by remote address, remote port, process or state")
+        self.filter_input.textChanged.connect(self.model.set_filter)
+        self.filter_input.textChanged.connect(self.update_status)
+        self.grouping = QComboBox()
+        for label, _ in GROUPINGS:
+            self.grouping.addItem(label)
+        self.grouping.currentIndexChanged.connect(self.on_grouping_changed)
+        self.status_label = QLabel()
+        controls.addWidget(self.filter_input, 1)
+        controls.addWidget(self.grouping)
+        controls.addWidget(self.status_label)
+        layout.addLayout(controls)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(2, Qt.AscendingOrder)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Fixed row heights: the view never has to measure rows it does not show
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.doubleClicked.connect(self.on_double_click)
+        layout.addWidget(self.table)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(interval)
+
+    def refresh(self):
+        if self.isVisible() and not self.collector.isRunning():
+            self.collector.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def on_diff(self, added, removed, changed):
+        self.model.apply_diff(added, removed, changed)
+        self.update_status()
+
+    def on_grouping_changed(self, i):
+        self.model.set_grouping(GROUPINGS[i][1])
+        self.table.setSortingEnabled(GROUPINGS[i][1] is None)
+        self.update_status()
+
+    def on_double_click(self, index):
+        """Double-clicking a group shows that group's connections."""
+        value = self.model.group_value(index.row())
+        if value is not None:
+            self.grouping.setCurrentIndex(0)
+            self.filter_input.setText(value)
+
+    def update_status(self):
+        index = self.model.index_
+        self.status_label.setText(f"{len(index.visible)} of {len(index)} connections")
+
+    def shutdown(self):
+        """Stop refreshing and wait for a running collection."""
+        self.timer.stop()
+        self.collector.wait()
@@ -1,8 +1,40 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QHeaderView,
+    QPushButton, QProgressBar
 )
-from PyQt5.QtCore import Qt
-from core.backend import get_network_devices
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QBrush, QColor
+import time
+from core.backend import scan_network_devices
+
+DEVICE_COLUMNS = ["Device Name", "IP Address", "MAC Address", "Network Adapter Company"]
+DEVICE_FIELDS = ['hostname', 'ip', 'mac', 'manufacturer']
+
+
+class DeviceDiscoveryThread(QThread):
+    """Sweeps the local networks off the GUI thread, emitting each device as it answers.
+
+    Progress is reported at most every `progress_interval` seconds so large
+    sweeps do not flood the GUI thread. requestInterruption() cancels the
+    sweep; probes already in flight finish within one probe timeout.
+    """
+    device_found = pyqtSignal(dict)
+    progress = pyqtSignal(int, int)  # (hosts probed, hosts total)
+
+    def __init__(self, progress_interval=0.1, parent=None):
+        super().__init__(parent)
+        self.progress_interval = progress_interval
+        self.last_progress = 0
+
+    def run(self):
+        scan_network_devices(self.device_found.emit, self.on_progress, self.isInterruptionRequested)
+
+    def on_progress(self, done, total):
+        now = time.monotonic()
+        if done == total or now - self.last_progress >= self.progress_interval:
+            self.last_progress = now
+            self.progress.emit(done, total)
+
 
 class DeviceScanner(QWidget):
     def __init__(self, dark_mode=False):
@@ -10,6 +42,10 @@ class DeviceScanner(QWidget):
         self.setWindowTitle("Connected Devices")
         self.setMinimumSize(600, 400)
         self.dark_mode = dark_mode
+        self.discovery = None
+        self.row_of_ip = {}   # ip -> table row, so re-scans update rows in place
+        self.seen = set()     # ips that answered during the current scan
+        self.cancelled = False  # QThread forgets interruption requests once it stops
         
         # Main layout
         layout = QVBoxLayout(self)
@@ -18,12 +54,24 @@ class DeviceScanner(QWidget):
         header = QLabel("<h2>Connected Network Devices (IPv4 Only)</h2>")
         layout.addWidget(header)
         
+        # Scan controls
+        controls = QHBoxLayout()
+        self.rescan_button = QPushButton("Rescan")
+        self.rescan_button.clicked.connect(self.scan_devices)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_scan)
+        self.progress_bar = QProgressBar()
+        self.status_label = QLabel()
+        controls.addWidget(self.rescan_button)
+        controls.addWidget(self.cancel_button)
+        controls.addWidget(self.progress_bar, 1)
+        controls.addWidget(self.status_label)
+        layout.addLayout(controls)
+        
         # Device table
         self.device_table = QTableWidget()
-        self.device_table.setColumnCount(4)
-        self.device_table.setHorizontalHeaderLabels([
-            "Device Name", "IP Address", "MAC Address", "Network Adapter Company"
-        ])
+        self.device_table.setColumnCount(len(DEVICE_COLUMNS))
+        self.device_table.setHorizontalHeaderLabels(DEVICE_COLUMNS)
         self.device_table.horizontalHeader().setSectionResizeMode(
             QHeaderView.ResizeMode.Stretch
         )
@@ -32,32 +80,86 @@ class DeviceScanner(QWidget):
         # Apply theme
         self.apply_theme()
         
-        # Initial scan
+        # Initial scan, in the background
         self.scan_devices()
     
     def scan_devices(self):
-        """Scan the network for connected IPv4 devices and populate the table."""
-        devices = get_network_devices()
-        # Filter out any entries whose IP contains ':' (i.e. IPv6)
-        ipv4_devices = [
-            d for d in devices
-            if 'ip' in d and isinstance(d['ip'], str) and ':' not in d['ip']
-        ]
-        
-        self.device_table.setRowCount(len(ipv4_devices))
-        
-        for row, device in enumerate(ipv4_devices):
+        """Start a background sweep; results are merged into the rows already shown."""
+        if self.discovery and self.discovery.isRunning():
+            return
+        self.seen = set()
+        self.cancelled = False
+        self.progress_bar.setRange(0, 0)  # busy until the first progress report
+        self.status_label.setText("Scanning...")
+        self.rescan_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.discovery = DeviceDiscoveryThread(parent=self)
+        self.discovery.device_found.connect(self.add_device)
+        self.discovery.progress.connect(self.on_progress)
+        self.discovery.finished.connect(self.on_scan_finished)
+        self.discovery.start()
+
+    def cancel_scan(self):
+        """Stop the running sweep; devices found so far stay in the table."""
+        if self.discovery and self.discovery.isRunning():
+            self.discovery.requestInterruption()
+            self.cancelled = True
+            self.cancel_button.setEnabled(False)
+            self.status_label.setText("Cancelling...")
+
+    def on_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def on_scan_finished(self):
+        self.rescan_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.progress_bar.setRange(0, 1)
+        self.progress_bar.setValue(1)
+        if self.cancelled:
+            self.status_label.setText(f"Cancelled, {len(self.seen)} found")
+            return
+        # A complete scan that missed a device greys it out instead of dropping it
+        for ip, row in self.row_of_ip.items():
+            self.set_row_stale(row, ip not in self.seen)
+        self.status_label.setText(f"{len(self.seen)} devices")
+
+    def add_device(self, device):
+        """Add one discovered IPv4 device, or update its row if it is already listed."""
+        ip = device.get('ip', 'Unknown')
+        if ':' in ip:
+            return
+        self.seen.add(ip)
+        row = self.row_of_ip.get(ip)
+        if row is None:
+            row = self.device_table.rowCount()
+            self.device_table.insertRow(row)
+            self.row_of_ip[ip] = row
+        for column, field in enumerate(DEVICE_FIELDS):
             # Safely get each field, defaulting to 'Unknown' if missing
-            name = device.get('name', 'Unknown')
-            ip   = device.get('ip', 'Unknown')
-            mac  = device.get('mac', 'Unknown')
-            mfr  = device.get('manufacturer', 'Unknown')
-            
-            self.device_table.setItem(row, 0, QTableWidgetItem(name))
-            self.device_table.setItem(row, 1, QTableWidgetItem(ip))
-            self.device_table.setItem(row, 2, QTableWidgetItem(mac))
-            self.device_table.setItem(row, 3, QTableWidgetItem(mfr))
-    
+            value = device.get(field) or 'Unknown'
+            item = self.device_table.item(row, column)
+            if item is None:
+                self.device_table.setItem(row, column, QTableWidgetItem(value))
+            elif value != 'Unknown' and item.text() != value:
+                # Never overwrite something learned earlier with 'Unknown'
+                item.setText(value)
+        self.set_row_stale(row, False)
+
+    def set_row_stale(self, row, stale):
+        for column in range(len(DEVICE_COLUMNS)):
+            item = self.device_table.item(row, column)
+            if item is not None:
+                item.setForeground(QBrush(QColor(128, 128, 128)) if stale else QBrush())
+                item.setToolTip("Not seen in the last scan" if stale else "")
+
+    def closeEvent(self, event):
+        """Stop the sweep before the window goes away."""
+        if self.discovery and self.discovery.isRunning():
+            self.discovery.requestInterruption()
+            self.discovery.wait()
+        super().closeEvent(event)
+
     def set_dark_mode(self, enabled):
         """Enable or disable dark mode theme."""
         self.dark_mode = enabled
@@ -1,23 +1,15 @@
-from PyQt5.QtCore import Qt, QTimer, QSize, pyqtSignal
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QTableWidget, QTableWidgetItem, QVBoxLayout,
+    QApplication, QMainWindow, QTableView, QVBoxLayout,
     QWidget, QPushButton, QHeaderView, QHBoxLayout, QLabel,
-    QTextEdit, QGridLayout, QStackedWidget, QMenuBar, QLineEdit, QListWidget,
-    QFrame
+    QTextEdit, QGridLayout, QStackedWidget, QFrame
 )
-from PyQt5.QtGui import QColor, QBrush, QFont, QPalette
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import matplotlib.pyplot as plt
-import logging
 import sys
 import threading
 import time
-import psutil
-from datetime import datetime
 
-from core.backend import get_open_ports, get_process_info, toggle_port_state, get_local_ip
-from core.backend import get_public_ip_info, get_public_ipv6, get_network_devices
+from core.backend import toggle_port_state, log_port_table
+from core.backend import get_public_ip_info, get_public_ipv6
 from core.dataanalysis import DataAnalysis
 from core.reports import ReportGenerator
 from ui.networkscanner import NetworkScannerWidget
@@ -29,9 +21,12 @@ from ui.settings import setup_settings_page
 from ui.info import setup_info_page, update_info_theme
 from ui.help import setup_help_page
 from ui.devicescanner import DeviceScanner
+from ui.portstable import PortCollector, PortTableModel
+from ui.livechart import LiveChartCanvas
+from ui.connections import ConnectionsPage
 
 pages_order = [
-    "🏠 Home", "📊 Data Analysis", "📑 Reports", "🔍 Network Scanner",
+    "🏠 Home", "🔗 Connections", "📊 Data Analysis", "📑 Reports", "🔍 Network Scanner",
     "🔒 Port Blocker", "🌐 Trace Visualizer", "⚙ Settings", " ℹ Information", "❓ Help"
 ]
 
@@ -42,10 +37,12 @@ class NetworkMonitor(QMainWindow):
         self.setGeometry(100, 100, 1280, 720)
         self.dark_mode = False
         self.data_analysis = DataAnalysis()
-        self.report_generator = ReportGenerator()
+        self.report_generator = ReportGenerator(self.data_analysis)
         self.public_ip_info = {'ip': 'Loading...', 'region': 'Loading...', 'country': 'Loading...', 'org': 'Loading...', 'city': 'Loading...'}
         self.public_ipv6 = 'Loading...'
         self.device_scanner_window = None
+        self.port_collector = None
+        self.ports_refresh_pending = False  # a refresh was requested while a collection ran
 
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -63,7 +60,7 @@ class NetworkMonitor(QMainWindow):
         self.pages = {}
 
         for page_name in [
-            "Home", "Data Analysis", "Reports", "Network Scanner",
+            "Home", "Connections", "Data Analysis", "Reports", "Network Scanner",
             "Port Blocker", "Trace Visualizer", "Settings", "Information", "Help"
         ]:
             page = QWidget()
@@ -73,6 +70,7 @@ class NetworkMonitor(QMainWindow):
             self.pages[page_name] = page
 
         self.setup_home_page()
+        self.setup_connections_page()
         self.setup_data_analysis_page()
         self.setup_reports_page()
         self.setup_network_scanner_page()
@@ -164,10 +162,13 @@ class NetworkMonitor(QMainWindow):
 
         # Port Monitoring Table
         home_layout.addWidget(QLabel("<h2>Port Monitoring</h2>"))
-        self.ports_table = QTableWidget()
-        self.ports_table.setColumnCount(6)
-        self.ports_table.setHorizontalHeaderLabels(["Port", "PID", "Protocol", "Process Name", "CPU Usage", "Status"])
+        self.ports_model = PortTableModel(self.dark_mode, self)
+        self.ports_table = QTableView()
+        self.ports_table.setModel(self.ports_model)
+        self.ports_table.setSelectionBehavior(QTableView.SelectRows)
         self.ports_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Fixed row heights keep scrolling cheap with thousands of rows
+        self.ports_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         home_layout.addWidget(self.ports_table)
 
         # Buttons
@@ -199,7 +200,7 @@ class NetworkMonitor(QMainWindow):
         button_grid = QGridLayout()
         
         self.bandwidth_btn = QPushButton("Bandwidth Usage")
-        self.bandwidth_btn.clicked.connect(lambda: self.show_graph(self.data_analysis.generate_bandwidth_usage()))
+        self.bandwidth_btn.clicked.connect(lambda: self.show_graph(self.data_analysis.generate_bandwidth_usage(self.graph_canvas.width())))
         button_grid.addWidget(self.bandwidth_btn, 0, 0)
         
         self.talkers_btn = QPushButton("Top Talkers")
@@ -211,7 +212,7 @@ class NetworkMonitor(QMainWindow):
         button_grid.addWidget(self.protocol_btn, 1, 0)
         
         self.packet_loss_btn = QPushButton("Packet Loss")
-        self.packet_loss_btn.clicked.connect(lambda: self.show_graph(self.data_analysis.generate_packet_loss()))
+        self.packet_loss_btn.clicked.connect(lambda: self.show_graph(self.data_analysis.generate_packet_loss(self.graph_canvas.width())))
         button_grid.addWidget(self.packet_loss_btn, 1, 1)
         
         self.latency_btn = QPushButton("Connection Latency")
@@ -221,13 +222,18 @@ class NetworkMonitor(QMainWindow):
         # Add the button grid to the main layout
         data_layout.addLayout(button_grid, 1, 0, 1, 2)  # Add at row 1, span 1 row and 2 columns
         
-        # Canvas for displaying graphs
-        self.graph_canvas = FigureCanvas(Figure())
+        # Canvas for displaying graphs; time-series charts keep updating live
+        self.graph_canvas = LiveChartCanvas()
         self.graph_canvas.setMinimumSize(800, 500)
         data_layout.addWidget(self.graph_canvas, 2, 0, 1, 2)  # Add at row 2, span 1 row and 2 columns
         
         # Initialize with bandwidth usage graph
-        self.show_graph(self.data_analysis.generate_bandwidth_usage())
+        self.show_graph(self.data_analysis.generate_bandwidth_usage(self.graph_canvas.width()))
+
+    def setup_connections_page(self):
+        """Sets up the Connections page with the live table of established connections."""
+        self.connections_page = ConnectionsPage()
+        self.pages["Connections"].layout().addWidget(self.connections_page)
 
     def setup_network_scanner_page(self):
         """Sets up the Network Scanner page."""
@@ -235,6 +241,12 @@ class NetworkMonitor(QMainWindow):
         self.network_scanner = NetworkScannerWidget()
         scanner_layout.addWidget(self.network_scanner)
 
+    def closeEvent(self, event):
+        """Stop background scans and collections before the window goes away."""
+        self.network_scanner.port_scanner.shutdown()
+        self.connections_page.shutdown()
+        super().closeEvent(event)
+
     def setup_reports_page(self):
         """Sets up the Reports page with various report options."""
         reports_layout = self.pages["Reports"].layout()
@@ -329,6 +341,7 @@ class NetworkMonitor(QMainWindow):
     def setup_trace_visualizer_page(self):
         layout = self.pages["Trace Visualizer"].layout()
         self.trace_widget = TraceVisualizer()
+        self.trace_widget.latency_measured.connect(self.data_analysis.record_latency)
         layout.addWidget(self.trace_widget)
     
     def setup_other_pages(self):
@@ -398,7 +411,7 @@ class NetworkMonitor(QMainWindow):
                     background-color: #16a085;
                 }
 
-                QTableWidget {
+                QTableView {
                     background-color: #34495e;
                     color: white;
                     gridline-color: #3a3f44;
@@ -487,7 +500,7 @@ class NetworkMonitor(QMainWindow):
                     background-color: #2980b9;
                 }
 
-                QTableWidget {
+                QTableView {
                     background-color: white;
                     color: black;
                     gridline-color: #bdc3c7;
@@ -557,6 +570,9 @@ class NetworkMonitor(QMainWindow):
             for btn in self.sidebar_container.buttons:
                 btn.setStyleSheet(button_style(dark))
                 
+        # Recolor the port rows for the new theme
+        self.ports_model.set_dark_mode(dark)
+
         # Update the Information page with the current theme
         if "Information" in self.pages:
             update_info_theme(self.pages["Information"], self.dark_mode)
@@ -583,56 +599,46 @@ class NetworkMonitor(QMainWindow):
         self.update_ports_table()
 
     def update_ports_table(self):
-        """Update the ports table with the latest open ports and their states."""
-        open_ports = get_open_ports()
-        self.ports_table.setRowCount(len(open_ports))
-        for row, port_info in enumerate(open_ports):
-            self.ports_table.setItem(row, 0, QTableWidgetItem(str(port_info['port'])))
-            self.ports_table.setItem(row, 1, QTableWidgetItem(str(port_info['pid'])))
-            self.ports_table.setItem(row, 2, QTableWidgetItem("TCP"))  # Protocol (placeholder)
-            self.ports_table.setItem(row, 3, QTableWidgetItem(port_info['process_name']))
-            details = get_process_info(port_info['pid'])
-            if details:
-                self.ports_table.setItem(row, 4, QTableWidgetItem(f"{details['cpu_percent']}%"))
-            else:
-                self.ports_table.setItem(row, 4, QTableWidgetItem("N/A"))
-            status_item = QTableWidgetItem("Enabled" if port_info['enabled'] else "Disabled")
-            self.ports_table.setItem(row, 5, status_item)
-            self.color_row(row, port_info['enabled'])
-        
-        # Log the details of open ports
-        logging.info(f"Port table refreshed. Open ports: {open_ports}")
+        """Start a background refresh of the ports table."""
+        # Never run two collections at once; refresh again once the current one ends
+        if self.port_collector and self.port_collector.isRunning():
+            self.ports_refresh_pending = True
+            return
+        self.ports_refresh_pending = False
+        self.port_collector = PortCollector()
+        self.port_collector.snapshot_ready.connect(self.on_ports_snapshot)
+        self.port_collector.finished.connect(self.on_port_collector_finished)
+        self.port_collector.start()
+
+    def on_port_collector_finished(self):
+        """Run a refresh that was requested while the last collection was in flight."""
+        if self.ports_refresh_pending:
+            self.update_ports_table()
+
+    def on_ports_snapshot(self, rows, open_ports):
+        """Apply a collected snapshot to the ports table."""
+        self.ports_model.apply_snapshot(rows)
+        
+        # Log only what changed since the last refresh
+        log_port_table(open_ports)
 
     def toggle_selected_port(self):
         """Toggle the state of the selected port."""
-        selected_row = self.ports_table.currentRow()
-        if selected_row >= 0:
-            port = int(self.ports_table.item(selected_row, 0).text())
-            toggle_port_state(port)
-            self.update_ports_table()  # Refresh the table to reflect the new state
+        port = self.ports_model.port_at(self.ports_table.currentIndex().row())
+        if port is not None:
+            enabled = toggle_port_state(port)
+            # Show the new state immediately, then refresh; a collection that was
+            # already running may have read the old state, so it gets a follow-up
+            self.ports_model.set_port_enabled(port, enabled)
+            self.update_ports_table()
     
     def menu_action(self, action_name):
         """Handles menu actions."""
         print(f"Menu option selected: {action_name}")
 
-    def color_row(self, row, enabled):
-        """Color the row based on the port's state."""
-        if self.dark_mode:
-            color = QColor(50, 100, 50) if enabled else QColor(100, 50, 50)
-        else:
-            color = QColor(200, 255, 200) if enabled else QColor(255, 200, 200)
-        
-        for col in range(self.ports_table.columnCount()):
-            item = self.ports_table.item(row, col)
-            if item:
-                item.setBackground(color)
-                text_color = Qt.white if self.dark_mode else Qt.black  # Changed this line
-                item.setForeground(QBrush(text_color))
-
     def show_graph(self, fig):
         """Display the selected graph."""
-        self.graph_canvas.figure = fig
-        self.graph_canvas.draw()
+        self.graph_canvas.show_figure(fig)
 
     def display_report(self, report_html):
         """Display the generated report in the text edit."""
@@ -0,0 +1,63 @@
+from PyQt5.QtCore import QTimer
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+
+class LiveChartCanvas(FigureCanvas):
+    """Figure canvas that streams new samples into the shown chart.
+
+    Figures from DataAnalysis that carry `series_lines` are updated in place
+    once per frame: the static parts (axes, ticks, grid) are rendered once and
+    cached, and each frame only the line artists are redrawn and blitted over
+    that background. A full redraw happens only when the time window slides
+    or the data leaves the current y-range, so the per-frame cost depends on
+    the canvas width rather than on how much history is shown.
+    """
+
+    def __init__(self, frame_ms=1000, parent=None):
+        super().__init__(Figure())
+        if parent is not None:
+            self.setParent(parent)
+        self.background = None
+        self.mpl_connect('draw_event', self.on_draw)
+        self.frame_timer = QTimer(self)
+        self.frame_timer.timeout.connect(self.update_frame)
+        self.frame_timer.start(frame_ms)
+
+    def series_lines(self):
+        return getattr(self.figure, 'series_lines', [])
+
+    def show_figure(self, fig):
+        """Replace the displayed figure, marking streaming artists as animated."""
+        fig.set_canvas(self)
+        self.figure = fig
+        for series in self.series_lines():
+            for artist in series.artists():
+                artist.set_animated(True)
+        self.background = None
+        self.draw()
+
+    def on_draw(self, event):
+        """Cache the static background after a full draw, then paint the live artists."""
+        self.background = self.copy_from_bbox(self.figure.bbox)
+        self.draw_live_artists()
+
+    def draw_live_artists(self):
+        for series in self.series_lines():
+            for artist in series.artists():
+                series.ax.draw_artist(artist)
+
+    def update_frame(self):
+        """Pull new samples into every streaming series and repaint as little as possible."""
+        lines = self.series_lines()
+        if not lines or not self.isVisible():
+            return
+        needs_full_draw = False
+        for series in lines:
+            needs_full_draw |= series.follow()
+        if needs_full_draw or self.background is None:
+            self.draw_idle()
+            return
+        self.restore_region(self.background)
+        self.draw_live_artists()
+        self.blit(self.figure.bbox)
@@ -1,8 +1,6 @@
-import subprocess
 import socket
 import ipaddress
 import threading
-import re
 from PyQt5.QtWidgets import (
     QWidget, QPushButton, QVBoxLayout, QTableWidget, QTableWidgetItem,
     QTabWidget, QLabel, QSizePolicy
@@ -11,6 +9,10 @@ from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import networkx as nx
+from core.resolver import reverse_resolver
+from core.neighbors import neighbor_table
+from core.oui import vendor_for
+from ui.portscanner import PortScannerWidget
 
 class NetworkScannerThread(QThread):
     result_signal = pyqtSignal(list)
@@ -29,7 +31,7 @@ class GraphCanvas(FigureCanvas):
 
     def plot_topology(self, data):
         G = nx.Graph()
-        for ip, mac, host in data:
+        for ip, mac, host, vendor in data:
             label = f"{host}\n{ip}"
             G.add_node(label)
         for i in range(1, len(G.nodes)):
@@ -50,6 +52,8 @@ class NetworkScannerWidget(QWidget):
 
         self.tabs.addTab(self.list_widget, "List View")
         self.tabs.addTab(self.graph_label, "Graph View")
+        self.port_scanner = PortScannerWidget()
+        self.tabs.addTab(self.port_scanner, "Port Scan")
 
         self.scan_button = QPushButton("Scan Network")
         self.scan_button.clicked.connect(self.start_scan)
@@ -67,15 +71,16 @@ class NetworkScannerWidget(QWidget):
 
     def display_results(self, data):
         self.list_widget.setRowCount(len(data))
-        self.list_widget.setColumnCount(3)
-        self.list_widget.setHorizontalHeaderLabels(["IP Address", "MAC Address", "Hostname"])
-        for row, (ip, mac, host) in enumerate(data):
+        self.list_widget.setColumnCount(4)
+        self.list_widget.setHorizontalHeaderLabels(["IP Address", "MAC Address", "Hostname", "Vendor"])
+        for row, (ip, mac, host, vendor) in enumerate(data):
             self.list_widget.setItem(row, 0, QTableWidgetItem(ip))
             self.list_widget.setItem(row, 1, QTableWidgetItem(mac))
             self.list_widget.setItem(row, 2, QTableWidgetItem(host))
+            self.list_widget.setItem(row, 3, QTableWidgetItem(vendor))
         self.graph_canvas = GraphCanvas(data)
         self.tabs.removeTab(1)
-        self.tabs.addTab(self.graph_canvas, "Graph View")
+        self.tabs.insertTab(1, self.graph_canvas, "Graph View")
         self.scan_button.setEnabled(True)
 
 def get_local_ip_and_subnet():
@@ -84,15 +89,7 @@ def get_local_ip_and_subnet():
     return local_ip
 
 def get_arp_table():
-    arp_output = subprocess.check_output("arp -a", shell=True).decode()
-    arp_entries = []
-    for line in arp_output.splitlines():
-        match = re.search(r"(\d+\.\d+\.\d+\.\d+)\s+([a-fA-F0-9\-]+)", line)
-        if match:
-            ip, mac = match.groups()
-            try:
-                hostname = socket.gethostbyaddr(ip)[0]
-            except socket.herror:
-                hostname = "Unknown"
-            arp_entries.append((ip, mac, hostname))
-    return arp_entries
\ No newline at end of file
+    neighbors = neighbor_table()
+    hostnames = reverse_resolver.lookup_many([neighbor.ip for neighbor in neighbors])
+    return [(neighbor.ip, neighbor.mac, hostnames[neighbor.ip] or "Unknown", vendor_for(neighbor.mac))
+            for neighbor in neighbors]
\ No newline at end of file
@@ -0,0 +1,188 @@
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QCheckBox, QPushButton,
+    QProgressBar, QTableWidget, QTableWidgetItem, QHeaderView, QSpinBox
+)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+import logging
+import os
+import time
+from core.portscanner import sharded_scan, parse_ports, parse_targets, OPEN, OPEN_FILTERED
+
+SCAN_COLUMNS = ["Host", "Port", "Protocol", "State", "RTT (ms)", "Service"]
+
+
+class PortScanWorker(QThread):
+    """Runs a PortScanner off the GUI thread, emitting results in batches.
+
+    With `processes` > 1 the scan is sharded across that many processes
+    (see core.portscanner.sharded_scan). Results and progress are flushed at
+    most every `flush_interval` seconds, so a fast scan costs the GUI thread
+    a few table updates per second rather than one signal per probe.
+    """
+    results_ready = pyqtSignal(list)
+    progress = pyqtSignal(int, int)  # (probes done, probes total)
+    failed = pyqtSignal(str)
+
+    def __init__(self, targets, ports, protocols, report=(OPEN,), processes=1, identify=False,
+                 flush_interval=0.1, parent=None):
+        super().__init__(parent)
+        self.targets = targets
+        self.ports = ports
+        self.protocols = protocols
+        self.report = report
+        self.processes = processes
+        self.identify = identify
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.last_flush = 0
+
+    def run(self):
+        try:
+            targets = parse_targets(self.targets)
+            ports = parse_ports(self.ports)
+        except ValueError as e:
+            self.failed.emit(str(e))
+            return
+        try:
+            sharded_scan(targets, ports, self.pending.append, self.protocols, self.report, self.processes,
+                         self.isInterruptionRequested, self.on_progress, identify=self.identify)
+        except OSError as e:
+            logging.error(f"Port scan failed: {e}")
+            self.failed.emit(str(e))
+        self.flush()
+
+    def on_progress(self, done, total):
+        now = time.monotonic()
+        if done == total or now - self.last_flush >= self.flush_interval:
+            self.last_flush = now
+            self.flush()
+            self.progress.emit(done, total)
+
+    def flush(self):
+        if self.pending:
+            batch, self.pending = self.pending, []
+            self.results_ready.emit(batch)
+
+
+class PortScannerWidget(QWidget):
+    """Scan remote hosts for open TCP/UDP ports, listing results as they arrive."""
+
+    def __init__(self):
+        super().__init__()
+        self.worker = None
+        self.cancelled = False  # QThread forgets interruption requests once it stops
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        inputs = QHBoxLayout()
+        self.targets_input = QLineEdit()
+        self.targets_input.setPlaceholderText("Hosts or networks, e.g. 192.168.1.0/24, router.local")
+        self.ports_input = QLineEdit("1-1024")
+        self.ports_input.setPlaceholderText("Ports, e.g. 22,80,8000-8100")
+        self.tcp_check = QCheckBox("TCP")
+        self.tcp_check.setChecked(True)
+        self.udp_check = QCheckBox("UDP")
+        self.identify_check = QCheckBox("Identify services")
+        self.identify_check.setToolTip("Grab a banner from every open TCP port and match it against known services")
+        inputs.addWidget(QLabel("Targets:"))
+        inputs.addWidget(self.targets_input, 2)
+        inputs.addWidget(QLabel("Ports:"))
+        inputs.addWidget(self.ports_input, 1)
+        inputs.addWidget(self.tcp_check)
+        inputs.addWidget(self.udp_check)
+        inputs.addWidget(self.identify_check)
+        self.processes_input = QSpinBox()
+        self.processes_input.setRange(1, os.cpu_count() or 1)
+        self.processes_input.setToolTip("Processes to shard large scans across (one event loop each)")
+        inputs.addWidget(QLabel("Processes:"))
+        inputs.addWidget(self.processes_input)
+        layout.addLayout(inputs)
+
+        controls = QHBoxLayout()
+        self.start_button = QPushButton("Start Scan")
+        self.start_button.clicked.connect(self.start_scan)
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_scan)
+        self.progress_bar = QProgressBar()
+        self.status_label = QLabel()
+        controls.addWidget(self.start_button)
+        controls.addWidget(self.stop_button)
+        controls.addWidget(self.progress_bar, 1)
+        controls.addWidget(self.status_label)
+        layout.addLayout(controls)
+
+        self.results_table = QTableWidget(0, len(SCAN_COLUMNS))
+        self.results_table.setHorizontalHeaderLabels(SCAN_COLUMNS)
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.results_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.results_table)
+
+    def start_scan(self):
+        if self.worker and self.worker.isRunning():
+            return
+        protocols = tuple(proto for proto, check in (('tcp', self.tcp_check), ('udp', self.udp_check))
+                          if check.isChecked())
+        if not self.targets_input.text().strip() or not protocols:
+            self.status_label.setText("Enter targets and pick TCP and/or UDP")
+            return
+        self.results_table.setSortingEnabled(False)
+        self.results_table.setRowCount(0)
+        self.cancelled = False
+        self.progress_bar.setRange(0, 0)  # busy until the first progress report
+        self.status_label.setText("Scanning...")
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        # UDP silence is ambiguous, so those ports are listed as open|filtered too
+        report = (OPEN, OPEN_FILTERED) if 'udp' in protocols else (OPEN,)
+        self.worker = PortScanWorker(self.targets_input.text(), self.ports_input.text(), protocols,
+                                     report, self.processes_input.value(), self.identify_check.isChecked(),
+                                     parent=self)
+        self.worker.results_ready.connect(self.add_results)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.failed.connect(self.status_label.setText)
+        self.worker.finished.connect(self.on_scan_finished)
+        self.worker.start()
+
+    def stop_scan(self):
+        if self.worker and self.worker.isRunning():
+            self.worker.requestInterruption()
+            self.cancelled = True
+            self.stop_button.setEnabled(False)
+            self.status_label.setText("Stopping...")
+
+    def on_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def add_results(self, results):
+        table = self.results_table
+        row = table.rowCount()
+        table.setRowCount(row + len(results))
+        for result in results:
+            rtt = f"{result.rtt_ms:.1f}" if result.rtt_ms is not None else ""
+            values = (result.host, result.port, result.proto.upper(), result.state, rtt, result.service or "")
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, value)
+                table.setItem(row, column, item)
+            row += 1
+
+    def on_scan_finished(self):
+        self.start_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        self.results_table.setSortingEnabled(True)
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 1)
+        if self.cancelled:
+            self.status_label.setText(f"Stopped, {self.results_table.rowCount()} found")
+        elif self.status_label.text() == "Scanning...":
+            self.status_label.setText(f"{self.results_table.rowCount()} found")
+
+    def shutdown(self):
+        """Stop a running scan and wait for it, e.g. before the window closes."""
+        if self.worker and self.worker.isRunning():
+            self.worker.requestInterruption()
+            self.worker.wait()
@@ -0,0 +1,152 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QThread, pyqtSignal
+from PyQt5.QtGui import QColor, QBrush
+
+from core.backend import get_open_ports, get_process_info
+from core.fingerprint import service_for_port
+
+PORT_COLUMNS = ["Port", "PID", "Protocol", "Family", "Local Address", "Process Name", "CPU Usage", "Status"]
+
+
+def protocol_label(port_info):
+    """Transport plus the registered service for the port, e.g. "TCP/ssh"."""
+    proto = port_info.get('proto', 'tcp')
+    service = service_for_port(port_info['port'], proto)
+    return f"{proto.upper()}/{service}" if service else proto.upper()
+
+
+class PortCollector(QThread):
+    """Collects one snapshot of the port table off the GUI thread."""
+    snapshot_ready = pyqtSignal(list, list)  # (rows, raw open_ports)
+
+    def run(self):
+        open_ports = get_open_ports()
+        cpu_by_pid = {}
+        rows = []
+        for port_info in open_ports:
+            pid = port_info['pid']
+            if pid not in cpu_by_pid:
+                details = get_process_info(pid)
+                cpu_by_pid[pid] = f"{details['cpu_percent']}%" if details else "N/A"
+            # get_open_ports already collapsed IPv4/IPv6 twins into one entry
+            rows.append({
+                'key': (port_info['proto'], port_info['port'], pid),
+                'port': port_info['port'],
+                'enabled': port_info['enabled'],
+                'cells': (
+                    str(port_info['port']),
+                    str(pid),
+                    protocol_label(port_info),
+                    "+".join(port_info['families']),
+                    ", ".join(port_info['addresses']),
+                    port_info['process_name'],
+                    cpu_by_pid[pid],
+                    "Enabled" if port_info['enabled'] else "Disabled",
+                ),
+            })
+        self.snapshot_ready.emit(rows, open_ports)
+
+
+class PortTableModel(QAbstractTableModel):
+    """Port table model that applies snapshots as row/cell diffs.
+
+    Only removed rows, inserted rows and cells whose text actually changed are
+    reported to the view, so a refresh of a mostly unchanged table costs the
+    GUI thread almost nothing regardless of row count.
+    """
+
+    def __init__(self, dark_mode=False, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.row_of = {}  # row key -> index in self.rows
+        self.dark_mode = dark_mode
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(PORT_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return PORT_COLUMNS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return row['cells'][index.column()]
+        if role == Qt.BackgroundRole:
+            if self.dark_mode:
+                return QBrush(QColor(50, 100, 50) if row['enabled'] else QColor(100, 50, 50))
+            return QBrush(QColor(200, 255, 200) if row['enabled'] else QColor(255, 200, 200))
+        if role == Qt.ForegroundRole:
+            return QBrush(Qt.white if self.dark_mode else Qt.black)
+        return None
+
+    def port_at(self, row):
+        """Return the port number shown in the given row, or None."""
+        if 0 <= row < len(self.rows):
+            return self.rows[row]['port']
+        return None
+
+    def set_port_enabled(self, port, enabled):
+        """Show a new enabled state for every row of `port` right away, ahead of the next snapshot."""
+        status = "Enabled" if enabled else "Disabled"
+        for i, row in enumerate(self.rows):
+            if row['port'] == port and row['enabled'] != enabled:
+                self.rows[i] = dict(row, enabled=enabled, cells=row['cells'][:-1] + (status,))
+                self.dataChanged.emit(self.index(i, 0), self.index(i, len(PORT_COLUMNS) - 1))
+
+    def set_dark_mode(self, enabled):
+        """Switch row colors without touching the row data."""
+        self.dark_mode = enabled
+        if self.rows:
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(len(self.rows) - 1, len(PORT_COLUMNS) - 1),
+                [Qt.BackgroundRole, Qt.ForegroundRole]
+            )
+
+    def apply_snapshot(self, new_rows):
+        """Diff a snapshot against the current rows and emit minimal updates."""
+        new_keys = {row['key'] for row in new_rows}
+
+        # Removals, bottom-up so indices stay valid, grouped into contiguous runs
+        removed = [i for i, row in enumerate(self.rows) if row['key'] not in new_keys]
+        if removed:
+            while removed:
+                end = removed.pop()
+                start = end
+                while removed and removed[-1] == start - 1:
+                    start = removed.pop()
+                self.beginRemoveRows(QModelIndex(), start, end)
+                del self.rows[start:end + 1]
+                self.endRemoveRows()
+            self.row_of = {row['key']: i for i, row in enumerate(self.rows)}
+
+        # Changed cells on surviving rows
+        added = []
+        for new in new_rows:
+            i = self.row_of.get(new['key'])
+            if i is None:
+                added.append(new)
+                continue
+            old = self.rows[i]
+            if old['cells'] == new['cells'] and old['enabled'] == new['enabled']:
+                continue
+            changed = [c for c, (a, b) in enumerate(zip(old['cells'], new['cells'])) if a != b]
+            self.rows[i] = new
+            if old['enabled'] != new['enabled']:
+                # Row color depends on the state, so repaint the whole row
+                changed = [0, len(PORT_COLUMNS) - 1]
+            self.dataChanged.emit(self.index(i, min(changed)), self.index(i, max(changed)))
+
+        # Insertions appended as a single block
+        if added:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(added) - 1)
+            for offset, row in enumerate(added):
+                self.rows.append(row)
+                self.row_of[row['key']] = first + offset
+            self.endInsertRows()
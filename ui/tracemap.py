@@ -0,0 +1,192 @@
+import html
+import json
+import os
+import time
+
+import folium
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtCore import QUrl, pyqtSignal
+
+TITLE_HTML = '''
+    <div id="trace-title" style="position: fixed; top: 10px; left: 50px; width: 300px;
+               background-color: white; padding: 10px; z-index: 9999;
+               border: 2px solid #3186cc; border-radius: 5px; display: none;">
+        <h4 id="trace-heading" style="margin: 0;"></h4>
+        <p id="trace-detail" style="margin: 5px 0 0 0;"></p>
+    </div>
+'''
+
+# `traceMap` is the page's whole API. The folium map variable is looked up
+# lazily, so it does not matter where folium renders this script.
+MAP_SCRIPT = '''
+window.traceMap = (function () {
+    var state = null;
+
+    function init() {
+        if (!state) {
+            var map = window["%(map)s"];
+            state = {
+                map: map,
+                hops: {},
+                layers: L.layerGroup().addTo(map),
+                line: L.polyline([], {color: "blue", weight: 2.5, opacity: 0.8, dashArray: "5"}).addTo(map)
+            };
+        }
+        return state;
+    }
+
+    function redrawLine(s) {
+        var numbers = Object.keys(s.hops).map(Number).sort(function (a, b) { return a - b; });
+        var points = numbers.map(function (n) { return s.hops[n].point; });
+        s.line.setLatLngs(points);
+        if (points.length > 1) {
+            s.map.fitBounds(s.line.getBounds(), {padding: [50, 50]});
+        } else if (points.length == 1) {
+            s.map.setView(points[0], Math.max(s.map.getZoom(), 3));
+        }
+    }
+
+    return {
+        setTitle: function (heading, detail) {
+            document.getElementById("trace-heading").textContent = heading;
+            document.getElementById("trace-detail").textContent = detail;
+            document.getElementById("trace-title").style.display = heading ? "block" : "none";
+            return true;
+        },
+        clear: function () {
+            var s = init();
+            s.layers.clearLayers();
+            s.hops = {};
+            s.line.setLatLngs([]);
+            s.map.setView([20, 0], 2);
+            return true;
+        },
+        addHop: function (hop) {
+            var s = init();
+            var old = s.hops[hop.hop];
+            if (old) {
+                old.markers.forEach(function (m) { s.layers.removeLayer(m); });
+            }
+            var point = [hop.lat, hop.lon];
+            var markers = [
+                L.marker(point, {icon: L.divIcon({html: hop.icon, iconSize: [30, 30], className: ""})})
+                    .bindPopup(hop.popup, {maxWidth: 300}),
+                L.marker(point, {icon: L.icon({iconUrl: hop.flag, iconSize: [20, 15]})})
+                    .bindPopup(hop.country)
+            ];
+            markers.forEach(function (m) { s.layers.addLayer(m); });
+            s.hops[hop.hop] = {point: point, markers: markers};
+            // Hops can be located in any order; the route is always drawn in hop order
+            redrawLine(s);
+            return hop.hop;
+        }
+    };
+})();
+'''
+
+ICON_HTML = '''
+<div style="background-color: #3186cc; color: white; border-radius: 50%;
+     width: 25px; height: 25px; line-height: 25px; text-align: center;
+     font-weight: bold; font-size: 14px; border: 2px solid white;">
+    {hop}
+</div>
+'''
+
+POPUP_HTML = '''
+<div style="font-family: Arial, sans-serif;">
+    <div style="font-size: 16px; font-weight: bold; text-align: center; margin-bottom: 8px;">
+        Hop #{hop}
+    </div>
+    <div>
+        <b>IP:</b> {ip}<br>
+        <b>Host:</b> {host}<br>
+        <b>Location:</b> {city}, {country}<br>
+        <b>Response time:</b> {time_ms} ms<br>
+        <img src="{flag}" width="40">
+    </div>
+</div>
+'''
+
+
+def map_page():
+    """HTML of the empty world map with the traceMap script, rendered in memory."""
+    m = folium.Map(location=[20, 0], zoom_start=2)
+    m.get_root().html.add_child(folium.Element(TITLE_HTML))
+    m.get_root().script.add_child(folium.Element(MAP_SCRIPT % {'map': m.get_name()}))
+    return m.get_root().render()
+
+
+def hop_marker(hop_data, location):
+    """Arguments for traceMap.addHop from a hop and its geolocation response."""
+    country = location.get('countryCode', '')
+    flag_url = f"https://flagcdn.com/w40/{country.lower()}.png"
+    hop = hop_data['hop']
+    popup = POPUP_HTML.format(
+        hop=hop, ip=html.escape(hop_data['ip']), host=html.escape(hop_data['host']),
+        city=html.escape(location.get('city', '')), country=html.escape(country),
+        time_ms=hop_data['time_ms'], flag=flag_url,
+    )
+    return {
+        'hop': hop,
+        'lat': location['lat'],
+        'lon': location['lon'],
+        'icon': ICON_HTML.format(hop=hop),
+        'popup': popup,
+        'flag': flag_url,
+        'country': html.escape(f"Country: {location.get('country', '')}"),
+    }
+
+
+class TraceMap(QWebEngineView):
+    """World map that is loaded once; traces are drawn into it with runJavaScript.
+
+    Calls made before the page has loaded are queued and run in order once
+    it has. Nothing is written to disk.
+    """
+    hop_drawn = pyqtSignal(int, float)  # hop number, ms from the call until the page had drawn it
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loaded = False
+        self.pending = []
+        self.loadFinished.connect(self.on_load_finished)
+        # Same base URL the saved map files had, so the page loads its scripts the same way
+        base = QUrl.fromLocalFile(os.path.dirname(os.path.abspath(__file__)) + os.sep)
+        self.setHtml(map_page(), base)
+
+    def on_load_finished(self, ok):
+        self.loaded = True
+        pending, self.pending = self.pending, []
+        for script, callback in pending:
+            self.run(script, callback)
+
+    def run(self, script, callback=None):
+        """Run `script` in the page; `callback(result, ms)` gets its result and round trip."""
+        if not self.loaded:
+            self.pending.append((script, callback))
+        elif callback is None:
+            self.page().runJavaScript(script)
+        else:
+            # Timed from when the script is handed to the page, not from when it was queued
+            started = time.perf_counter()
+            self.page().runJavaScript(
+                script, lambda result: callback(result, (time.perf_counter() - started) * 1000))
+
+    def call(self, function, *args, callback=None):
+        self.run(f"traceMap.{function}({', '.join(json.dumps(arg) for arg in args)})", callback)
+
+    def set_title(self, heading, detail=""):
+        self.call('setTitle', heading, detail)
+
+    def clear(self):
+        self.call('clear')
+
+    def add_hop(self, hop_data, location):
+        """Place (or move) the marker of one hop and redraw the route through it."""
+        marker = hop_marker(hop_data, location)
+
+        def drawn(result, ms):
+            if result is not None:  # None: the script failed, e.g. Leaflet could not load
+                self.hop_drawn.emit(marker['hop'], ms)
+
+        self.call('addHop', marker, callback=drawn)
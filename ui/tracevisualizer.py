@@ -1,21 +1,29 @@
+import logging
 import socket
 import subprocess
-import requests
-import folium
-import os
 import platform
-import time
 import re
+import threading
+from concurrent.futures import wait
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
     QLineEdit, QLabel, QMessageBox, QTableWidget,
     QTableWidgetItem, QHeaderView, QSplitter, QGroupBox,
-    QGridLayout, QFrame
+    QGridLayout, QFrame, QCheckBox
 )
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtCore import QUrl, Qt, QThread, pyqtSignal, QSize
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QColor
 
+from core.geolocation import geo_locator
+from core.mtr import MtrScheduler
+from core.resolver import hostname_from, reverse_resolver
+from core.traceroute import ParallelTracer
+from ui.tracemap import TraceMap
+
+TRACE_COLUMNS = ["Hop", "Host", "IP", "Time (ms)", "Country"]
+MONITOR_COLUMNS = ["Hop", "Host", "IP", "Loss %", "Sent", "Last", "Avg", "Best", "Worst", "StDev",
+                   "P50", "P95", "Country"]
+
 
 class TraceWorker(QThread):
     result_ready = pyqtSignal(list)
@@ -33,7 +41,60 @@ class TraceWorker(QThread):
     def stop(self):
         self.running = False
 
+    def run_parallel(self):
+        """Trace with the built-in engine: all TTLs at once, hops emitted as they answer.
+
+        Each hop is emitted once its reverse lookup finishes, so hop_ready
+        carries the host name as before; lookups still running when the
+        trace ends get at most one resolver timeout more.
+        """
+        lock = threading.Lock()
+        emitted = set()
+        lookups = []
+
+        def host_of(future):
+            return hostname_from(future) or "Unknown"
+
+        def emit(hop_data, host):
+            with lock:
+                if hop_data['hop'] in emitted:
+                    return
+                emitted.add(hop_data['hop'])
+            self.hop_ready.emit(dict(hop_data, host=host))
+
+        def on_hop(hop_data):
+            if hop_data['ip'] == "Timeout":
+                emit(hop_data, "Timeout")
+                return
+            future = reverse_resolver.submit(hop_data['ip'])
+            future.add_done_callback(lambda f, hop_data=hop_data: emit(hop_data, host_of(f)))
+            lookups.append((hop_data, future))
+
+        self.progress.emit(f"Starting trace to {self.target}...")
+        hops = ParallelTracer(max_hops=20, timeout=1.0).trace(
+            self.target, on_hop=on_hop, should_stop=lambda: not self.running)
+        wait([future for _, future in lookups], timeout=reverse_resolver.timeout)
+        # wait() can return before a done callback runs; whichever comes first emits the hop
+        hosts = {}
+        for hop_data, future in lookups:
+            hosts[hop_data['hop']] = host_of(future)
+            emit(hop_data, hosts[hop_data['hop']])
+        self.hops = [dict(hop_data, host=hosts.get(hop_data['hop'], "Timeout")) for hop_data in hops]
+
     def run(self):
+        if platform.system() == "Linux":
+            try:
+                self.run_parallel()
+                self.progress.emit("Trace completed!")
+                self.finished_trace.emit()
+                self.result_ready.emit(self.hops)
+                return
+            except socket.gaierror as e:
+                self.error.emit(f"Error during trace: {str(e)}")
+                return
+            except OSError as e:
+                # No IP_RECVERR (or sockets restricted): the traceroute tool may still work
+                logging.error(f"Built-in trace unavailable, using traceroute: {e}")
         try:
             # Resolve domain to IP
             self.progress.emit("Resolving domain...")
@@ -107,10 +168,7 @@ class TraceWorker(QThread):
                             if host_match and host_match.group(1) != ip:
                                 host = host_match.group(1)
                             else:
-                                try:
-                                    host = socket.gethostbyaddr(ip)[0]
-                                except (socket.herror, socket.gaierror):
-                                    pass
+                                host = reverse_resolver.lookup(ip) or host
                         
                         hop_data = {
                             'hop': hop_num,
@@ -156,39 +214,24 @@ class TraceWorker(QThread):
             traceback.print_exc()
 
 
-class LocationLookupThread(QThread):
-    """Thread for looking up location data for IP addresses"""
-    result_ready = pyqtSignal(int, dict, str, str, str)
-    
-    def __init__(self, row_idx, hop_data):
-        super().__init__()
-        self.row_idx = row_idx
-        self.hop_data = hop_data
-        
-    def run(self):
-        try:
-            ip = self.hop_data['ip']
-            response = requests.get(f"http://ip-api.com/json/{ip}").json()
-            
-            if response['status'] == 'success':
-                country = response['countryCode']
-                country_name = response['country']
-                city = response['city']
-                
-                self.result_ready.emit(self.row_idx, response, country, country_name, city)
-            else:
-                self.result_ready.emit(self.row_idx, {}, "Unknown", "Unknown", "Unknown")
-                
-        except Exception as e:
-            print(f"Error looking up location for hop {self.hop_data['hop']}: {str(e)}")
-            self.result_ready.emit(self.row_idx, {}, "Error", "Error", "Error")
-
-
 class TraceVisualizer(QWidget):
+    latency_measured = pyqtSignal(float)  # round-trip time of each answered hop, in ms
+    # (trace number, table row, location or {}); emitted from the geolocation worker thread
+    location_ready = pyqtSignal(int, int, dict)
+    # (trace number, table row, IP, host name); emitted from a resolver thread
+    host_ready = pyqtSignal(int, int, str, str)
+    # (trace number, hop snapshots); emitted from the continuous-mode scheduler thread
+    monitor_updated = pyqtSignal(int, list)
+
     def __init__(self):
         super().__init__()
         self.init_ui()
-        self.lookup_threads = []  # Store references to prevent premature garbage collection
+        self.trace_id = 0  # lookups finishing after a new trace started are dropped
+        self.scheduler = None  # started on the first continuous trace
+        self.monitored = None  # target being probed continuously
+        self.location_ready.connect(self.on_location_lookup_complete)
+        self.host_ready.connect(self.on_host_lookup_complete)
+        self.monitor_updated.connect(self.on_monitor_update)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -252,6 +295,14 @@ class TraceVisualizer(QWidget):
         self.trace_btn = QPushButton("Trace Route")
         self.trace_btn.clicked.connect(self.start_trace)
         input_layout.addWidget(self.trace_btn)
+
+        # Keep probing every hop (like mtr) instead of tracing once
+        self.continuous_check = QCheckBox("Continuous")
+        self.continuous_check.setToolTip("Probe every hop each second and keep per-hop loss and latency statistics")
+        if platform.system() != "Linux":
+            self.continuous_check.setEnabled(False)
+            self.continuous_check.setToolTip("Continuous mode is only available on Linux")
+        input_layout.addWidget(self.continuous_check)
         
         self.status_label = QLabel("")
         self.status_label.setStyleSheet("color: #3186cc;")
@@ -265,15 +316,16 @@ class TraceVisualizer(QWidget):
         splitter = QSplitter(Qt.Vertical)
         splitter.setHandleWidth(2)
         
-        # Add map view
-        self.web_view = QWebEngineView()
+        # Add map view: loaded once, hops are drawn into it as they are located
+        self.web_view = TraceMap()
         self.web_view.setMinimumHeight(300)
+        self.web_view.hop_drawn.connect(self.on_hop_drawn)
         splitter.addWidget(self.web_view)
         
         # Add trace results table
         self.results_table = QTableWidget()
-        self.results_table.setColumnCount(5)
-        self.results_table.setHorizontalHeaderLabels(["Hop", "Host", "IP", "Time (ms)", "Country"])
+        self.results_table.setColumnCount(len(TRACE_COLUMNS))
+        self.results_table.setHorizontalHeaderLabels(TRACE_COLUMNS)
         self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.results_table.setMinimumHeight(150)
         self.results_table.setVisible(False)  # Hide until we have results
@@ -288,13 +340,12 @@ class TraceVisualizer(QWidget):
         
         # For real-time visualization
         self.hop_locations = []
-        self.incremental_hops = []
+        self.incremental_hops = {}  # table row -> hop data
+        self.draw_times = []  # ms each map update of the current trace took
 
     def show_world_map(self):
-        m = folium.Map(location=[20, 0], zoom_start=2)
-        data = os.path.join(os.path.dirname(__file__), 'world_map.html')
-        m.save(data)
-        self.web_view.setUrl(QUrl.fromLocalFile(data))
+        self.web_view.clear()
+        self.web_view.set_title("")
 
     def perform_dns_lookup(self):
         """Resolve a website URL to its IP address"""
@@ -340,6 +391,9 @@ class TraceVisualizer(QWidget):
             self.trace_btn.setFocus()
 
     def start_trace(self):
+        if self.monitored is not None:
+            self.stop_monitoring()  # the button reads "Stop" while monitoring
+            return
         target = self.ip_input.text().strip()
         if not target:
             QMessageBox.warning(self, "Warning", "Please enter an IP or domain")
@@ -370,10 +424,17 @@ class TraceVisualizer(QWidget):
             self.trace_btn.setText("Tracing...")
             self.results_table.setRowCount(0)
             self.results_table.setVisible(True)
-            self.incremental_hops = []
+            self.incremental_hops = {}
             self.hop_locations = []
+            self.draw_times = []
+            self.trace_id += 1
             
+            if self.continuous_check.isChecked():
+                self.start_monitoring(target)
+                return
+
             # Create a basic map to show progress
+            self.set_columns(TRACE_COLUMNS)
             self.show_initial_map(f"Tracing route to {display_name}...")
             
             # Start the worker
@@ -395,10 +456,6 @@ class TraceVisualizer(QWidget):
     def update_status(self, status):
         self.status_label.setText(status)
 
-    def update_hop(self, hop_data):
-        self.incremental_hops.append(hop_data)
-        self.plot_trace(self.incremental_hops)
-
     def on_trace_complete(self, hops):
         self.trace_btn.setEnabled(True)
         if not hops:
@@ -406,126 +463,15 @@ class TraceVisualizer(QWidget):
             self.show_world_map()
             self.results_table.setVisible(False)
             return
-        self.plot_trace(hops)
+        target_ip = hops[-1]['ip'] if hops[-1]['ip'] != "Timeout" else "Unknown"
+        target_host = hops[-1]['host'] if hops[-1]['host'] != "Unknown" else target_ip
+        self.web_view.set_title(f"Traceroute to {target_host} ({target_ip})",
+                                f"{len(hops)} hops max, 60 byte packets")
 
     def on_trace_failed(self, error_msg):
         self.trace_btn.setEnabled(True)
         QMessageBox.critical(self, "Error", f"Trace failed: {error_msg}")
 
-    def plot_trace(self, hops):
-        # Create a new map centered on a neutral position
-        m = folium.Map(location=[20, 0], zoom_start=2)
-        locations = []
-        hop_info = []
-        
-        # Clear the results table and prepare for new data
-        self.results_table.setRowCount(0)
-        self.results_table.setRowCount(len(hops))
-        self.results_table.setVisible(True)
-        
-        for index, hop in enumerate(hops):
-            ip = hop['ip']
-            hop_num = hop['hop']
-            host = hop['host']
-            time_ms = hop['time_ms']
-            
-            # Skip adding markers for timeouts or reserved IPs
-            if ip == "Timeout" or is_reserved_ip(ip):
-                # Add to table but skip mapping
-                self.add_hop_to_table(index, hop_num, host, ip, time_ms, "Unknown")
-                continue
-                
-            try:
-                response = requests.get(f"http://ip-api.com/json/{ip}").json()
-                if response['status'] == 'success':
-                    lat, lon = response['lat'], response['lon']
-                    country = response['countryCode']
-                    country_name = response['country']
-                    city = response['city']
-                    flag_url = f"https://flagcdn.com/w40/{country.lower()}.png"
-                    
-                    # Create popup with hop number prominently displayed
-                    popup_html = f"""
-                    <div style="font-family: Arial, sans-serif;">
-                        <div style="font-size: 16px; font-weight: bold; text-align: center; margin-bottom: 8px;">
-                            Hop #{hop_num}
-                        </div>
-                        <div>
-                            <b>IP:</b> {ip}<br>
-                            <b>Host:</b> {host}<br>
-                            <b>Location:</b> {city}, {country}<br>
-                            <b>Response time:</b> {time_ms} ms<br>
-                            <img src="{flag_url}" width="40">
-                        </div>
-                    </div>
-                    """
-                    
-                    popup = folium.Popup(popup_html, max_width=300)
-                    
-                    # Create custom icon with hop number
-                    icon_html = f'''
-                    <div style="background-color: #3186cc; color: white; border-radius: 50%; 
-                         width: 25px; height: 25px; line-height: 25px; text-align: center; 
-                         font-weight: bold; font-size: 14px; border: 2px solid white;">
-                        {hop_num}
-                    </div>
-                    '''
-                    
-                    # Add the marker with custom icon
-                    folium.Marker(
-                        [lat, lon],
-                        popup=popup,
-                        icon=folium.DivIcon(html=icon_html, icon_size=(30, 30))
-                    ).add_to(m)
-                    
-                    # Also add country flag as a separate marker
-                    folium.Marker(
-                        [lat, lon],
-                        icon=folium.features.CustomIcon(flag_url, icon_size=(20, 15)),
-                        popup=f"Country: {country_name}"
-                    ).add_to(m)
-                    
-                    locations.append([lat, lon])
-                    
-                    # Add hop to results table
-                    self.add_hop_to_table(index, hop_num, host, ip, time_ms, country)
-                else:
-                    # API response not successful, add to table with limited info
-                    self.add_hop_to_table(index, hop_num, host, ip, time_ms, "Unknown")
-            except Exception as e:
-                # Error looking up location, add to table with limited info
-                self.add_hop_to_table(index, hop_num, host, ip, time_ms, "Unknown")
-                
-        # Draw path line connecting all locations if we have more than one
-        if len(locations) > 1:
-            folium.PolyLine(locations, color="blue", weight=2.5, opacity=0.8, 
-                           dash_array='5').add_to(m)
-            
-            # Try to zoom to fit the route
-            if len(locations) > 0:
-                southwest = [min(loc[0] for loc in locations), min(loc[1] for loc in locations)]
-                northeast = [max(loc[0] for loc in locations), max(loc[1] for loc in locations)]
-                m.fit_bounds([southwest, northeast], padding=(50, 50))
-        
-        # Add title and destination information
-        target_ip = hops[-1]['ip'] if hops and hops[-1]['ip'] != "Timeout" else "Unknown"
-        target_host = hops[-1]['host'] if hops and hops[-1]['host'] != "Unknown" else target_ip
-        
-        title_html = f'''
-            <div style="position: fixed; top: 10px; left: 50px; width: 300px; 
-                       background-color: white; padding: 10px; z-index: 9999; 
-                       border: 2px solid #3186cc; border-radius: 5px;">
-                <h4 style="margin: 0;">Traceroute to {target_host} ({target_ip})</h4>
-                <p style="margin: 5px 0 0 0;">{len(hops)} hops max, 60 byte packets</p>
-            </div>
-        '''
-        m.get_root().html.add_child(folium.Element(title_html))
-        
-        # Save the map and display it
-        data = os.path.join(os.path.dirname(__file__), 'trace_map.html')
-        m.save(data)
-        self.web_view.setUrl(QUrl.fromLocalFile(data))
-        
     def add_hop_to_table(self, row_idx, hop_num, host, ip, time_ms, country):
         """Helper method to add a hop to the results table"""
         # Hop number
@@ -563,11 +509,9 @@ class TraceVisualizer(QWidget):
 
     def on_hop_ready(self, hop_data):
         """Handle a new hop as it comes in from the trace process"""
-        # Add to our ongoing collection
-        self.incremental_hops.append(hop_data)
-        
-        # Update the table with the new hop data
-        row_idx = len(self.incremental_hops) - 1
+        # Hops can arrive in any order; each one has its own row
+        row_idx = hop_data['hop'] - 1
+        self.incremental_hops[row_idx] = hop_data
         
         # Ensure table has enough rows
         if self.results_table.rowCount() <= row_idx:
@@ -581,156 +525,152 @@ class TraceVisualizer(QWidget):
         
         # Add to table first (always works even for timeouts)
         self.add_hop_to_table(row_idx, hop_num, host, ip, time_ms, "Looking up...")
+        if time_ms > 0:
+            self.latency_measured.emit(float(time_ms))
         
         # If it's a valid IP (not timeout), get location data and update the map
         if ip != "Timeout" and not is_reserved_ip(ip):
-            # Run in a separate thread to avoid blocking UI
-            lookup_thread = LocationLookupThread(row_idx, hop_data)
-            lookup_thread.result_ready.connect(self.on_location_lookup_complete)
-            lookup_thread.start()
-            self.lookup_threads.append(lookup_thread)  # Store reference to prevent garbage collection
-    
-    def on_location_lookup_complete(self, row_idx, response, country, country_name, city):
+            # The shared locator batches and caches lookups on its own thread;
+            # the signal carries the result back to the GUI thread
+            future = geo_locator.submit(ip)
+            future.add_done_callback(
+                lambda f, trace=self.trace_id, row=row_idx: self.location_ready.emit(trace, row, f.result() or {}))
+
+    def on_location_lookup_complete(self, trace_id, row_idx, response):
         """Handle completion of location lookup"""
-        if not self.results_table or row_idx >= self.results_table.rowCount():
+        if trace_id != self.trace_id or row_idx >= self.results_table.rowCount():
             return
-            
-        # Update country in the table
-        country_item = QTableWidgetItem(country)
-        self.results_table.setItem(row_idx, 4, country_item)
-        
-        # Clean up finished threads to prevent memory leaks
-        self.lookup_threads = [t for t in self.lookup_threads if t.isRunning()]
-        
-        # Now update the map with all current hops
-        self.update_map_with_hops()
-    
-    def update_map_with_hops(self):
-        """Update the map with all the hops we have so far"""
-        # Create a new map
-        m = folium.Map(location=[20, 0], zoom_start=2)
-        locations = []
-        
-        for hop in self.incremental_hops:
-            ip = hop['ip']
-            if ip == "Timeout" or is_reserved_ip(ip):
-                continue
-                
-            try:
-                response = requests.get(f"http://ip-api.com/json/{ip}").json()
-                if response['status'] == 'success':
-                    lat, lon = response['lat'], response['lon']
-                    hop_num = hop['hop']
-                    host = hop['host']
-                    time_ms = hop['time_ms']
-                    country = response['countryCode']
-                    country_name = response['country']
-                    city = response['city']
-                    flag_url = f"https://flagcdn.com/w40/{country.lower()}.png"
-                    
-                    # Create popup
-                    popup_html = f"""
-                    <div style="font-family: Arial, sans-serif;">
-                        <div style="font-size: 16px; font-weight: bold; text-align: center; margin-bottom: 8px;">
-                            Hop #{hop_num}
-                        </div>
-                        <div>
-                            <b>IP:</b> {ip}<br>
-                            <b>Host:</b> {host}<br>
-                            <b>Location:</b> {city}, {country}<br>
-                            <b>Response time:</b> {time_ms} ms<br>
-                            <img src="{flag_url}" width="40">
-                        </div>
-                    </div>
-                    """
-                    
-                    popup = folium.Popup(popup_html, max_width=300)
-                    
-                    # Create custom icon with hop number
-                    icon_html = f'''
-                    <div style="background-color: #3186cc; color: white; border-radius: 50%; 
-                         width: 25px; height: 25px; line-height: 25px; text-align: center; 
-                         font-weight: bold; font-size: 14px; border: 2px solid white;">
-                        {hop_num}
-                    </div>
-                    '''
-                    
-                    # Add the marker
-                    folium.Marker(
-                        [lat, lon],
-                        popup=popup,
-                        icon=folium.DivIcon(html=icon_html, icon_size=(30, 30))
-                    ).add_to(m)
-                    
-                    # Add country flag
-                    folium.Marker(
-                        [lat, lon],
-                        icon=folium.features.CustomIcon(flag_url, icon_size=(20, 15)),
-                        popup=f"Country: {country_name}"
-                    ).add_to(m)
-                    
-                    # Store location for line drawing
-                    locations.append([lat, lon])
-                    
-            except Exception as e:
-                print(f"Error adding marker for hop {hop['hop']}: {str(e)}")
-                
-        # Draw path line if we have multiple locations
-        if len(locations) > 1:
-            folium.PolyLine(locations, color="blue", weight=2.5, opacity=0.8, 
-                           dash_array='5').add_to(m)
-            
-            # Zoom to fit the route
-            if len(locations) > 0:
-                try:
-                    southwest = [min(loc[0] for loc in locations), min(loc[1] for loc in locations)]
-                    northeast = [max(loc[0] for loc in locations), max(loc[1] for loc in locations)]
-                    m.fit_bounds([southwest, northeast], padding=(50, 50))
-                except:
-                    pass
-        
-        # Add title showing trace is in progress
-        target = self.ip_input.text().strip()
-        progress_html = f'''
-            <div style="position: fixed; top: 10px; left: 50px; width: 300px; 
-                       background-color: white; padding: 10px; z-index: 9999; 
-                       border: 2px solid #3186cc; border-radius: 5px;">
-                <h4 style="margin: 0;">Tracing route to {target}</h4>
-                <p style="margin: 5px 0 0 0;">Hop {len(self.incremental_hops)} - Trace in progress...</p>
-            </div>
-        '''
-        m.get_root().html.add_child(folium.Element(progress_html))
-        
-        # Save and display
-        data = os.path.join(os.path.dirname(__file__), 'trace_map.html')
-        m.save(data)
-        self.web_view.setUrl(QUrl.fromLocalFile(data))
-    
+
+        # Update country in the table (the last column in either layout)
+        country_item = QTableWidgetItem(response.get('countryCode', "Unknown"))
+        self.results_table.setItem(row_idx, self.results_table.columnCount() - 1, country_item)
+
+        # Draw just this hop into the loaded map
+        if 'lat' in response and 'lon' in response and row_idx in self.incremental_hops:
+            self.hop_locations.append(response)
+            self.web_view.add_hop(self.incremental_hops[row_idx], response)
+            if self.trace_btn.isEnabled():
+                return  # trace already finished; keep its final title
+            target = self.ip_input.text().strip()
+            self.web_view.set_title(f"Tracing route to {target}",
+                                    f"Hop {max(self.incremental_hops) + 1} - Trace in progress...")
+
+    def set_columns(self, labels):
+        self.results_table.setColumnCount(len(labels))
+        self.results_table.setHorizontalHeaderLabels(labels)
+
+    def start_monitoring(self, target):
+        """Probe every hop of the route continuously; the table is updated in place"""
+        if self.scheduler is None:
+            self.scheduler = MtrScheduler()
+            self.scheduler.start()
+        trace_id = self.trace_id
+        try:
+            self.monitored = self.scheduler.add(
+                target, lambda hops: self.monitor_updated.emit(trace_id, hops))
+        except socket.gaierror:
+            QMessageBox.warning(self, "Warning", f"Could not resolve domain: {target}")
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Continuous trace unavailable: {str(e)}")
+        if self.monitored is None:
+            self.trace_btn.setEnabled(True)
+            self.trace_btn.setText("Trace Route")
+            return
+        self.set_columns(MONITOR_COLUMNS)
+        self.show_initial_map(f"Monitoring route to {target}")
+        self.trace_btn.setEnabled(True)
+        self.trace_btn.setText("Stop")
+        self.status_label.setText(f"Probing every hop each {self.scheduler.interval:g} s")
+
+    def stop_monitoring(self):
+        self.scheduler.remove(self.monitored)
+        self.monitored = None
+        self.trace_id += 1  # drop updates already on their way
+        self.trace_btn.setText("Trace Route")
+        self.status_label.setText("Monitoring stopped")
+
+    def set_cell(self, row, col, text, color):
+        """Change a table cell's text in place, creating the item only once"""
+        item = self.results_table.item(row, col)
+        if item is None:
+            item = QTableWidgetItem(text)
+            self.results_table.setItem(row, col, item)
+        elif item.text() != text:
+            item.setText(text)
+        item.setBackground(color)
+
+    def on_monitor_update(self, trace_id, hops):
+        """Refresh the continuous-mode table from the scheduler's latest per-hop figures"""
+        if trace_id != self.trace_id:
+            return
+        if self.results_table.rowCount() != len(hops):
+            self.results_table.setRowCount(len(hops))
+            for row_idx in [row for row in self.incremental_hops if row >= len(hops)]:
+                del self.incremental_hops[row_idx]
+        country_col = len(MONITOR_COLUMNS) - 1
+        for hop_data in hops:
+            row_idx = hop_data['hop'] - 1
+            ip = hop_data['ip']
+            known = self.incremental_hops.get(row_idx)
+            changed = known is None or known['ip'] != ip
+            host = ip if changed else known['host']
+            if hop_data['received'] == 0:
+                row_color = QColor(255, 200, 200)  # Light red: nothing answered yet
+            elif hop_data['loss'] > 0 or hop_data['avg'] > 100:
+                row_color = QColor(255, 230, 180)  # Light orange: lossy or slow
+            else:
+                row_color = QColor(200, 255, 200)  # Light green
+            texts = [str(hop_data['hop']), host, ip, f"{hop_data['loss']:.1f}", str(hop_data['sent'])]
+            for key in ('last', 'avg', 'best', 'worst', 'stddev', 'p50', 'p95'):
+                value = hop_data[key]
+                texts.append("*" if value is None else f"{value:.2f}")
+            for col, text in enumerate(texts):
+                self.set_cell(row_idx, col, text, row_color)
+
+            # Name and locate each hop once, and again if a different router answers for it
+            if changed:
+                self.incremental_hops[row_idx] = {'hop': hop_data['hop'], 'host': host, 'ip': ip,
+                                                  'time_ms': hop_data['avg'] or 0}
+                self.set_cell(row_idx, country_col, "Looking up..." if ip != "Timeout" else "", row_color)
+                if ip != "Timeout":
+                    future = reverse_resolver.submit(ip)
+                    future.add_done_callback(
+                        lambda f, trace=self.trace_id, row=row_idx, ip=ip: self.host_ready.emit(trace, row, ip, hostname_from(f) or ip))
+                if ip != "Timeout" and not is_reserved_ip(ip):
+                    future = geo_locator.submit(ip)
+                    future.add_done_callback(
+                        lambda f, trace=self.trace_id, row=row_idx: self.location_ready.emit(trace, row, f.result() or {}))
+            elif self.results_table.item(row_idx, country_col) is not None:
+                self.results_table.item(row_idx, country_col).setBackground(row_color)
+
+    def on_host_lookup_complete(self, trace_id, row_idx, ip, host):
+        """Show a continuous-mode hop's name once its reverse lookup finishes"""
+        known = self.incremental_hops.get(row_idx)
+        if trace_id != self.trace_id or known is None or known['ip'] != ip:
+            return  # another trace, or another router answers for this hop now
+        known['host'] = host
+        item = self.results_table.item(row_idx, 1)
+        if item is not None:
+            item.setText(host)
+
+    def on_hop_drawn(self, hop, ms):
+        self.draw_times.append(ms)
+        logging.debug(f"Trace map: hop {hop} drawn in {ms:.1f} ms")
+
     def show_initial_map(self, message):
         """Show an initial map with a message that the trace is starting"""
-        m = folium.Map(location=[20, 0], zoom_start=2)
-        
-        # Add a title with the starting message
-        title_html = f'''
-            <div style="position: fixed; top: 10px; left: 50px; width: 300px; 
-                       background-color: white; padding: 10px; z-index: 9999; 
-                       border: 2px solid #3186cc; border-radius: 5px;">
-                <h4 style="margin: 0;">{message}</h4>
-                <p style="margin: 5px 0 0 0;">Initializing trace...</p>
-            </div>
-        '''
-        m.get_root().html.add_child(folium.Element(title_html))
-        
-        # Save and display
-        data = os.path.join(os.path.dirname(__file__), 'trace_map.html')
-        m.save(data)
-        self.web_view.setUrl(QUrl.fromLocalFile(data))
-    
+        self.web_view.clear()
+        self.web_view.set_title(message, "Initializing trace...")
+
     def on_trace_finished(self):
         """Handle trace completion"""
         self.trace_btn.setEnabled(True)
         self.trace_btn.setText("Trace Route")
-        self.status_label.setText("Trace complete!")
+        status = "Trace complete!"
+        if self.draw_times:
+            status += (f" Map updates: {sum(self.draw_times) / len(self.draw_times):.1f} ms avg, "
+                       f"{max(self.draw_times):.1f} ms max")
+        self.status_label.setText(status)
 
     def closeEvent(self, event):
         """Cleanup when the widget is closed"""
@@ -738,13 +678,13 @@ class TraceVisualizer(QWidget):
         if hasattr(self, 'worker') and self.worker and self.worker.isRunning():
             self.worker.stop()
             self.worker.wait(1000)  # Wait up to 1 second for it to stop
-            
-        # Clean up any lookup threads that might still be running
-        for thread in self.lookup_threads:
-            if thread.isRunning():
-                thread.wait(500)  # Give threads time to finish
-                
-        self.lookup_threads.clear()
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+            self.monitored = None
+
+        # Results of lookups still running are dropped
+        self.trace_id += 1
         super().closeEvent(event)
 
 